@@ -1,63 +1,106 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
+import sys
+import argparse
+import asyncio
+import aiohttp
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.http_cache import http_get
+from common.ratelimit import get_scheduler
+from common.url_rewrite import rewrite_url
+from common.extractors import load_extractor
+from common.parsing import make_soup, LIBRARY_TABLE, STATE_LINKS
 
 # URL of the main page
 url = "https://publiclibraries.com/state/"
 base_url = "https://publiclibraries.com"
 
-# Send a request to the main page
-response = requests.get(url)
-soup = BeautifulSoup(response.text, 'html.parser')
+# Function to read the state links from the main page
+def parse_state_links(html):
+    soup = make_soup(html, STATE_LINKS)
+    # Find all the state links
+    state_links = soup.find('div', class_='dropdown-content').find_all('a')
+    return [(state.text, state['href']) for state in state_links]
 
-# Find all the state links
-state_links = soup.find('div', class_='dropdown-content').find_all('a')
-
-# Create a folder to store CSVs
-if not os.path.exists('states_data'):
-    os.makedirs('states_data')
-
-# Loop through each state link and scrape the state's libraries
-for state in state_links:
-    state_name = state.text
-    state_url = state['href']
-
-    print(f"Scraping state: {state_name} -> {state_url}")
-    # Fetch the state page
-    state_response = requests.get(state_url)
-    state_soup = BeautifulSoup(state_response.text, 'html.parser')
-    # Find the table with library information
-    libraries_table = state_soup.find('table', id='libraries')
+# Function to extract the libraries of one state page (None if the page has no table)
+def parse_libraries(html, state_name):
+    state_soup = make_soup(html, LIBRARY_TABLE)
+    # Rows of table#libraries, per the publiclibraries_libraries extractor config
+    libraries = load_extractor('publiclibraries_libraries').extract(state_soup)
     # Debugging: Check if the table was found
-    if libraries_table is None:
+    if libraries is None:
         print(f"No table found for {state_name}. Skipping...")
-        continue  # Skip if no table found
-    # Debugging: Check if tbody exists
-    tbody = libraries_table.find('tbody')
-    if tbody is None:
-        print(f"No tbody found for {state_name}. Trying without tbody...")
-        rows = libraries_table.find_all('tr')
-    else:
-        rows = tbody.find_all('tr')
-    libraries = []
-    for row in rows:
-        columns = row.find_all('td')
-        # Extract the data for each library, ensuring exactly 5 columns
-        if len(columns) == 5: 
-            city = columns[0].text.strip()
-            library_name = columns[1].text.strip()
-            address = columns[2].text.strip()
-            zip_code = columns[3].text.strip()
-            phone = columns[4].text.strip()
-
-            libraries.append({
-                'City': city,
-                'Library Name': library_name,
-                'Address': address,
-                'Zip Code': zip_code,
-                'Phone': phone
-        })
+    return libraries
+
+# Function to write the libraries of one state to its CSV
+def save_state(state_name, libraries):
     df = pd.DataFrame(libraries)
     df.to_csv(f'states_data/{state_name}.csv', index=False)
     print(f"Data for {state_name} saved successfully.")
+
+# Original crawl: one state page after another
+def crawl_sync():
+    # Send a request to the main page
+    response = http_get(url)
+    state_links = parse_state_links(response.text)
+
+    # Loop through each state link and scrape the state's libraries
+    for state_name, state_url in state_links:
+        print(f"Scraping state: {state_name} -> {state_url}")
+        # Fetch the state page
+        state_response = http_get(state_url)
+        libraries = parse_libraries(state_response.text, state_name)
+        if libraries is None:
+            continue  # Skip if no table found
+        save_state(state_name, libraries)
+
+# Fetch one state page; the semaphore keeps at most `concurrency` pages in flight
+# and the shared host scheduler slows down when publiclibraries.com pushes back
+async def fetch_state(session, semaphore, state_name, state_url):
+    async with semaphore:
+        print(f"Scraping state: {state_name} -> {state_url}")
+        async with get_scheduler().slot_async(rewrite_url(state_url)) as slot:
+            async with session.get(rewrite_url(state_url)) as state_response:
+                html = await state_response.text()
+                slot.done(state_response.status, state_response.headers)
+        return state_name, html
+
+# Async crawl: all state pages share one keep-alive connector and each CSV is
+# written as soon as its page arrives, so a full refresh takes about as long as
+# the slowest pages instead of the sum of all of them
+async def crawl_async(concurrency=10, timeout=30):
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async with session.get(rewrite_url(url)) as response:
+            state_links = parse_state_links(await response.text())
+
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [fetch_state(session, semaphore, state_name, state_url) for state_name, state_url in state_links]
+        for finished in asyncio.as_completed(tasks):
+            try:
+                state_name, html = await finished
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching a state page: {e}")
+                continue
+            libraries = parse_libraries(html, state_name)
+            if libraries is None:
+                continue  # Skip if no table found
+            save_state(state_name, libraries)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape public libraries for every state")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async",
+                        help="async fetches state pages concurrently, sync fetches them one by one")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="maximum number of state pages in flight (async mode)")
+    args = parser.parse_args()
+
+    # Create a folder to store CSVs
+    if not os.path.exists('states_data'):
+        os.makedirs('states_data')
+
+    if args.mode == "async":
+        asyncio.run(crawl_async(concurrency=args.concurrency))
+    else:
+        crawl_sync()
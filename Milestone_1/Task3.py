@@ -1,13 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import pandas as pd
+import requests
 import streamlit as st
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fetcher import fetch_pages_in_order, DEFAULT_WORKERS
+from common.http_cache import http_get
+from common.deal_store import get_deal_store
+from common.extractors import load_extractor
+from common.normalize import normalize_deals
+from common.parsing import make_soup, PAGINATION, PRODUCT_ITEMS, STORE_LINKS
+from common.search_index import index_deals
 
 # Function to fetch the available stores dynamically
 def get_available_stores():
     url = "https://dealsheaven.in/stores"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    response = http_get(url)
+    soup = make_soup(response.text, STORE_LINKS)
 
     stores = {}
     store_links = soup.select('ul > li > a[href^="https://dealsheaven.in/store/"]')
@@ -20,11 +29,8 @@ def get_available_stores():
     
     return stores
 
-# Function to find the last page dynamically
-def find_last_page(store_url):
-    response = requests.get(store_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
+# Function to read the last page number out of a parsed page
+def parse_last_page(soup):
     last_page = 1  # Default if pagination is not found
     pagination = soup.select('ul.pagination li.page-item a.page-link')
     
@@ -40,44 +46,64 @@ def find_last_page(store_url):
     
     return last_page
 
+# Function to find the last page dynamically
+def find_last_page(store_url):
+    response = http_get(store_url)
+    soup = make_soup(response.text, PAGINATION)
+    return parse_last_page(soup)
+
+# Function to read the product details out of a parsed store page
+# (fields come from the shared dealsheaven_products extractor config;
+# products with missing data are skipped)
+def parse_store_page(soup):
+    return load_extractor('dealsheaven_products').extract(soup)
+
 # Function to scrape product details from a single page
 def scrape_store_page(store_url, page):
     url = f"{store_url}?page={page}"
-    response = requests.get(url)
+    response = http_get(url)
     if response.status_code != 200:
         return None
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    products = soup.find_all('div', class_='product-item-detail')
+    soup = make_soup(response.text, PRODUCT_ITEMS)
+    return parse_store_page(soup)
 
-    data = []
-    for product in products:
-        try:
-            title = product.find('h3').get_text(strip=True)
-            product_url = product.find('a')['href']
-            discount = product.find('div', class_='discount').get_text(strip=True)
-            price = product.find('p', class_='price').get_text(strip=True)
-            special_price = product.find('p', class_='spacail-price').get_text(strip=True)
-            image_url = product.find('img')['src']
-            data.append({
-                'Title': title,
-                'Product URL': product_url,
-                'Discount': discount,
-                'Price': price,
-                'Special Price': special_price,
-                'Image URL': image_url
-            })
-        except AttributeError:
-            continue  # If any product data is missing, skip it
-    return data
+# Function to download page 1 of a store once and read both its products and
+# the last page number, so choosing a store and scraping it cost one request.
+# Cached across Streamlit reruns; a failed download raises instead, so it is
+# not cached and the next rerun tries again.
+@st.cache_data(ttl=600, show_spinner=False)
+def probe_store(store_url):
+    response = http_get(f"{store_url}?page=1")
+    if response.status_code != 200:
+        raise requests.HTTPError(f"Failed to retrieve page 1: Status code {response.status_code}", response=response)
+
+    soup = make_soup(response.text, [PRODUCT_ITEMS, PAGINATION])
+    return {'products': parse_store_page(soup), 'last_page': parse_last_page(soup)}
+
+# Function to probe a store for the UI: a failed probe reads as a store with no products
+def load_probe(store_url):
+    try:
+        return probe_store(store_url)
+    except requests.RequestException:
+        return {'products': None, 'last_page': 1}
 
 # Function to scrape multiple pages based on user input
-def scrape_store(store, pages):
+# (page 1 comes from the store probe, pages 2..N are fetched `workers` at a time
+# and still come back in page order)
+def scrape_store(store, pages, workers=DEFAULT_WORKERS, probe=None):
     base_url = f"https://dealsheaven.in/store/{store}"
     all_data = []
 
-    for page in range(1, pages + 1):
-        data = scrape_store_page(base_url, page)
+    if probe is None:
+        probe = load_probe(base_url)
+    if not probe['products']:
+        st.error("Page 1 does not exist!")
+        return all_data
+    all_data.extend(probe['products'])
+
+    fetch_page = lambda page: scrape_store_page(base_url, page)
+    for page, data in fetch_pages_in_order(fetch_page, range(2, pages + 1), workers):
         if data:
             all_data.extend(data)
         else:
@@ -87,37 +113,43 @@ def scrape_store(store, pages):
     return all_data
 
 # Streamlit UI
-st.title("Deals Heaven Web Scraper")
-
-# Dynamically load stores from the website
-stores = get_available_stores()
-if not stores:
-    st.error("Could not fetch stores. Please try again later.")
-else:
-    # User input for store and number of pages
-    store_name = st.selectbox("Select Store", list(stores.keys()))
-    store = stores[store_name]
-
-    # Find the last page dynamically
-    last_page = find_last_page(f"https://dealsheaven.in/store/{store}")
-    st.write(f"Max pages available for {store_name}: {last_page}")
-
-    # Input number of pages, no limits but handle validation later
-    pages = st.number_input("Number of Pages to Scrape", min_value=1, step=1)
-
-    # Scrape data when the button is clicked
-    if st.button("Scrape"):
-        # Validate if the entered number of pages is greater than the last page
-        if pages > last_page:
-            st.error(f"Only {last_page} pages exist. Please input a number between 1 and {last_page}.")
-        else:
-            scraped_data = scrape_store(store, pages)
-            if scraped_data:
-                df = pd.DataFrame(scraped_data)
-                st.dataframe(df)  # Display scraped data in the UI
+if __name__ == "__main__":
+    st.title("Deals Heaven Web Scraper")
+
+    # Dynamically load stores from the website
+    stores = get_available_stores()
+    if not stores:
+        st.error("Could not fetch stores. Please try again later.")
+    else:
+        # User input for store and number of pages
+        store_name = st.selectbox("Select Store", list(stores.keys()))
+        store = stores[store_name]
+
+        # Find the last page dynamically (page 1 is kept for the scrape)
+        probe = load_probe(f"https://dealsheaven.in/store/{store}")
+        last_page = probe['last_page']
+        st.write(f"Max pages available for {store_name}: {last_page}")
+
+        # Input number of pages, no limits but handle validation later
+        pages = st.number_input("Number of Pages to Scrape", min_value=1, step=1)
+
+        # Scrape data when the button is clicked
+        if st.button("Scrape"):
+            # Validate if the entered number of pages is greater than the last page
+            if pages > last_page:
+                st.error(f"Only {last_page} pages exist. Please input a number between 1 and {last_page}.")
+            else:
+                scraped_data = scrape_store(store, pages, probe=probe)
+                if scraped_data:
+                    # Typed Price / Special Price / Discount columns sort and filter as numbers
+                    df = normalize_deals(pd.DataFrame(scraped_data))
+                    st.dataframe(df)  # Display scraped data in the UI
                 
-                # Save to CSV
-                csv_file = f"{store}_scraped_data.csv"
-                df.to_csv(csv_file, index=False)
-                st.success(f"Scraping completed! Data saved to {csv_file}.")
-                st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
+                    # Save to CSV
+                    csv_file = f"{store}_scraped_data.csv"
+                    df.to_csv(csv_file, index=False)
+                    # Keep every scraped deal (and its price changes) in the local deal store
+                    get_deal_store().upsert_deals(scraped_data, store=store)
+                    index_deals(scraped_data, store=store)
+                    st.success(f"Scraping completed! Data saved to {csv_file}.")
+                    st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
@@ -2,70 +2,53 @@ import streamlit as st
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.common.by import By
-import time
 import pandas as pd
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.extractors import load_extractor
+from common.network_capture import capture_options
+from common.normalize import normalize_behance_stats
+from common.playwright_engine import make_driver_pool
+from common.ratelimit import polite_get
+from common.resource_blocking import apply_blocking, blocking_options
+from common.scrolling import scrape_listing
+from common.waits import wait_for_page
 
-# Function to scrape items from Behance with search and category filtering
-def scrape_behance_projects(search_term, category, max_items):
-    # Define Behance URL based on category selection
-    base_url = f'https://www.behance.net/assets/{category}' if category else 'https://www.behance.net/search/projects'
+# Function to initialize Edge WebDriver
+def init_driver():
     driver_path = 'D:/Deal_Scrapper/edgedriver_win64/msedgedriver.exe' 
     service = Service(driver_path)
-    driver = webdriver.Edge(service=service)
-    driver.get(base_url)
-    time.sleep(3)
-
-    # Input search term
-    if search_term:
-        search_box = driver.find_element(By.CSS_SELECTOR, "input[aria-label='Search for assets']")
-        search_box.clear()
-        search_box.send_keys(search_term)
-        search_box.submit()
-        time.sleep(3)
-
-    projects = []
-    scroll_pause_time = 0.9
-
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    
-    while len(projects) < max_items:
-        items = driver.find_elements(By.CLASS_NAME, 'Cover-cover-gDM')
-        for item in items:
-            try:
-                title_element = item.find_element(By.CLASS_NAME, 'Title-title-lpJ')
-                owner_element = item.find_element(By.CLASS_NAME, 'Owners-overflowText-C9U')
-                stats_element = item.find_element(By.CLASS_NAME, 'ProjectCover-stats-QLg')
+    # Images, fonts, video and trackers are never read, so never downloaded;
+    # the performance log carries the API responses the records are read from
+    options = capture_options(blocking_options(webdriver.EdgeOptions(), 'behance'))
+    return apply_blocking(webdriver.Edge(service=service, options=options), 'behance')
 
-                title = title_element.text
-                owner = owner_element.text if owner_element else 'Multiple Owners'
-                likes = stats_element.find_elements(By.TAG_NAME, 'span')[0].text
-                views = stats_element.find_elements(By.TAG_NAME, 'span')[1].text
+# One pool of warm browsers (or Playwright contexts) per server process, reused across reruns
+@st.cache_resource(show_spinner=False)
+def get_driver_pool():
+    return make_driver_pool(init_driver, 'behance')
 
-                projects.append({
-                    'Title': title,
-                    'Owner': owner,
-                    'Likes': likes,
-                    'Views': views
-                })
-
-                print(f"Scraped project: {title}, Owner: {owner}, Likes: {likes}, Views: {views}")
-
-                driver.execute_script("window.scrollBy(0, 300);")
-                time.sleep(scroll_pause_time)
-
-                if len(projects) >= max_items:
-                    break
+# Function to scrape items from Behance with search and category filtering
+def scrape_behance_projects(search_term, category, max_items):
+    # Define Behance URL based on category selection
+    base_url = f'https://www.behance.net/assets/{category}' if category else 'https://www.behance.net/search/projects'
+    with get_driver_pool().driver() as driver:
+        polite_get(driver, base_url)
+        wait_for_page(driver, '.Cover-cover-gDM', url=base_url)
 
-            except Exception as e:
-                print(f"Error extracting data: {e}")
+        # Input search term
+        if search_term:
+            search_box = driver.find_element(By.CSS_SELECTOR, "input[aria-label='Search for assets']")
+            search_box.clear()
+            search_box.send_keys(search_term)
+            search_box.submit()
+            wait_for_page(driver, '.Cover-cover-gDM', url=base_url, after_action=True)
 
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            print("No new content loaded, stopping.")
-            break
-        last_height = new_height
+        # Records come from the JSON the page's API calls return, paged through the
+        # API; without captured responses, from the cards while scrolling to the end
+        projects = scrape_listing(driver, load_extractor('behance_covers'), max_items, url=base_url)
 
-    driver.quit()
     return projects
 
 # Streamlit UI
@@ -82,7 +65,8 @@ if st.button("Scrape"):
         projects = scrape_behance_projects(search_term, category, max_items)
         
     if projects:
-        df = pd.DataFrame(projects)
+        # "1.2K" likes / views become numbers as well
+        df = normalize_behance_stats(pd.DataFrame(projects))
         df.index = df.index + 1
         csv_file_path = 'behance_projects.csv'
         df.to_csv(csv_file_path, index=False)
@@ -1,13 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import pandas as pd
+import requests
 import streamlit as st
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fetcher import fan_out_pages, fetch_pages_in_order, DEFAULT_WORKERS, FAN_OUT_WORKERS, FAN_OUT_MAX_REQUESTS
+from common.http_cache import http_get
+from common.deal_store import get_deal_store
+from common.extractors import load_extractor
+from common.normalize import normalize_deals
+from common.parsing import make_soup, parse_last_page, PAGINATION, PRODUCT_ITEMS, STORE_LINKS
+from common.search_index import get_search_index, index_deals
 
 # Function to fetch the available stores dynamically
 def get_available_stores():
     url = "https://dealsheaven.in/stores"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    response = http_get(url)
+    soup = make_soup(response.text, STORE_LINKS)
 
     stores = {}
     store_links = soup.select('ul > li > a[href^="https://dealsheaven.in/store/"]')
@@ -20,167 +29,181 @@ def get_available_stores():
     
     return stores
 
-# Function to scrape results from all stores (via the search functionality of the website)
-def search_all_stores(search_query):
-    search_url = f"https://dealsheaven.in?keyword={search_query}"
-    response = requests.get(search_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    products = soup.find_all('div', class_='product-item-detail')
+# Function to scrape results from all stores: every store in `stores` (and every
+# results page of it) is searched concurrently under one global request budget.
+# Without a search query only page 1 of each store is read. Products carry
+# their store key in 'Store Name', like single-store scrapes. Returns
+# (products, truncated), truncated meaning the budget ran out first.
+def search_all_stores(search_query, stores, workers=FAN_OUT_WORKERS, max_requests=FAN_OUT_MAX_REQUESTS):
+    store_url = lambda store_key: f"https://dealsheaven.in/store/{store_key}"
+
+    results, truncated = fan_out_pages(
+        list(stores.values()),
+        probe=lambda store_key: probe_store(store_url(store_key), search_query),
+        fetch_page=lambda store_key, page: scrape_store_page(store_url(store_key), page, search_query),
+        workers=workers,
+        max_requests=max_requests,
+        max_pages=None if search_query else 1
+    )
+
+    data = [product for products in results.values() for product in products]
+    return data, truncated
+
+# Function to read the product details out of a parsed store page
+# (fields come from the shared dealsheaven_products extractor config)
+def parse_store_page(soup, store_url, search_query=None):
     data = []
-
-    for product in products:
-        try:
-            title = product.find('h3').get_text(strip=True)
-            if search_query.lower() in title.lower():
-                product_url = product.find('a')['href']
-                discount = product.find('div', class_='discount').get_text(strip=True)
-                price = product.find('p', class_='price').get_text(strip=True)
-                special_price = product.find('p', class_='spacail-price').get_text(strip=True)
-                image_url = product.find('img')['src']
-                data.append({
-                    'Page Number': 1,  # Dummy page number
-                    'Title': title,
-                    'Product URL': product_url,
-                    'Discount': discount,
-                    'Price': price,
-                    'Special Price': special_price,
-                    'Image URL': image_url,
-                    'Store Name': 'All Stores'
-                })
-        except AttributeError:
-            continue
+    for product in load_extractor('dealsheaven_products').extract(soup):
+        if not search_query or search_query.lower() in product['Title'].lower():
+            product['Store Name'] = store_url.split('/')[-1]  # Extract store name from URL
+            data.append(product)
 
     return data
 
-# Function to scrape product details from a store-specific page
+# Function to scrape product details from a store-specific page. Runs on
+# the page fetcher's threads, so a failed download raises (and is reported by
+# scrape_store if the scrape gets that far) instead of calling st.error
 def scrape_store_page(store_url, page, search_query=None):
     if search_query:
         url = f"{store_url}?page={page}&keyword={search_query}"
     else:
         url = f"{store_url}?page={page}"
     
-    response = requests.get(url)
+    response = http_get(url)
 
     if response.status_code != 200:
-        st.error(f"Failed to retrieve page {page}: Status code {response.status_code}")
-        return None
+        raise requests.HTTPError(f"Failed to retrieve page {page}: Status code {response.status_code}", response=response)
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    products = soup.find_all('div', class_='product-item-detail')
-    
-    data = []
-    for product in products:
-        try:
-            title = product.find('h3').get_text(strip=True)
-            if search_query == "" or search_query.lower() in title.lower():
-                product_url = product.find('a')['href']
-                discount = product.find('div', class_='discount').get_text(strip=True)
-                price = product.find('p', class_='price').get_text(strip=True)
-                special_price = product.find('p', class_='spacail-price').get_text(strip=True)
-                image_url = product.find('img')['src']
-                
-                data.append({
-                      # Correctly set the page number
-                    'Title': title,
-                    'Product URL': product_url,
-                    'Discount': discount,
-                    'Price': price,
-                    'Special Price': special_price,
-                    'Image URL': image_url,
-                    'Store Name': store_url.split('/')[-1]  # Extract store name from URL
-                })
-        except AttributeError:
-            continue
-
-    return data
+    soup = make_soup(response.text, PRODUCT_ITEMS)
+    return parse_store_page(soup, store_url, search_query)
 
 # Function to find the total number of pages for a store or search query
 def find_last_page(store_url):
-    response = requests.get(store_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Locate all pagination links
-    pagination = soup.select('ul.pagination li a')
-    
-    last_page = 1  # Default if pagination isn't found
-    
-    if pagination:
-        page_numbers = []
-        for link in pagination:
-            href = link['href']
-            # Extract the page number from the href
-            if "page=" in href:
-                page_num = href.split("page=")[-1]
-                if page_num.isdigit():
-                    page_numbers.append(int(page_num))
-        
-        if page_numbers:
-            last_page = max(page_numbers)  # Set to the highest page number
-
-    return last_page
+    response = http_get(store_url)
+    soup = make_soup(response.text, PAGINATION)
+    return parse_last_page(soup)
+
+# Function to download page 1 of a store once and read both its products and
+# the number of pages, so choosing a store and scraping it cost one request.
+# Cached across Streamlit reruns; a failed download raises instead, so it is
+# not cached and the next rerun tries again.
+@st.cache_data(ttl=600, show_spinner=False)
+def probe_store(store_url, search_query=""):
+    if search_query:
+        url = f"{store_url}?page=1&keyword={search_query}"
+    else:
+        url = f"{store_url}?page=1"
+
+    response = http_get(url)
+
+    if response.status_code != 200:
+        raise requests.HTTPError(f"Failed to retrieve page 1: Status code {response.status_code}", response=response)
+
+    soup = make_soup(response.text, [PRODUCT_ITEMS, PAGINATION])
+    return {
+        'products': parse_store_page(soup, store_url, search_query),
+        'last_page': parse_last_page(soup)
+    }
+
+# Function to probe a store for the UI: a failed probe is reported and reads
+# as a store with no products
+def load_probe(store_url, search_query=""):
+    try:
+        return probe_store(store_url, search_query)
+    except requests.RequestException as e:
+        st.error(str(e))
+        return {'products': None, 'last_page': 1}
 
 # Function to scrape multiple pages for a specific store
-def scrape_store(store, pages, search_query):
+# (page 1 comes from the store probe, pages 2..N are fetched `workers` at a time
+# and still come back in page order)
+def scrape_store(store, pages, search_query, workers=DEFAULT_WORKERS, probe=None):
     base_url = f"https://dealsheaven.in/store/{store}"
     all_data = []
 
-    for page in range(1, pages + 1):
-        data = scrape_store_page(base_url, page, search_query)
-        if data:
-            all_data.extend(data)
-        else:
-            break  # Stop if no products found
+    if probe is None:
+        probe = load_probe(base_url, search_query)
+    if not probe['products']:
+        return all_data  # Stop if no products found
+    all_data.extend(probe['products'])
+
+    fetch_page = lambda page: scrape_store_page(base_url, page, search_query)
+    try:
+        for page, data in fetch_pages_in_order(fetch_page, range(2, pages + 1), workers):
+            if data:
+                all_data.extend(data)
+            else:
+                break  # Stop if no products found
+    except requests.RequestException as e:
+        st.error(str(e))  # Stop at the first page that failed to download
 
     return all_data
 
 # Streamlit UI
-st.title("Deals Heaven Web Scraper")
-
-# Dynamically load stores from the website
-stores = get_available_stores()
-if not stores:
-    st.error("Could not fetch stores. Please try again later.")
-else:
-    store_name = st.selectbox("Select Store (Optional)", ["All Stores"] + list(stores.keys()))
-    store = stores.get(store_name)
+if __name__ == "__main__":
+    st.title("Deals Heaven Web Scraper")
 
-    search_query = st.text_input("Enter product to search for", "")
-    
-    # Display total pages available for the store
-    if store_name != "All Stores":
-        total_pages = find_last_page(f"https://dealsheaven.in/store/{store}")
-        st.write(f"Total pages available: {total_pages}")
-        pages = st.number_input("Number of Pages to Scrape", min_value=1, max_value=total_pages, step=1)
+    # Dynamically load stores from the website
+    stores = get_available_stores()
+    if not stores:
+        st.error("Could not fetch stores. Please try again later.")
     else:
-        total_pages = find_last_page("https://dealsheaven.in")
-        st.write(f"Total pages available: {total_pages}")
-        pages = 1  # Default for all stores
-
-    if st.button("Scrape"):
-        if store_name == "All Stores":
-            scraped_data = search_all_stores(search_query)
-        else:
-            scraped_data = scrape_store(store, pages, search_query)
-
-        if scraped_data:
-            df = pd.DataFrame(scraped_data)
-            
-            required_columns = ['Store Name', 'Title', 'Product URL', 'Discount', 'Price', 'Special Price', 'Image URL']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+        store_name = st.selectbox("Select Store (Optional)", ["All Stores"] + list(stores.keys()))
+        store = stores.get(store_name)
 
-            if missing_columns:
-                st.error(f"Missing columns in DataFrame: {missing_columns}. Please check the scraping logic.")
+        search_query = st.text_input("Enter product to search for", "")
+    
+        # Display total pages available for the store
+        if store_name != "All Stores":
+            probe = load_probe(f"https://dealsheaven.in/store/{store}", search_query)
+            total_pages = probe['last_page']
+            st.write(f"Total pages available: {total_pages}")
+            pages = st.number_input("Number of Pages to Scrape", min_value=1, max_value=total_pages, step=1)
+
+        if st.button("Scrape"):
+            if store_name == "All Stores":
+                scraped_data, truncated = search_all_stores(search_query, stores)
+                if truncated:
+                    st.warning(f"Stopped after {FAN_OUT_MAX_REQUESTS} requests; some stores' later pages were not searched.")
             else:
-                df = df[required_columns]
-                st.dataframe(df)
+                scraped_data = scrape_store(store, pages, search_query, probe=probe)
 
-                st.success(f"Scraping completed! Data scraped from {len(scraped_data)} product(s).")
+            if scraped_data:
+                df = pd.DataFrame(scraped_data)
+            
+                required_columns = ['Store Name', 'Title', 'Product URL', 'Discount', 'Price', 'Special Price', 'Image URL']
+                missing_columns = [col for col in required_columns if col not in df.columns]
+
+                if missing_columns:
+                    st.error(f"Missing columns in DataFrame: {missing_columns}. Please check the scraping logic.")
+                else:
+                    df = df[required_columns]
+                    # Store keys become the names shown in the store list
+                    store_names = {store_key: name for name, store_key in stores.items()}
+                    df = df.assign(**{'Store Name': df['Store Name'].map(store_names).fillna(df['Store Name'])})
+                    # Typed Price / Special Price / Discount columns sort and filter as numbers
+                    df = normalize_deals(df)
+                    st.dataframe(df)
+
+                    st.success(f"Scraping completed! Data scraped from {len(scraped_data)} product(s).")
                 
-                # Save to CSV
-                csv_file = f"{store_name}_scraped_data.csv" if store_name != "All Stores" else "all_stores_scraped_data.csv"
-                df.to_csv(csv_file, index=False)
-                st.success(f"Data saved to {csv_file}.")
-                st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
-        else:
-            st.warning("No products found for the given search query.")
+                    # Save to CSV
+                    csv_file = f"{store_name}_scraped_data.csv" if store_name != "All Stores" else "all_stores_scraped_data.csv"
+                    df.to_csv(csv_file, index=False)
+                    # Keep every scraped deal (and its price changes) in the local deal store
+                    get_deal_store().upsert_deals(scraped_data, store=store)
+                    index_deals(scraped_data, store=store)
+                    st.success(f"Data saved to {csv_file}.")
+                    st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
+            else:
+                st.warning("No products found for the given search query.")
+
+        # Search every deal scraped so far, without downloading anything again
+        st.subheader("Search Previously Scraped Deals")
+        past_query = st.text_input("Search scraped deals (prefix and typo tolerant)", "", key="past_deals_query")
+        if past_query:
+            matches = get_search_index().search(past_query)
+            if matches:
+                st.dataframe(pd.DataFrame(matches))
+            else:
+                st.info("No previously scraped deals match this search.")
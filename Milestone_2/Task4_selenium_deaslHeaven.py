@@ -2,9 +2,20 @@ import pandas as pd
 import streamlit as st
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.options import Options
-import time
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.deal_store import get_deal_store
+from common.extractors import EXTRACT_JS, load_extractor
+from common.hybrid_fetch import HybridFetcher
+from common.normalize import normalize_deals
+from common.parsing import make_soup, parse_last_page, PAGINATION, PRODUCT_ITEMS, STORE_LINKS
+from common.playwright_engine import evaluate_script, get_playwright_engine, make_driver_pool, use_playwright
+from common.resource_blocking import apply_blocking, blocking_options
+from common.search_index import index_deals
+
+STORE_LINK_SELECTOR = 'ul > li > a[href^="https://dealsheaven.in/store/"]'
 
 # Function to initialize Edge WebDriver
 def init_driver():
@@ -12,6 +23,8 @@ def init_driver():
     edge_options.use_chromium = True
     edge_options.add_argument("--disable-gpu")  # Disable GPU for headless mode
     edge_options.add_argument("--window-size=1920,1080")
+    # Only text and links are read: skip images, fonts, stylesheets, video and trackers
+    blocking_options(edge_options, 'text')
     
     # Set the path to your msedgedriver.exe here manually
     driver_path = 'D:/Deal_Scrapper/edgedriver_win64/msedgedriver.exe'
@@ -19,87 +32,66 @@ def init_driver():
     service = Service(executable_path=driver_path)
     driver = webdriver.Edge(service=service, options=edge_options)
     
-    return driver
+    return apply_blocking(driver, 'text')
 
-# Function to fetch available stores dynamically using Selenium
-def get_available_stores(driver):
+# One pool of warm browsers (or Playwright contexts) per server process, reused across reruns
+@st.cache_resource(show_spinner=False)
+def get_driver_pool():
+    return make_driver_pool(init_driver, 'text')
+
+# Plain HTTP for pages that don't need a browser, the pooled browser for those that do
+@st.cache_resource(show_spinner=False)
+def get_fetcher():
+    return HybridFetcher(get_driver_pool())
+
+# Function to fetch available stores dynamically (`driver`, if given, is used
+# when the page needs a browser; otherwise one comes from the pool)
+def get_available_stores(driver=None):
     url = "https://dealsheaven.in/stores"
-    driver.get(url)
-    time.sleep(2)
+    html = get_fetcher().fetch(url, STORE_LINK_SELECTOR, driver=driver)
 
     stores = {}
-    store_links = driver.find_elements(By.CSS_SELECTOR, 'ul > li > a[href^="https://dealsheaven.in/store/"]')
+    store_links = make_soup(html, STORE_LINKS).select(STORE_LINK_SELECTOR)
     
     for store in store_links:
-        store_name = store.text.strip()
-        store_url = store.get_attribute('href')
+        store_name = store.get_text(strip=True)
+        store_url = store.get('href', '')
         store_key = store_url.split('/')[-1]
         stores[store_name] = store_key
     
     return stores
 
-# Function to scrape product details from a store-specific page using Selenium
-def scrape_store_page(driver, store_url, page, search_query=None):
+def store_page_url(store_url, page, search_query=None):
     if search_query:
-        url = f"{store_url}?page={page}&keyword={search_query}"
-    else:
-        url = f"{store_url}?page={page}"
+        return f"{store_url}?page={page}&keyword={search_query}"
+    return f"{store_url}?page={page}"
 
-    driver.get(url)
-    time.sleep(2)
+# Function to scrape product details from a store-specific page
+def scrape_store_page(driver, store_url, page, search_query=None):
+    url = store_page_url(store_url, page, search_query)
+    html = get_fetcher().fetch(url, 'div.product-item-detail', driver=driver)
 
-    products = driver.find_elements(By.CLASS_NAME, 'product-item-detail')
-    
-    data = []
-    for product in products:
-        try:
-            title = product.find_element(By.TAG_NAME, 'h3').text.strip()
-            product_url = product.find_element(By.TAG_NAME, 'a').get_attribute('href')
-            discount = product.find_element(By.CLASS_NAME, 'discount').text.strip()
-            price = product.find_element(By.CLASS_NAME, 'price').text.strip()
-            special_price = product.find_element(By.CLASS_NAME, 'spacail-price').text.strip()
-            image_url = product.find_element(By.TAG_NAME, 'img').get_attribute('src')
-            
-            data.append({
-                'Title': title,
-                'Product URL': product_url,
-                'Discount': discount,
-                'Price': price,
-                'Special Price': special_price,
-                'Image URL': image_url,
-                'Store Name': store_url.split('/')[-1]  # Extract store name from URL
-            })
-        except Exception:
-            continue
+    data = load_extractor('dealsheaven_products').extract(make_soup(html, PRODUCT_ITEMS)) or []
+    for product in data:
+        product['Store Name'] = store_url.split('/')[-1]  # Extract store name from URL
 
     return data
 
-# Function to find the total number of pages for a store using Selenium
+# Function to find the total number of pages for a store
 def find_last_page(driver, store_url):
-    driver.get(store_url)
-    time.sleep(2)
+    html = get_fetcher().fetch(store_url, 'ul.pagination li a', driver=driver)
+    return parse_last_page(make_soup(html, PAGINATION))
 
-    pagination = driver.find_elements(By.CSS_SELECTOR, 'ul.pagination li a')
-    
-    last_page = 1  # Default if pagination isn't found
-    
-    if pagination:
-        page_numbers = []
-        for link in pagination:
-            href = link.get_attribute('href')
-            if "page=" in href:
-                page_num = href.split("page=")[-1]
-                if page_num.isdigit():
-                    page_numbers.append(int(page_num))
-        
-        if page_numbers:
-            last_page = max(page_numbers)  # Set to the highest page number
-
-    return last_page
+# Page counts change slowly; don't fetch them again on every Streamlit rerun
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_last_page(store_url):
+    return find_last_page(None, store_url)
 
 # Function to scrape multiple pages for a specific store
 def scrape_store(driver, store, pages, search_query):
     base_url = f"https://dealsheaven.in/store/{store}"
+    if use_playwright():
+        return scrape_store_concurrently(base_url, pages, search_query)
     all_data = []
 
     # Navigate and scrape when scraping is triggered
@@ -112,44 +104,66 @@ def scrape_store(driver, store, pages, search_query):
 
     return all_data
 
+# Playwright: pages render a batch at a time, each in its own browser context
+# of the one shared browser, and the products are read in-page as above. A
+# batch is as many pages as the engine has contexts; none after the batch with
+# the first empty page is rendered.
+def scrape_store_concurrently(store_url, pages, search_query):
+    engine = get_playwright_engine()
+    spec = load_extractor('dealsheaven_products').browser_spec()
+    all_data = []
+    for first in range(1, pages + 1, engine.max_contexts):
+        batch = range(first, min(first + engine.max_contexts, pages + 1))
+        urls = [store_page_url(store_url, page, search_query) for page in batch]
+        results = engine.render(urls, handle=lambda page: evaluate_script(page, EXTRACT_JS, spec), blocking='text')
+
+        for data in results:
+            if not data:
+                return all_data  # Stop at the first page without products, like the page-by-page loop
+            for product in data:
+                product['Store Name'] = store_url.split('/')[-1]
+            all_data.extend(data)
+    return all_data
+
 # Streamlit UI
-st.title("Deals Heaven Web Scraper with Selenium")
-
-# Initialize WebDriver (Edge) and load stores automatically when the app starts
-driver = init_driver()
-stores = get_available_stores(driver)
-
-if not stores:
-    st.error("Could not fetch stores. Please try again later.")
-else:
-    store_name = st.selectbox("Select Store", list(stores.keys()))
-    store = stores.get(store_name)
-
-    # Automatically fetch total pages when a store is selected
-    if store_name:  
-        # Fetch total pages only when the store is selected
-        total_pages = find_last_page(driver, f"https://dealsheaven.in/store/{store}")
-        st.write(f"Total pages available: {total_pages}")
-
-        # Display number input for pages and search query text input
-        pages = st.number_input("Number of Pages to Scrape", min_value=1, max_value=total_pages, step=1)
-        search_query = st.text_input("Enter product to search for", "")
+if __name__ == "__main__":
+    st.title("Deals Heaven Web Scraper with Selenium")
+
+    # Load stores automatically when the app starts; a browser is only borrowed for pages that need one
+    stores = get_available_stores()
+
+    if not stores:
+        st.error("Could not fetch stores. Please try again later.")
+    else:
+        store_name = st.selectbox("Select Store", list(stores.keys()))
+        store = stores.get(store_name)
+
+        # Automatically fetch total pages when a store is selected
+        if store_name:  
+            # Fetch total pages only when the store is selected
+            total_pages = cached_last_page(f"https://dealsheaven.in/store/{store}")
+            st.write(f"Total pages available: {total_pages}")
+
+            # Display number input for pages and search query text input
+            pages = st.number_input("Number of Pages to Scrape", min_value=1, max_value=total_pages, step=1)
+            search_query = st.text_input("Enter product to search for", "")
         
-        # Scrape only when the button is clicked
-        if st.button("Scrape"):
-            scraped_data = scrape_store(driver, store, pages, search_query)
-
-            if scraped_data:
-                df = pd.DataFrame(scraped_data)
-                st.dataframe(df)
-
-                # Save to CSV
-                csv_file = f"{store_name}_scraped_data.csv"
-                df.to_csv(csv_file, index=False)
-                st.success(f"Data saved to {csv_file}.")
-                st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
-            else:
-                st.warning("No products found for the given search query.")
-
-# Close the driver after scraping
-driver.quit()
+            # Scrape only when the button is clicked
+            if st.button("Scrape"):
+                scraped_data = scrape_store(None, store, pages, search_query)
+
+                if scraped_data:
+                    # Typed Price / Special Price / Discount columns sort and filter as numbers
+                    df = normalize_deals(pd.DataFrame(scraped_data))
+                    st.dataframe(df)
+
+                    # Save to CSV
+                    csv_file = f"{store_name}_scraped_data.csv"
+                    df.to_csv(csv_file, index=False)
+                    # Keep every scraped deal (and its price changes) in the local deal store
+                    get_deal_store().upsert_deals(scraped_data, store=store)
+                    index_deals(scraped_data, store=store)
+                    st.success(f"Data saved to {csv_file}.")
+                    st.download_button(label="Download CSV", data=df.to_csv(index=False), file_name=csv_file, mime='text/csv')
+                else:
+                    st.warning("No products found for the given search query.")
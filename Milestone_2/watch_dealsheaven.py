@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fetcher import FAN_OUT_WORKERS
+from common.http_cache import http_get
+from common.deal_store import get_deal_store
+from common.extractors import load_extractor
+from common.parsing import make_soup, PRODUCT_ITEMS, STORE_LINKS
+from common.search_index import index_deals
+from common.seen_set import DEFAULT_BLOOM_PATH, DEFAULT_SEEN_PATH, open_seen_set
+
+# Watch DealsHeaven stores for new deals. Every interval, page 1 of each store
+# is fetched (revalidated, so an unchanged page costs a 304) and the walk only
+# moves on to page 2, 3, ... while every product on the page is new. A page
+# with any already-seen Product URL means the rest of the catalogue is known.
+# In steady state that is one request per store per interval.
+DEFAULT_INTERVAL = 5 * 60
+DEFAULT_MAX_PAGES = 10
+
+# Function to fetch the available stores (store key -> store name)
+def get_available_stores():
+    response = http_get("https://dealsheaven.in/stores")
+    soup = make_soup(response.text, STORE_LINKS)
+    stores = {}
+    for store in soup.select('ul > li > a[href^="https://dealsheaven.in/store/"]'):
+        stores[store['href'].split('/')[-1]] = store.get_text(strip=True)
+    return stores
+
+# Function to read the product details out of one store page (None if the request failed)
+def fetch_store_page(store, page):
+    response = http_get(f"https://dealsheaven.in/store/{store}?page={page}", max_age=0)
+    if response.status_code != 200:
+        print(f"Failed to retrieve {store} page {page}: Status code {response.status_code}")
+        return None
+
+    soup = make_soup(response.text, PRODUCT_ITEMS)
+    data = load_extractor('dealsheaven_products').extract(soup)
+    for product in data:
+        product['Store Name'] = store
+    return data
+
+# Function to collect the new deals of one store, newest pages first
+def poll_store(store, seen, max_pages=DEFAULT_MAX_PAGES):
+    new_deals = []
+    for page in range(1, max_pages + 1):
+        products = fetch_store_page(store, page)
+        if not products:
+            break
+        fresh = [product for product in products if seen.add(product['Product URL'])]
+        new_deals.extend(fresh)
+        if len(fresh) < len(products):
+            break  # Reached deals we already know
+    return new_deals
+
+# Function to poll every store once and record what is new
+def poll_once(stores, seen, max_pages=DEFAULT_MAX_PAGES, workers=FAN_OUT_WORKERS, csv_file=None):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda store: (store, poll_store(store, seen, max_pages)), stores)
+        new_deals = []
+        for store, deals in results:
+            if deals:
+                print(f"{len(deals)} new deal(s) in {store}")
+                new_deals.extend(deals)
+
+    if new_deals:
+        get_deal_store().upsert_deals(new_deals)
+        index_deals(new_deals)
+        if csv_file:
+            pd.DataFrame(new_deals).to_csv(csv_file, mode='a', index=False, header=not os.path.exists(csv_file))
+    seen.save()
+    return new_deals
+
+def watch(stores, seen, interval=DEFAULT_INTERVAL, max_pages=DEFAULT_MAX_PAGES, workers=FAN_OUT_WORKERS, csv_file=None):
+    while True:
+        start = time.monotonic()
+        new_deals = poll_once(stores, seen, max_pages, workers, csv_file)
+        elapsed = time.monotonic() - start
+        print(f"Polled {len(stores)} store(s) in {elapsed:.1f}s: {len(new_deals)} new deal(s), {len(seen)} seen")
+        time.sleep(max(0.0, interval - elapsed))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch DealsHeaven stores for new deals")
+    parser.add_argument("stores", nargs="*", help="store keys to watch (default: every store)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between polls")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help="most pages to walk per store and poll (bounds the first run)")
+    parser.add_argument("--workers", type=int, default=FAN_OUT_WORKERS, help="stores polled at once")
+    parser.add_argument("--seen", help=f"file holding the seen Product URL hashes "
+                                       f"(default: {DEFAULT_SEEN_PATH}, or {DEFAULT_BLOOM_PATH} with --bloom)")
+    parser.add_argument("--bloom", action="store_true",
+                        help="use a Bloom filter instead of an exact set (for very large catalogues)")
+    parser.add_argument("--capacity", type=int, default=10_000_000, help="expected number of deals (Bloom filter)")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="false 'seen' rate (Bloom filter)")
+    parser.add_argument("--csv", help="append new deals to this CSV file")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    args = parser.parse_args()
+
+    seen = open_seen_set(args.seen, bloom=args.bloom, capacity=args.capacity, error_rate=args.error_rate)
+    stores = args.stores or list(get_available_stores())
+    print(f"Watching {len(stores)} store(s), {len(seen)} deal(s) already seen")
+
+    try:
+        if args.once:
+            new_deals = poll_once(stores, seen, args.max_pages, args.workers, args.csv)
+            print(f"{len(new_deals)} new deal(s)")
+        else:
+            watch(stores, seen, args.interval, args.max_pages, args.workers, args.csv)
+    except KeyboardInterrupt:
+        seen.save()
+        print("Stopped.")
@@ -11,19 +11,35 @@ gemini_flash_api_key = os.getenv("GEMINI_API_KEY")
 # Configure Gemini Flash API
 genai.configure(api_key=gemini_flash_api_key)
 
-def gpt_generate_response(prompt, system_message):
+# HTTP status of a failed API call, when the client library exposes one
+# (openai errors carry http_status, google.api_core errors a numeric code)
+def api_error_status(error):
+    for attribute in ('http_status', 'status_code', 'code'):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+# `slot`, if given, is a common.ratelimit slot result that hears how the call went
+def _report(slot, status, headers=None):
+    if slot is not None:
+        slot.done(status, headers)
+
+def gpt_generate_response(prompt, system_message, slot=None):
     try:
         completion = openai.ChatCompletion.create(
             model="gpt-4",
             messages=[{"role": "system", "content": system_message},
                       {"role": "user", "content": prompt}]
         )
+        _report(slot, 200)
         return completion.choices[0].message['content']
     except Exception as e:
         print(f"Error with GPT API: {e}")
+        _report(slot, api_error_status(e), getattr(e, 'headers', None))
         return None
 
-def gemini_generate_response(prompt, container_model):
+def gemini_generate_response(prompt, container_model, slot=None):
     try:
         model = genai.GenerativeModel(
             "gemini-1.5-flash",
@@ -33,9 +49,11 @@ def gemini_generate_response(prompt, container_model):
             }
         )
         response = model.generate_content(prompt)
+        _report(slot, 200)
         print(response)
         if response and response.candidates and response.candidates[0].content.parts:
             return response.candidates[0].content.parts[0].text
     except Exception as e:
         print(f"Error with Gemini API: {e}")
+        _report(slot, api_error_status(e))
         return None
@@ -63,6 +63,12 @@ if scrape_button:
         if result and 'table' in result:
             st.success("Data extracted successfully!")
             st.dataframe(result['table'])  # Display data in table format
+            report = result.get('preprocessing')
+            if result.get('extraction') == 'selectors':
+                st.caption("Extracted with this site's learned selectors, without the model")
+            elif report:
+                st.caption(f"Tokens sent to the model: {report['tokens_after']:,} of about {report['tokens_before']:,} "
+                           f"({report['calls_after']} of {report['calls_before']} calls)")
 
             # Ensure 'output' directory exists
             os.makedirs("output", exist_ok=True)
@@ -3,6 +3,9 @@ from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.resource_blocking import apply_blocking, blocking_options
 
 # Configure Edge in headless mode with custom user-agent
 USER_AGENTS  = [
@@ -68,8 +71,10 @@ def setup_selenium_driver():
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-software-rasterizer")
     options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
+    # The page is turned into text for the LLM: skip images, fonts, stylesheets, video and trackers
+    blocking_options(options, 'text')
     
     driver_path = 'D:\\Deal_Scrapper\\edgedriver_win64\\msedgedriver.exe'
     service = Service(driver_path)
     
-    return webdriver.Edge(service=service, options=options)
\ No newline at end of file
+    return apply_blocking(webdriver.Edge(service=service, options=options), 'text')
\ No newline at end of file
@@ -0,0 +1,123 @@
+import io
+import os
+import re
+from functools import lru_cache
+
+# Splits page markdown into chunks for the model without cutting records in
+# half. The text is read line by line and grouped into units, largest first:
+#   sections  a heading (or horizontal rule) up to the next one, which on a
+#             listing page is usually one record ("### Product", price, text)
+#   blocks    paragraphs, list items, tables, when a section is too big
+#   lines     then lines (table rows), and as a last resort token slices
+# Units are packed greedily into chunks of at most the model's token budget;
+# with `overlap`, the last units of a chunk (up to that many tokens) are
+# repeated at the start of the next one. Only one unit is ever encoded at a
+# time, instead of the whole page as one token list.
+MODEL_TOKEN_BUDGETS = {"gpt-4": 3000, "gemini-flash": 8000}
+DEFAULT_TOKEN_BUDGET = 3000
+# Rough size of a token in English text, for estimates that aren't worth encoding for
+CHARS_PER_TOKEN = 4
+LLM_CHUNK_OVERLAP = int(os.getenv('LLM_CHUNK_OVERLAP', 0))
+
+# A markdown heading or horizontal rule
+_SECTION_START = re.compile(r'\s{0,3}(#{1,6}\s|(?:[-*_]\s*){3,}$)')
+# Units are joined with a blank line, about one token
+SEPARATOR = '\n\n'
+SEPARATOR_TOKENS = 1
+
+# tiktoken builds its encoder tables on every encoding_for_model() call; once per process is enough
+@lru_cache(maxsize=None)
+def get_encoder(model="gpt-4"):
+    import tiktoken
+    return tiktoken.encoding_for_model(model)
+
+def count_tokens(text):
+    return len(get_encoder().encode(text))
+
+def estimate_tokens(chars):
+    return -(-chars // CHARS_PER_TOKEN)
+
+def token_budget(model_name):
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
+# Sections of a markdown stream, each a list of its blocks
+def iter_sections(lines):
+    section, block = [], []
+    for line in lines:
+        line = line.rstrip('\n')
+        if _SECTION_START.match(line) and (section or block):
+            if block:
+                section.append('\n'.join(block))
+                block = []
+            yield section
+            section = []
+        if line.strip():
+            block.append(line)
+        elif block:
+            section.append('\n'.join(block))
+            block = []
+    if block:
+        section.append('\n'.join(block))
+    if section:
+        yield section
+
+# `blocks` as (text, tokens) pieces of at most max_tokens each: a block that
+# is too big becomes runs of whole lines (table rows stay a table)
+def _split_blocks(blocks, max_tokens):
+    for block in blocks:
+        tokens = count_tokens(block)
+        if tokens <= max_tokens:
+            yield block, tokens
+            continue
+        run, size = [], 0
+        for line in block.split('\n'):
+            line_tokens = count_tokens(line) + 1  # with its newline
+            if run and size + line_tokens > max_tokens:
+                yield '\n'.join(run), size
+                run, size = [], 0
+            if line_tokens > max_tokens:
+                yield from _split_line(line, max_tokens)
+                continue
+            run.append(line)
+            size += line_tokens
+        if run:
+            yield '\n'.join(run), size
+
+# Last resort for a single huge line: slices of max_tokens tokens
+def _split_line(line, max_tokens):
+    encoder = get_encoder()
+    encoded = encoder.encode(line)
+    for start in range(0, len(encoded), max_tokens):
+        piece = encoded[start:start + max_tokens]
+        yield encoder.decode(piece), len(piece)
+
+# (text, tokens) units no bigger than max_tokens, in document order
+def iter_units(lines, max_tokens):
+    for section in iter_sections(lines):
+        text = SEPARATOR.join(section)
+        tokens = count_tokens(text)
+        if tokens <= max_tokens:
+            yield text, tokens
+        else:
+            yield from _split_blocks(section, max_tokens)
+
+def iter_chunks(lines, max_tokens=DEFAULT_TOKEN_BUDGET, overlap=0):
+    chunk, size = [], 0
+    for unit, tokens in iter_units(lines, max_tokens):
+        if chunk and size + SEPARATOR_TOKENS + tokens > max_tokens:
+            yield SEPARATOR.join(text for text, _ in chunk)
+            # Carry the tail over, as long as it leaves room for the new unit
+            carried, carried_size = [], 0
+            for text, count in reversed(chunk):
+                if carried_size + count + SEPARATOR_TOKENS > min(overlap, max_tokens - tokens - SEPARATOR_TOKENS):
+                    break
+                carried.insert(0, (text, count))
+                carried_size += count + SEPARATOR_TOKENS
+            chunk, size = carried, carried_size
+        size += tokens + (SEPARATOR_TOKENS if chunk else 0)
+        chunk.append((unit, tokens))
+    if chunk:
+        yield SEPARATOR.join(text for text, _ in chunk)
+
+def split_text_by_tokens(text, max_tokens, overlap=LLM_CHUNK_OVERLAP):
+    return list(iter_chunks(io.StringIO(text), max_tokens, overlap))
@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import List
+from urllib.parse import urlsplit
+from pydantic import BaseModel
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.parsing import make_soup
+from preprocess import preprocess_html
+
+# Learned-selector mode: the first page of a site (per field set) goes through
+# the model as usual, then the model is asked once for CSS selectors that pull
+# the same records out of that page's HTML: one for the listing items and,
+# per field, one relative to an item plus where the value lives (the text or
+# an attribute). The selectors are only kept if, run on the same page, they
+# reproduce the model's own records: item by item in page order, MIN_AGREEMENT
+# of the values equal once case, spacing and punctuation are ignored (or
+# nearly equal, see MIN_LENGTH_RATIO), about as many items, and no two
+# fields reading the same value where the model's differ. Later pages of the
+# site are then extracted with lxml and soupsieve in milliseconds; if the
+# selectors stop finding filled-in items (the template changed), the page
+# falls back to the model and the site is learnt again. A site whose
+# suggestions were rejected is not asked again for LEARN_BACKOFF seconds,
+# doubling with every further rejection up to LEARN_MAX_BACKOFF.
+# Selectors (or the failed attempts) are kept per domain + field set in a JSON file:
+#   LEARNED_SELECTORS_PATH  where (default ~/.deal_scraper_cache/learned_selectors.json)
+#   LEARNED_SELECTORS=off   always use the model
+DEFAULT_SELECTORS_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'learned_selectors.json')
+LEARNING_ENABLED = os.getenv('LEARNED_SELECTORS', 'on') != 'off'
+
+MIN_AGREEMENT = 0.8
+MIN_FILL_RATE = 0.8
+# A value also matches one that contains it and is at most this much longer
+MIN_LENGTH_RATIO = 0.8
+LEARN_BACKOFF = 3600
+LEARN_MAX_BACKOFF = 7 * 24 * 3600
+MAX_SAMPLE_CHARS = 12000
+MAX_SAMPLE_RECORDS = 5
+
+SELECTOR_PROMPT = """Below are HTML from a listing page and records already extracted from it.
+Give CSS selectors that extract the same records from this page and from other pages built from the same template:
+- item_selector: matches each listing item, one element per record
+- for every field: a CSS selector relative to the item ("" for the item itself) and the attribute
+  that holds the value ("text" for the element's text, or an attribute name such as "href" or "src")
+Prefer stable class names and structure over positions. Answer only with JSON:
+{{"item_selector": "...", "fields": [{{"field": "...", "selector": "...", "attribute": "text"}}]}}
+Fields: {fields}
+{chunk}"""
+SAMPLE_TEMPLATE = """Records: {records}
+HTML:
+{html}"""
+
+class FieldSelector(BaseModel):
+    field: str
+    selector: str
+    attribute: str
+
+class ListingSelectors(BaseModel):
+    item_selector: str
+    fields: List[FieldSelector]
+
+_NOT_WORD = re.compile(r'[\W_]+')
+
+# Letters and digits only: "Rs. 1,299" and "rs 1299" compare equal
+def _normalize(value):
+    return _NOT_WORD.sub('', str(value or '')).lower()
+
+def _matches(value, candidate):
+    if value == candidate:
+        return True
+    shorter, longer = sorted((value, candidate), key=len)
+    return bool(shorter) and shorter in longer and len(shorter) >= MIN_LENGTH_RATIO * len(longer)
+
+def selectors_key(url, fields):
+    return f"{(urlsplit(url).hostname or '').lower()}|{json.dumps(sorted(fields))}"
+
+# Records for `fields` from `html` with learned selectors:
+# {'item': css, 'fields': {field: {'selector': css, 'attribute': 'text' | name}}}
+def extract_with_selectors(selectors, html, fields):
+    records = []
+    for item in make_soup(html).select(selectors['item']):
+        record = {}
+        for field in fields:
+            spec = selectors['fields'].get(field)
+            node = None
+            if spec is not None:
+                node = item.select_one(spec['selector']) if spec['selector'] else item
+            if node is None:
+                record[field] = ''
+            elif spec['attribute'] == 'text':
+                record[field] = node.get_text(' ', strip=True)
+            else:
+                value = node.get(spec['attribute'], '')
+                record[field] = ' '.join(value) if isinstance(value, list) else value
+        records.append(record)
+    return records
+
+# Share of the expected (field, value) pairs the selectors found on the item
+# at the same position. Expected items the selectors did not find count as misses.
+def agreement(records, expected, fields):
+    checked = matched = 0
+    for position, record in enumerate(expected):
+        found = records[position] if position < len(records) else {}
+        for field in fields:
+            value = _normalize(record.get(field))
+            if not value:
+                continue
+            checked += 1
+            if _matches(value, _normalize(found.get(field))):
+                matched += 1
+    return matched / checked if checked else 0.0
+
+# Pairs of fields the selectors read the same value for on most items where
+# the expected values differ (e.g. two fields both pointed at the whole item)
+def duplicate_fields(records, expected, fields):
+    pairs = []
+    for i, first in enumerate(fields):
+        for second in fields[i + 1:]:
+            same = sum(1 for record, wanted in zip(records, expected)
+                       if _normalize(record.get(first))
+                       and _normalize(record.get(first)) == _normalize(record.get(second))
+                       and _normalize(wanted.get(first)) != _normalize(wanted.get(second)))
+            if same * 2 > min(len(records), len(expected)):
+                pairs.append((first, second))
+    return pairs
+
+def fill_rate(records, fields):
+    if not records:
+        return 0.0
+    filled = sum(1 for record in records for field in fields if record.get(field))
+    return filled / (len(records) * len(fields))
+
+class SelectorStore:
+    def __init__(self, path=DEFAULT_SELECTORS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self.selectors = json.load(file)
+        except (OSError, ValueError):
+            self.selectors = {}
+
+    # Learned selectors; an entry without 'item' records failed attempts instead
+    def get(self, url, fields):
+        with self._lock:
+            entry = self.selectors.get(selectors_key(url, fields))
+        return entry if entry is not None and 'item' in entry else None
+
+    def set(self, url, fields, selectors):
+        with self._lock:
+            if selectors is None:
+                self.selectors.pop(selectors_key(url, fields), None)
+            else:
+                self.selectors[selectors_key(url, fields)] = selectors
+            self._save()
+
+    # Forget any selectors and back off from asking the model again
+    def record_failure(self, url, fields):
+        key = selectors_key(url, fields)
+        with self._lock:
+            entry = self.selectors.get(key) or {}
+            failures = 0 if 'item' in entry else entry.get('failures', 0)
+            self.selectors[key] = {'failures': failures + 1, 'failed_at': time.time()}
+            self._save()
+
+    # Whether the model may be asked for this site's selectors now
+    def may_learn(self, url, fields):
+        with self._lock:
+            entry = self.selectors.get(selectors_key(url, fields))
+        if entry is None or 'item' in entry:
+            return True
+        backoff = min(LEARN_BACKOFF * 2 ** (entry['failures'] - 1), LEARN_MAX_BACKOFF)
+        return time.time() - entry['failed_at'] >= backoff
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.selectors, file, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_selector_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SelectorStore(os.getenv('LEARNED_SELECTORS_PATH', DEFAULT_SELECTORS_PATH))
+        return _store
+
+# The page's records from the site's learned selectors, or None when there
+# are none or they no longer find filled-in items
+def extract_learned(url, fields, html):
+    if not LEARNING_ENABLED:
+        return None
+    selectors = get_selector_store().get(url, fields)
+    if selectors is None:
+        return None
+    start = time.perf_counter()
+    try:
+        records = extract_with_selectors(selectors, html, fields)
+    except Exception as e:  # a selector soupsieve can't parse
+        print(f"Learned selectors failed: {e}")
+        return None
+    if fill_rate(records, fields) < MIN_FILL_RATE:
+        print(f"Learned selectors for {selectors_key(url, fields)} no longer match; using the model")
+        return None
+    print(f"Learned selectors: {len(records)} records in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return records
+
+# Ask the model for selectors that reproduce `records` (its own output for this
+# page) and keep them if they do. `generate(prompt_template, chunk,
+# response_model)` returns the model's JSON text for the template filled in
+# with the fields and `chunk`. Returns the selectors, or None.
+def learn_selectors(url, fields, html, records, generate):
+    store = get_selector_store()
+    if not LEARNING_ENABLED or not records or not store.may_learn(url, fields):
+        return None
+    sample_html, _ = preprocess_html(html, fields)
+    chunk = SAMPLE_TEMPLATE.format(records=json.dumps(records[:MAX_SAMPLE_RECORDS], ensure_ascii=False),
+                                   html=sample_html[:MAX_SAMPLE_CHARS])
+    response_text = generate(SELECTOR_PROMPT, chunk, ListingSelectors)
+    if not response_text:
+        return None
+    try:
+        answer = json.loads(response_text or '')
+        selectors = {
+            'item': answer['item_selector'],
+            'fields': {entry['field']: {'selector': entry.get('selector') or '', 'attribute': entry.get('attribute') or 'text'}
+                       for entry in answer['fields']},
+        }
+        found = extract_with_selectors(selectors, html, fields)
+    except Exception as e:
+        print(f"Could not use the suggested selectors: {e}")
+        store.record_failure(url, fields)
+        return None
+
+    score = agreement(found, records, fields)
+    duplicates = duplicate_fields(found, records, list(fields))
+    if (score < MIN_AGREEMENT or duplicates
+            or not len(records) * MIN_AGREEMENT <= len(found) <= len(records) / MIN_AGREEMENT):
+        print(f"Suggested selectors rejected: {score:.0%} of values, {len(found)} of {len(records)} items"
+              + (f", same values for {duplicates}" if duplicates else ""))
+        store.record_failure(url, fields)
+        return None
+    selectors.update(learned_at=time.time(), agreement=score)
+    store.set(url, fields, selectors)
+    print(f"Learned selectors for {selectors_key(url, fields)} ({score:.0%} agreement)")
+    return selectors
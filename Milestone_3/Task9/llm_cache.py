@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.disk_cache import DiskCache
+
+# Content-addressed cache of model responses. The key is a hash of the model
+# name, the requested fields, the system message + prompt template and the
+# chunk text, so a re-scraped page only pays for the chunks that changed.
+# Entries live in a DiskCache (compressed, size-capped with LRU eviction) and
+# can be given a lifetime. Overridable with environment variables:
+#   LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL (seconds, default: none)
+#   LLM_CACHE_MODE=off  every chunk goes to the model
+DEFAULT_LLM_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'llm')
+DEFAULT_LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Bump to invalidate every entry (e.g. after changing how responses are used)
+CACHE_VERSION = 1
+
+class LLMCache:
+    def __init__(self, cache_dir=DEFAULT_LLM_CACHE_DIR, max_bytes=DEFAULT_LLM_CACHE_MAX_BYTES, ttl=None, enabled=True):
+        self.store = DiskCache(cache_dir, max_bytes=max_bytes)
+        self.ttl = ttl
+        self.enabled = enabled
+        self.expired = 0
+        self.stored = 0
+
+    @staticmethod
+    def make_key(model_name, fields, prompt_template, chunk):
+        chunk_hash = hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+        return DiskCache.make_key(CACHE_VERSION, model_name, json.dumps(list(fields)), prompt_template, chunk_hash)
+
+    # The cached response text, or None
+    def get(self, key):
+        if not self.enabled:
+            return None
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        body, meta = entry
+        if self.ttl is not None and time.time() - meta['created_at'] > self.ttl:
+            self.expired += 1
+            # The store counted a hit; for callers it was a miss
+            self.store.hits -= 1
+            self.store.misses += 1
+            self.store.delete(key)
+            return None
+        return body.decode('utf-8')
+
+    def set(self, key, response_text, model_name=None):
+        if not self.enabled:
+            return
+        self.store.set(key, response_text.encode('utf-8'), {'model': model_name, 'created_at': time.time()})
+        self.stored += 1
+
+    def stats(self):
+        return {**self.store.stats(), 'expired': self.expired, 'stored': self.stored}
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+# The process-wide cache; created on first use from the environment settings
+def get_llm_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            ttl = os.getenv('LLM_CACHE_TTL')
+            _default_cache = LLMCache(
+                cache_dir=os.getenv('LLM_CACHE_DIR', DEFAULT_LLM_CACHE_DIR),
+                max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', DEFAULT_LLM_CACHE_MAX_BYTES)),
+                ttl=float(ttl) if ttl else None,
+                enabled=os.getenv('LLM_CACHE_MODE', 'normal') != 'off',
+            )
+        return _default_cache
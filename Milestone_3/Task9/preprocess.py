@@ -0,0 +1,215 @@
+import math
+import os
+import re
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.parsing import make_soup
+
+# Cuts a page down to what the model needs before it becomes markdown:
+#   1. what is never content goes: scripts/styles, <nav>/<aside>/dialogs,
+#      form controls, hidden nodes and ARIA landmarks (navigation, banner...)
+#   2. the listing is found by structure: the element whose children repeat
+#      one shape (tag + first class) most, weighted by how much text those
+#      children hold. Same-shaped containers elsewhere (a grid split into
+#      rows) are taken too.
+#   3. outside the listing, page <header>/<footer> and anything whose
+#      class/id says cookie banner, menu, sidebar, newsletter, ad... goes
+#      (inside it, a "card-footer" may well hold the price), and only
+#      blocks that mention a requested field ("Price", "Phone"...) are kept.
+# <html>, <body> and the elements wrapping nearly the whole page (an ASP.NET
+# page is one big <form>) are never treated as boilerplate, whatever their
+# tag or class ("no-sidebar" on <body>). If no listing holds at least
+# MIN_LISTING_SHARE of the page's text without its boilerplate, only step 1
+# applies and the rest of the page is kept rather than risk dropping the data.
+# LLM_PREPROCESS=off passes pages through untouched.
+PREPROCESS_ENABLED = os.getenv('LLM_PREPROCESS', 'on') != 'off'
+
+NON_CONTENT_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object',
+                    'nav', 'aside', 'dialog', 'button', 'select', 'input', 'textarea']
+NON_CONTENT_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog', 'alertdialog', 'menu', 'menubar'}
+BOILERPLATE_TAGS = {'header', 'footer', 'form'}
+# A class/id of at most two parts with one of these in it ("cookie-banner",
+# "sidebar", "site_footer"; not "content-with-sidebar")
+BOILERPLATE_NAMES = {'cookie', 'cookies', 'consent', 'gdpr', 'banner', 'sidebar', 'footer', 'header', 'navbar', 'nav',
+                     'menu', 'breadcrumb', 'breadcrumbs', 'newsletter', 'subscribe', 'modal', 'popup', 'overlay',
+                     'advert', 'ad', 'ads', 'sponsored', 'promo', 'social', 'share', 'related', 'comments', 'skip'}
+_NAME_PARTS = re.compile(r'[-_]+')
+
+MIN_ITEMS = 3
+MIN_LISTING_SHARE = 0.3
+# An element holding this share of the page's text wraps the page
+WRAPPER_SHARE = 0.9
+BLOCK_TAGS = {'div', 'section', 'article', 'li', 'tr', 'table', 'dl', 'ul', 'ol', 'p', 'main'}
+MAX_REGION_CHARS = 2000
+
+def _is_hidden(tag):
+    if tag.get('hidden') is not None or tag.get('aria-hidden') == 'true' or tag.get('role') in NON_CONTENT_ROLES:
+        return True
+    style = (tag.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+def _is_boilerplate(tag):
+    if tag.name in ('html', 'body'):
+        return False
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    for name in [*(tag.get('class') or ()), tag.get('id') or '']:
+        parts = _NAME_PARTS.split(name.lower())
+        if len(parts) <= 2 and BOILERPLATE_NAMES.intersection(parts):
+            return True
+    return False
+
+def _text_length(tag):
+    return len(tag.get_text(' ', strip=True))
+
+# ids of `root` and the chain of elements under it that each hold nearly all
+# of its text
+def _page_wrappers(root):
+    total = _text_length(root)
+    wrappers = set()
+    node = root
+    while node is not None:
+        wrappers.add(id(node))
+        node = next((child for child in node.find_all(True, recursive=False)
+                     if _text_length(child) >= WRAPPER_SHARE * total), None)
+    return wrappers
+
+# The outermost elements for which `test` holds, leaving out page wrappers,
+# `keep` ones and anything inside or around them
+def _outermost(soup, test, keep=(), wrappers=()):
+    inside = {id(tag) for tag in keep}
+    around = {id(parent) for tag in keep for parent in tag.parents}
+    matches = []
+    matched = set()
+    for tag in soup.find_all(True):
+        if tag.name in ('html', 'body', 'main') or id(tag) in around or id(tag) in wrappers:
+            continue
+        if any(id(parent) in inside or id(parent) in matched for parent in tag.parents) or id(tag) in inside:
+            continue
+        if test(tag):
+            matched.add(id(tag))
+            matches.append(tag)
+    return matches
+
+def _remove(soup, test, keep=(), wrappers=()):
+    for tag in _outermost(soup, test, keep, wrappers):
+        tag.decompose()
+
+def strip_non_content(soup):
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+    _remove(soup, _is_hidden)
+    return soup
+
+def strip_boilerplate(soup, keep=()):
+    _remove(soup, _is_boilerplate, keep, _page_wrappers(soup.body or soup))
+    return soup
+
+def _shape(tag):
+    classes = tag.get('class') or ()
+    return tag.name, classes[0] if classes else None
+
+# (items, container) of the page's main repeating listing, or ([], None)
+def find_listing(soup, wrappers=None):
+    if wrappers is None:
+        wrappers = _page_wrappers(soup)
+    boilerplate = lambda tag: id(tag) not in wrappers and _is_boilerplate(tag)
+    best, best_score = None, 0
+    for container in soup.find_all(True):
+        children = container.find_all(True, recursive=False)
+        if len(children) < MIN_ITEMS or boilerplate(container) or any(map(boilerplate, container.parents)):
+            continue
+        groups = {}
+        for child in children:
+            groups.setdefault(_shape(child), []).append(child)
+        for shape, items in groups.items():
+            if len(items) < MIN_ITEMS or boilerplate(items[0]):
+                continue
+            # More text in more alike, richer items wins: a page split into a
+            # few same-classed sections loses to the grid of cards inside one
+            # of them, a list of plain links to cards with a title, price...
+            descendants = sum(len(item.find_all(True)) for item in items) / len(items)
+            score = sum(map(_text_length, items)) * math.log2(len(items)) * math.log2(2 + descendants)
+            if score > best_score:
+                best, best_score = (container, shape), score
+    if best is None:
+        return [], None
+    container, shape = best
+    # The same listing continued in sibling containers of the same shape (rows of a grid)
+    items = []
+    for other in soup.find_all(container.name):
+        if other is container or (_shape(other) == _shape(container) and other.parent is container.parent):
+            items.extend(child for child in other.find_all(True, recursive=False) if _shape(child) == shape)
+    return items, container
+
+# Whether a page already holds its listing: a browser-rendered copy of a JS
+# app does, the bare HTML shell it is served as does not
+def has_listing(raw_html):
+    soup = strip_non_content(make_soup(raw_html or ''))
+    return bool(_main_listing(soup.body or soup)[0])
+
+# The page's listing items if they hold MIN_LISTING_SHARE of its text once
+# its boilerplate is left out, and that boilerplate; ([], []) otherwise
+def _main_listing(root):
+    wrappers = _page_wrappers(root)
+    items, _ = find_listing(root, wrappers)
+    if not items:
+        return [], []
+    boilerplate = _outermost(root, _is_boilerplate, keep=items, wrappers=wrappers)
+    content_length = _text_length(root) - sum(map(_text_length, boilerplate))
+    if sum(map(_text_length, items)) < MIN_LISTING_SHARE * content_length:
+        return [], []
+    return items, boilerplate
+
+# The smallest block around each text that mentions one of the fields,
+# leaving out anything inside `exclude`
+def field_regions(soup, fields, exclude=()):
+    words = [field.strip().lower() for field in fields if field.strip()]
+    if not words:
+        return []
+    excluded = {id(tag) for tag in exclude}
+    around = {id(parent) for tag in exclude for parent in tag.parents}
+    regions = []
+    seen = set()
+    for string in soup.find_all(string=True):
+        if not any(word in string.lower() for word in words):
+            continue
+        region = string.parent
+        while region is not None and region.name not in BLOCK_TAGS:
+            region = region.parent
+        if region is None or region.name in ('html', 'body') or _text_length(region) > MAX_REGION_CHARS:
+            region = string.parent
+        if region is None or id(region) in seen or id(region) in excluded or id(region) in around:
+            continue
+        if any(id(parent) in excluded for parent in region.parents):
+            continue
+        seen.add(id(region))
+        regions.append(region)
+    # Drop regions nested in other regions
+    kept = {id(region) for region in regions}
+    return [region for region in regions if not any(id(parent) in kept for parent in region.parents)]
+
+# HTML of just the listing and the field regions, and what was found:
+# {'items', 'regions', 'listing_found', 'chars_before'}, chars_before being the
+# visible text of the untouched page
+def preprocess_html(raw_html, fields=()):
+    if not PREPROCESS_ENABLED:
+        return raw_html, {'items': 0, 'regions': 0, 'listing_found': False}
+    soup = make_soup(raw_html)
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    chars_before = _text_length(soup)
+    strip_non_content(soup)
+    root = soup.body or soup
+    items, boilerplate = _main_listing(root)
+    if not items:
+        return str(root), {'items': 0, 'regions': 0, 'listing_found': False, 'chars_before': chars_before}
+    for tag in boilerplate:
+        tag.decompose()
+
+    regions = field_regions(root, fields, exclude=items)
+    # Back into page order
+    order = {id(tag): position for position, tag in enumerate(root.find_all(True))}
+    blocks = sorted(items + regions, key=lambda tag: order.get(id(tag), 0))
+    html = '<div>' + '\n'.join(map(str, blocks)) + '</div>'
+    return html, {'items': len(items), 'regions': len(regions), 'listing_found': True, 'chars_before': chars_before}
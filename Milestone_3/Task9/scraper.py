@@ -3,21 +3,37 @@ from datetime import datetime
 import pandas as pd
 from pydantic import BaseModel, create_model
 from typing import List, Type
-import tiktoken
 import math
 import json
-from assets import setup_selenium_driver
+import sys
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.fetcher import streamlit_initializer
+from common.hybrid_fetch import HybridFetcher
+from common.playwright_engine import make_driver_pool
+from common.ratelimit import get_scheduler
+from assets import USER_AGENTS, setup_selenium_driver
 from aimodels import gpt_generate_response, gemini_generate_response  
+from learned_selectors import extract_learned, learn_selectors
+from llm_cache import get_llm_cache
+from chunking import LLM_CHUNK_OVERLAP, count_tokens, estimate_tokens, split_text_by_tokens, token_budget
+from preprocess import has_listing, preprocess_html
 SYSTEM_MESSAGE = """You are an intelligent text extraction and conversion assistant. Your task is to extract structured information
                     from the given text and convert it into a pure JSON format. The JSON should contain only the structured data extracted from the text,
                     with no additional commentary, explanations, or extraneous information."""
 USER_MESSAGE = "Extract the following information from the provided text:\nPage content:\n\n"
+PROMPT_TEMPLATE = USER_MESSAGE + "{fields} from the following text:\n\n{chunk}"
+# Warm headless browsers (or Playwright contexts) shared by every scrape;
+# each keeps the user agent it started with
+driver_pool = make_driver_pool(setup_selenium_driver, 'text', user_agents=USER_AGENTS)
+# Server-rendered pages come over plain HTTP; only sites found to need
+# JavaScript are loaded in a browser from the pool
+hybrid_fetcher = HybridFetcher(driver_pool)
+
+# Plain HTTP unless the page only has its listing once rendered in a browser
+# (a long text is no sign of that: JS app shells carry plenty of it)
 def scrape_raw_html(url):
-    driver = setup_selenium_driver()
-    driver.get(url)
-    raw_html = driver.page_source
-    driver.quit()
-    return raw_html
+    return hybrid_fetcher.fetch(url, check=has_listing)
 
 def convert_to_markdown(raw_html):
     import html2text
@@ -33,28 +49,62 @@ def create_dynamic_listing_model(field_names: List[str]) -> Type[BaseModel]:
 def create_listings_container_model(listing_model: Type[BaseModel]) -> Type[BaseModel]:
     return create_model("DynamicListingsContainer", listings=(List[listing_model], ...))
 
-def split_text_by_tokens(text, max_tokens):
-    encoder = tiktoken.encoding_for_model("gpt-4")
-    tokens = encoder.encode(text)
-    num_chunks = math.ceil(len(tokens) / max_tokens)
-    token_chunks = [tokens[i * max_tokens: (i + 1) * max_tokens] for i in range(num_chunks)]
-    return [encoder.decode(chunk) for chunk in token_chunks]
-
-def format_data_in_chunks(data, container_model, model_name, max_tokens=3000):
-    text_chunks = split_text_by_tokens(data['markdown_text'], max_tokens)
-    response_texts = []
-
-    for chunk in text_chunks:
-        prompt = f"{USER_MESSAGE}{data['fields']} from the following text:\n\n{chunk}"
-
-        if model_name == "gpt-4":
-            response_text = gpt_generate_response(prompt, SYSTEM_MESSAGE)
-        elif model_name == "gemini-flash":
-            response_text = gemini_generate_response(prompt, container_model)
-        
-        if response_text:
-            response_texts.append(response_text)
-            print(f"{model_name} Response for chunk:", response_text)
+# Chunks are sent to the model concurrently, at most LLM_MAX_IN_FLIGHT at a
+# time, each call through its provider's limiter in common/ratelimit (token
+# bucket + AIMD concurrency, backing off on 429/503 and Retry-After). A chunk
+# that was throttled is sent again, up to LLM_RETRIES times, once the limiter
+# lets it. Responses are merged in chunk order.
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', 8))
+LLM_RETRIES = 2
+MODEL_PROVIDERS = {"gpt-4": "api.openai.com", "gemini-flash": "generativelanguage.googleapis.com"}
+PROVIDER_LIMITS = {
+    "api.openai.com": {'rate': 2.0, 'burst': 16, 'start': 8, 'max_concurrency': 16, 'target_latency': 30.0},
+    "generativelanguage.googleapis.com": {'rate': 2.0, 'burst': 16, 'start': 8, 'max_concurrency': 16, 'target_latency': 20.0},
+}
+for provider, limits in PROVIDER_LIMITS.items():
+    get_scheduler().configure(provider, **limits)
+
+def generate_response(prompt, container_model, model_name):
+    for attempt in range(LLM_RETRIES + 1):
+        with get_scheduler().slot(MODEL_PROVIDERS[model_name]) as slot:
+            if model_name == "gpt-4":
+                response_text = gpt_generate_response(prompt, SYSTEM_MESSAGE, slot=slot)
+            elif model_name == "gemini-flash":
+                response_text = gemini_generate_response(prompt, container_model, slot=slot)
+        if response_text or slot.status not in (429, 503):
+            return response_text
+    return None
+
+# The model's answer for one chunk, from the LLM response cache when the same
+# model has already seen the same fields, prompt and chunk text. Only answers
+# that parse as JSON are cached.
+def respond_to_chunk(chunk, fields, container_model, model_name, prompt_template=PROMPT_TEMPLATE):
+    cache = get_llm_cache()
+    key = cache.make_key(model_name, fields, SYSTEM_MESSAGE + prompt_template, chunk)
+    response_text = cache.get(key)
+    if response_text is not None:
+        return response_text
+    response_text = generate_response(prompt_template.format(fields=fields, chunk=chunk), container_model, model_name)
+    if response_text:
+        try:
+            json.loads(response_text)
+            cache.set(key, response_text, model_name)
+        except json.JSONDecodeError:
+            pass
+    return response_text
+
+# Chunks hold whole markdown sections/records up to the model's token budget (see chunking.py)
+def format_data_in_chunks(data, container_model, model_name, max_tokens=None, max_in_flight=LLM_MAX_IN_FLIGHT):
+    text_chunks = split_text_by_tokens(data['markdown_text'], max_tokens or token_budget(model_name))
+
+    workers = max(1, min(max_in_flight, len(text_chunks)))
+    with ThreadPoolExecutor(max_workers=workers, initializer=streamlit_initializer()) as pool:
+        results = pool.map(lambda chunk: respond_to_chunk(chunk, data['fields'], container_model, model_name), text_chunks)
+        response_texts = []
+        for response_text in results:
+            if response_text:
+                response_texts.append(response_text)
+                print(f"{model_name} Response for chunk:", response_text)
 
     combined_data = []
     for response_text in response_texts:
@@ -64,25 +114,58 @@ def format_data_in_chunks(data, container_model, model_name, max_tokens=3000):
         except json.JSONDecodeError:
             print("Error decoding JSON for a chunk; skipping this chunk.")
             continue
+    if LLM_CHUNK_OVERLAP:
+        # Records in the overlap come back from both chunks
+        unique = {json.dumps(record, sort_keys=True): record for record in combined_data}
+        combined_data = list(unique.values())
 
+    print("LLM cache:", get_llm_cache().stats())
     return {"listings": combined_data}
 
+# Markdown of only the listing and field regions of the page (see
+# preprocess.py), with the tokens and model calls that saves. The whole page's
+# tokens are estimated from its text instead of converting and encoding it too.
+def page_markdown(raw_html, fields, max_tokens=3000):
+    content_html, report = preprocess_html(raw_html, fields)
+    markdown_text = convert_to_markdown(content_html)
+    tokens_after = count_tokens(markdown_text)
+    tokens_before = max(tokens_after, estimate_tokens(report.get('chars_before', 0)))
+    report.update(tokens_before=tokens_before, tokens_after=tokens_after,
+                  calls_before=math.ceil(tokens_before / max_tokens), calls_after=math.ceil(tokens_after / max_tokens))
+    print(f"Pre-processing: ~{tokens_before} -> {tokens_after} tokens, "
+          f"{report['calls_before']} -> {report['calls_after']} model calls ({report['items']} listing items)")
+    return markdown_text, report
+
+# Pages of a site whose selectors were learnt (see learned_selectors.py) are
+# extracted without the model; the others go through it, and teach the selectors
 def scrape_and_convert(url, fields, model_choice):
     raw_html = scrape_raw_html(url)
-    markdown_text = convert_to_markdown(raw_html)
-    
-    DynamicListingModel = create_dynamic_listing_model(fields)
-    DynamicListingsContainer = create_listings_container_model(DynamicListingModel)
-    
-    formatted_result = format_data_in_chunks(
-        data={"markdown_text": markdown_text, "fields": fields},
-        container_model=DynamicListingsContainer,
-        model_name=model_choice
-    )
-    
-    formatted_table = pd.DataFrame(formatted_result.get("listings", []))
+    preprocessing = None
+    listings = extract_learned(url, fields, raw_html)
+    extraction = "selectors"
+
+    if listings is None:
+        extraction = "model"
+        markdown_text, preprocessing = page_markdown(raw_html, fields, token_budget(model_choice))
+
+        DynamicListingModel = create_dynamic_listing_model(fields)
+        DynamicListingsContainer = create_listings_container_model(DynamicListingModel)
+
+        formatted_result = format_data_in_chunks(
+            data={"markdown_text": markdown_text, "fields": fields},
+            container_model=DynamicListingsContainer,
+            model_name=model_choice
+        )
+        listings = formatted_result.get("listings", [])
+        learn_selectors(url, fields, raw_html, listings,
+                        lambda prompt_template, chunk, response_model:
+                            respond_to_chunk(chunk, fields, response_model, model_choice, prompt_template))
+
+    formatted_table = pd.DataFrame(listings)
     formatted_table.index.name = 'Index'
     
     return {
         "table": formatted_table,
+        "preprocessing": preprocessing,
+        "extraction": extraction,
     }
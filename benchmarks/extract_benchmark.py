@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.extractors import load_extractor
+from common.parsing import make_soup, LIBRARY_TABLE, PRODUCT_ITEMS
+from parse_benchmark import load_page
+
+# Records per second of the old hand-written find()-per-field loops versus
+# the compiled config-driven extractors, on the same already-parsed pages
+# (parsing is timed by parse_benchmark.py). Checks both give the same records.
+#
+#   python benchmarks/extract_benchmark.py https://dealsheaven.in/store/amazon?page=1 saved_state.html
+#   python benchmarks/extract_benchmark.py --synthetic 2000
+#
+# URLs go through the shared HTTP cache, so SCRAPER_CACHE_MODE=replay runs
+# the benchmark fully offline against previously scraped pages.
+
+# The product loop as it was in the DealsHeaven scrapers
+def legacy_products(soup):
+    data = []
+    for product in soup.find_all('div', class_='product-item-detail'):
+        try:
+            data.append({
+                'Title': product.find('h3').get_text(strip=True),
+                'Product URL': product.find('a')['href'],
+                'Discount': product.find('div', class_='discount').get_text(strip=True),
+                'Price': product.find('p', class_='price').get_text(strip=True),
+                'Special Price': product.find('p', class_='spacail-price').get_text(strip=True),
+                'Image URL': product.find('img')['src'],
+            })
+        except AttributeError:
+            continue
+    return data
+
+# The library row loop as it was in Task2
+def legacy_libraries(soup):
+    table = soup.find('table', id='libraries')
+    if table is None:
+        return None
+    rows = table.find('tbody').find_all('tr') if table.find('tbody') else table.find_all('tr')
+    libraries = []
+    for row in rows:
+        columns = row.find_all('td')
+        if len(columns) >= 5:
+            libraries.append({
+                'City': columns[0].text.strip(),
+                'Library Name': columns[1].text.strip(),
+                'Address': columns[2].text.strip(),
+                'Zip Code': columns[3].text.strip(),
+                'Phone': columns[4].text.strip(),
+            })
+    return libraries
+
+# A store page with `count` product cards shaped like dealsheaven.in's
+def synthetic_page(count):
+    cards = []
+    for i in range(count):
+        cards.append(
+            f'<div class="col-md-3"><div class="product-item-detail deal-card">'
+            f'<a href="https://dealsheaven.in/deal/{i}"><img src="https://img.dealsheaven.in/{i}.jpg" alt=""></a>'
+            f'<div class="discount">{i % 90}% off</div>'
+            f'<div class="deatls-inner"><h3 title="Product {i}">Product {i} with a longer descriptive title</h3>'
+            f'<div class="price-box"><p class="price">&#8377;{1000 + i:,}</p>'
+            f'<p class="spacail-price">&#8377;{500 + i:,}</p></div>'
+            f'<div class="shop-now"><a class="btn" href="https://dealsheaven.in/go/{i}">Shop Now</a></div></div>'
+            f'</div></div>')
+    return f'<html><body><div class="row">{"".join(cards)}</div></body></html>'
+
+# Records per second of extract() over `repeat` runs
+def records_per_second(extract, soup, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        records = extract(soup)
+    elapsed = time.perf_counter() - start
+    return len(records or []) * repeat / elapsed, records
+
+def main():
+    parser = argparse.ArgumentParser(description="Records/s: find()-per-field loops vs compiled extractors")
+    parser.add_argument('pages', nargs='*', help="page URLs or saved HTML files")
+    parser.add_argument('--synthetic', type=int, default=0, help="also time a generated page with this many products")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    sources = [(source, load_page(source)) for source in args.pages]
+    if args.synthetic:
+        sources.append((f"synthetic ({args.synthetic} products)", synthetic_page(args.synthetic)))
+    if not sources:
+        parser.error("give page URLs/files or --synthetic N")
+
+    print(f"{'page':<50} {'old rec/s':>12} {'new rec/s':>12} {'speedup':>8} {'records':>8} same")
+    for name, html in sources:
+        if 'product-item-detail' in html:
+            legacy, extractor, strainer = legacy_products, load_extractor('dealsheaven_products'), PRODUCT_ITEMS
+        else:
+            legacy, extractor, strainer = legacy_libraries, load_extractor('publiclibraries_libraries'), LIBRARY_TABLE
+        soup = make_soup(html, strainer)
+
+        old_rate, old_records = records_per_second(legacy, soup, args.repeat)
+        new_rate, new_records = records_per_second(extractor.extract, soup, args.repeat)
+        print(f"{name[-50:]:<50} {old_rate:>12.0f} {new_rate:>12.0f} {new_rate / old_rate if old_rate else 0:>7.1f}x "
+              f"{len(new_records or []):>8} {old_records == new_records}")
+
+if __name__ == "__main__":
+    main()
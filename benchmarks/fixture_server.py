@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import html
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Local stand-in for dealsheaven.in, publiclibraries.com and behance.net, so
+# the scrapers can be benchmarked without touching the live sites. Pages are
+# generated on the fly (deterministically, seeded by their URL) with the same
+# markup the scrapers' selectors expect, at a configurable size and latency:
+#
+#   /dealsheaven/                          home page with pagination
+#   /dealsheaven/stores                    store list
+#   /dealsheaven/store/<key>?page=N        product cards + pagination (keyword= filters titles)
+#   /publiclibraries/state/                state menu
+#   /publiclibraries/state/<state>/        table#libraries
+#   /behance/assets[/<category>]           infinite-scroll cover grid (search= filters)
+#   /behance/search/projects               same grid
+#   /behance/api/cards?offset=N            next batch of covers, fetched by the grid's scroll handler
+#
+# Links inside the pages point at the real sites; point the scrapers here with
+# SCRAPER_URL_REWRITE (see common/url_rewrite.py). Running this file prints the
+# value to export:
+#
+#   python benchmarks/fixture_server.py --port 8765 --latency 0.05
+DEFAULT_SETTINGS = {
+    'stores': 10,             # DealsHeaven stores
+    'pages': 20,              # result pages per store
+    'products': 24,           # products per page
+    'states': 50,             # publiclibraries.com states
+    'libraries': 200,         # library rows per state
+    'behance_items': 500,     # covers behind one Behance grid
+    'behance_batch': 24,      # covers per page load / scroll fetch
+    'latency': 0.0,           # seconds added to every response
+    'jitter': 0.0,            # up to this many extra seconds, at random
+}
+
+SITES = {
+    'dealsheaven': 'https://dealsheaven.in',
+    'publiclibraries': 'https://publiclibraries.com',
+    'behance': 'https://www.behance.net',
+}
+
+WORDS = ['samsung', 'apple', 'boat', 'noise', 'realme', 'lenovo', 'wireless', 'bluetooth', 'smart', 'pro',
+         'earbuds', 'smartphone', 'laptop', 'watch', 'trimmer', 'kettle', 'speaker', 'charger', 'shoes', 'shirt']
+BEHANCE_CATEGORIES = ['fonts', 'templates', 'vectors', '3d', 'images', 'videos', 'icons', 'brushes', 'patterns']
+
+def _page(title, body, head=''):
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>{head}</head>'
+            f'<body>{body}</body></html>')
+
+def _count(value):
+    return f"{value / 1000:.1f}K" if value >= 1000 else str(value)
+
+class FixtureSite:
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown fixture settings: {sorted(unknown)}")
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.requests = Counter()  # site -> requests served
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['settings'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def store_keys(self):
+        return [f"store-{i}" for i in range(1, self.stores + 1)]
+
+    def state_names(self):
+        return [f"State {i}" for i in range(1, self.states + 1)]
+
+    # (status, content type, body) for a path on the fixture server
+    def render(self, path, query):
+        site, _, rest = path.strip('/').partition('/')
+        with self._lock:
+            self.requests[site] += 1
+        handler = {
+            'dealsheaven': self._dealsheaven,
+            'publiclibraries': self._publiclibraries,
+            'behance': self._behance,
+        }.get(site)
+        result = handler(rest, query) if handler else None
+        if result is None:
+            return 404, 'text/html', _page('Not found', '<h1>Not found</h1>')
+        return result
+
+    def _pagination(self, base_url, current, extra=''):
+        links = [f'<li class="page-item"><a class="page-link" href="{base_url}?page={max(1, current - 1)}{extra}">&laquo;</a></li>']
+        numbers = sorted({1, 2, 3, current, self.pages} & set(range(1, self.pages + 1)))
+        previous = 0
+        for number in numbers:
+            if number - previous > 1:
+                links.append('<li class="page-item disabled"><span class="page-link">...</span></li>')
+            active = ' active' if number == current else ''
+            links.append(f'<li class="page-item{active}"><a class="page-link" href="{base_url}?page={number}{extra}">{number}</a></li>')
+            previous = number
+        links.append(f'<li class="page-item"><a class="page-link" href="{base_url}?page={min(self.pages, current + 1)}{extra}">&raquo;</a></li>')
+        return f'<ul class="pagination">{"".join(links)}</ul>'
+
+    def _products(self, store, page, keyword):
+        if page > self.pages:
+            return []
+        rng = random.Random(f"{store}:{page}")
+        products = []
+        for i in range(self.products):
+            number = (page - 1) * self.products + i
+            title = ' '.join(rng.sample(WORDS, 4)).title() + f" {store} #{number}"
+            if keyword and keyword.lower() not in title.lower():
+                continue
+            price = rng.randint(200, 90000)
+            discount = rng.randint(5, 80)
+            products.append((number, title, price, discount))
+        return products
+
+    def _dealsheaven(self, rest, query):
+        root = SITES['dealsheaven']
+        if rest == '':
+            return 200, 'text/html', _page('DealsHeaven', self._pagination(root, 1))
+        if rest == 'stores':
+            items = ''.join(f'<li><a href="{root}/store/{key}">{key.replace("-", " ").title()}</a></li>'
+                            for key in self.store_keys())
+            return 200, 'text/html', _page('Stores', f'<ul class="store-list">{items}</ul>')
+        if rest.startswith('store/'):
+            store = rest.split('/', 1)[1]
+            if store not in self.store_keys():
+                return None
+            page = int(query.get('page', ['1'])[0] or 1)
+            keyword = query.get('keyword', [''])[0]
+            cards = []
+            for number, title, price, discount in self._products(store, page, keyword):
+                special = price * (100 - discount) // 100
+                cards.append(
+                    f'<div class="col-md-3"><div class="product-item-detail">'
+                    f'<a href="{root}/deal/{store}/{number}"><img src="{root}/images/{store}/{number}.jpg" alt=""></a>'
+                    f'<div class="discount">{discount}% off</div>'
+                    f'<div class="deatls-inner"><h3 title="{html.escape(title)}">{html.escape(title)}</h3>'
+                    f'<p class="price">&#8377;{price:,}</p><p class="spacail-price">&#8377;{special:,}</p>'
+                    f'<a class="btn shop-now" href="{root}/go/{store}/{number}">Shop Now</a></div>'
+                    f'</div></div>')
+            extra = f'&keyword={keyword}' if keyword else ''
+            body = f'<div class="row">{"".join(cards)}</div>{self._pagination(f"{root}/store/{store}", page, extra)}'
+            return 200, 'text/html', _page(f'{store} deals', body)
+        return None
+
+    def _publiclibraries(self, rest, query):
+        root = SITES['publiclibraries']
+        if rest in ('state', 'state/'):
+            links = ''.join(f'<a href="{root}/state/{name.lower().replace(" ", "-")}/">{name}</a>'
+                            for name in self.state_names())
+            return 200, 'text/html', _page('States', f'<div class="dropdown"><div class="dropdown-content">{links}</div></div>')
+        if rest.startswith('state/'):
+            slug = rest.split('/')[1]
+            rng = random.Random(slug)
+            rows = []
+            for i in range(self.libraries):
+                rows.append(f'<tr><td>City {rng.randint(1, 500)}</td><td>{slug.title()} Library {i}</td>'
+                            f'<td>{rng.randint(1, 9999)} Main St</td><td>{rng.randint(10000, 99999)}</td>'
+                            f'<td>({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}</td></tr>')
+            table = ('<table id="libraries"><thead><tr><th>City</th><th>Library</th><th>Address</th><th>Zip</th>'
+                     f'<th>Phone</th></tr></thead><tbody>{"".join(rows)}</tbody></table>')
+            return 200, 'text/html', _page(slug, table)
+        return None
+
+    def _covers(self, offset, search):
+        rng = random.Random(f"behance:{search}")
+        covers = []
+        for number in range(offset, min(offset + self.behance_batch, self.behance_items)):
+            likes, views = rng.randint(0, 5000), rng.randint(100, 90000)
+            covers.append(
+                f'<div class="Cover-cover-gDM" data-id="{number}" style="height:320px">'
+                f'<div class="Title-title-lpJ">{html.escape(search or "Project")} {number}</div>'
+                f'<div class="Owners-overflowText-C9U">Owner {number % 37}</div>'
+                f'<div class="ProjectCover-stats-QLg"><span>{_count(likes)}</span><span>{_count(views)}</span></div>'
+                f'</div>')
+        return ''.join(covers)
+
+    def _behance(self, rest, query):
+        root = SITES['behance']
+        search = query.get('search', [''])[0]
+        if rest == 'api/cards':
+            return 200, 'text/html', self._covers(int(query.get('offset', ['0'])[0]), search)
+        if rest == 'assets' or rest.startswith('assets/') or rest == 'search/projects':
+            menu = ''.join(f'<a href="{root}/assets/{category}">{category.title()}</a>' for category in BEHANCE_CATEGORIES)
+            script = f"""<script>
+let offset = {self.behance_batch}, loading = false;
+window.addEventListener('scroll', async () => {{
+  if (loading || offset >= {self.behance_items}) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 1000) return;
+  loading = true;
+  const response = await fetch('/behance/api/cards?offset=' + offset + '&search=' + encodeURIComponent({search!r}));
+  document.getElementById('grid').insertAdjacentHTML('beforeend', await response.text());
+  offset += {self.behance_batch};
+  loading = false;
+}});
+</script>"""
+            body = (f'<form method="get"><input name="search" aria-label="Search for assets" value="{html.escape(search)}"></form>'
+                    f'<div class="AssetsFilterAccordion-accordionSection-RNi">{menu}</div>'
+                    f'<div id="grid">{self._covers(0, search)}</div>{script}')
+            return 200, 'text/html', _page('Behance', body)
+        return None
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        site = self.server.site
+        if site.latency or site.jitter:
+            time.sleep(site.latency + random.uniform(0, site.jitter))
+        parts = urlsplit(self.path)
+        status, content_type, body = site.render(parts.path, parse_qs(parts.query))
+        data = body.encode('utf-8')
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, site):
+        super().__init__(address, FixtureHandler)
+        self.site = site
+        self.base_url = f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    # SCRAPER_URL_REWRITE mapping that sends the scrapers here
+    def rewrites(self):
+        return {real: f"{self.base_url}/{site}" for site, real in SITES.items()}
+
+    def rewrite_env(self):
+        return ';'.join(f"{real}={local}" for real, local in self.rewrites().items())
+
+# Start a fixture server on a background thread (port 0 picks a free port)
+def start_fixture_server(host='127.0.0.1', port=0, **settings):
+    server = FixtureServer((host, port), FixtureSite(**settings))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic DealsHeaven / publiclibraries / Behance pages")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    for name, default in DEFAULT_SETTINGS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = vars(parser.parse_args())
+    host, port = args.pop('host'), args.pop('port')
+
+    server = FixtureServer((host, port), FixtureSite(**args))
+    print(f"Serving on {server.base_url}")
+    print(f'export SCRAPER_URL_REWRITE="{server.rewrite_env()}"')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
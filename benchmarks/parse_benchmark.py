@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.http_cache import http_get
+from common.parsing import make_soup, LIBRARY_TABLE, PRODUCT_ITEMS, PARSER_BACKEND
+
+# Compares the old full html.parser parse with the strained fast-parser path
+# on real pages and checks both produce the same records.
+#
+#   python benchmarks/parse_benchmark.py https://dealsheaven.in/store/amazon?page=1 saved_page.html
+#
+# URLs go through the shared HTTP cache, so SCRAPER_CACHE_MODE=replay runs
+# the benchmark fully offline against previously scraped pages.
+
+# Same field extraction as scrape_store_page in the DealsHeaven scrapers
+def product_records(soup):
+    data = []
+    for product in soup.find_all('div', class_='product-item-detail'):
+        try:
+            data.append({
+                'Title': product.find('h3').get_text(strip=True),
+                'Product URL': product.find('a')['href'],
+                'Discount': product.find('div', class_='discount').get_text(strip=True),
+                'Price': product.find('p', class_='price').get_text(strip=True),
+                'Special Price': product.find('p', class_='spacail-price').get_text(strip=True),
+                'Image URL': product.find('img')['src'],
+            })
+        except AttributeError:
+            continue
+    return data
+
+# Same row extraction as scrape_state_data in Task2
+def library_records(soup):
+    table = soup.find('table', id='libraries')
+    if table is None:
+        return []
+    rows = table.find('tbody').find_all('tr') if table.find('tbody') else table.find_all('tr')
+    return [[column.text.strip() for column in row.find_all('td')[:5]]
+            for row in rows if len(row.find_all('td')) >= 5]
+
+def load_page(source):
+    if source.startswith(('http://', 'https://')):
+        return http_get(source).text
+    with open(source, 'r', encoding='utf-8') as file:
+        return file.read()
+
+# Average wall time (ms) and peak traced memory (KB) of one parse + extraction
+def measure(parse, extract, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        records = extract(parse(html))
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    extract(parse(html))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024, records
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-page parse time: html.parser vs strained fast parser")
+    parser.add_argument('pages', nargs='+', help="page URLs or saved HTML files")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':<50} {'html.parser ms':>15} {PARSER_BACKEND + ' ms':>12} {'speedup':>8} "
+          f"{'old KB':>9} {'new KB':>9} {'records':>8} same")
+    for source in args.pages:
+        html = load_page(source)
+        if 'product-item-detail' in html:
+            extract, strainer = product_records, PRODUCT_ITEMS
+        else:
+            extract, strainer = library_records, LIBRARY_TABLE
+
+        old_ms, old_kb, old_records = measure(lambda text: BeautifulSoup(text, 'html.parser'), extract, html, args.repeat)
+        new_ms, new_kb, new_records = measure(lambda text: make_soup(text, strainer), extract, html, args.repeat)
+        print(f"{source[-50:]:<50} {old_ms:>15.2f} {new_ms:>12.2f} {old_ms / new_ms:>7.1f}x "
+              f"{old_kb:>9.0f} {new_kb:>9.0f} {len(new_records):>8} {old_records == new_records}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'Milestone_1'))
+sys.path.append(os.path.join(ROOT, 'Milestone_2'))
+
+# The scrapers must not touch the real cache (or the real sites): a throwaway
+# cache directory, caching off unless asked for, before anything is imported
+os.environ.setdefault('SCRAPER_CACHE_DIR', tempfile.mkdtemp(prefix='scale_benchmark_cache_'))
+os.environ.setdefault('SCRAPER_CACHE_MODE', 'off')
+
+from fixture_server import DEFAULT_SETTINGS, start_fixture_server
+from common import extractors
+from common.driver_pool import DriverPool
+from common.ratelimit import get_scheduler
+from common.resource_blocking import (BLOCKING_PROFILES, apply_blocking, blocking_options, blocking_stats,
+                                      collect_blocking_stats)
+from common.url_rewrite import set_url_rewrites
+
+# Drives the real scraper functions against the local fixture server
+# (fixture_server.py) and reports, per scenario:
+#   pages/s        pages served by the fixture server / wall time
+#   parse ms/page  time in make_soup + extraction (in-browser extraction for Selenium)
+#   peak RSS MB    this process plus children (the browser), sampled; needs psutil,
+#                  otherwise the process' lifetime peak from getrusage
+#   e2e s          wall time of the whole scenario
+#
+#   python benchmarks/scale_benchmark.py --pages 30 --latency 0.05 --json results.json
+#   python benchmarks/scale_benchmark.py --baseline results.json      # exit 1 on regressions
+#   python benchmarks/scale_benchmark.py --selenium chrome             # add the Selenium scrapers
+#   python benchmarks/scale_benchmark.py --selenium chrome --blocking behance selenium_behance
+#
+# The per-host rate limiter is opened up for the fixture host unless --polite
+# is given, so the numbers show the scrapers rather than the politeness delays.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Lower is worse for these metrics, higher is worse for the rest
+HIGHER_IS_BETTER = {'pages_per_sec'}
+
+class RssSampler:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._rss())
+        else:
+            # ru_maxrss is in KB on Linux
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# Adds up the time spent in parsing/extraction calls while a scenario runs
+class ParseTimer:
+    def __init__(self):
+        self.seconds = 0.0
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, function, counts_page):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.seconds += time.perf_counter() - start
+                    self.pages += counts_page
+        return timed
+
+    # Time make_soup in each scraper module and every Extractor call
+    @contextmanager
+    def patch(self, modules):
+        originals = [(module, 'make_soup', module.make_soup) for module in modules if hasattr(module, 'make_soup')]
+        originals += [(extractors.Extractor, name, getattr(extractors.Extractor, name))
+                      for name in ('extract', 'extract_selenium')]
+        for owner, name, function in originals:
+            setattr(owner, name, self.wrap(function, counts_page=name != 'extract'))
+        try:
+            yield self
+        finally:
+            for owner, name, function in originals:
+                setattr(owner, name, function)
+
+def make_driver(browser, blocking='none'):
+    from selenium import webdriver
+    if browser == 'firefox':
+        options = webdriver.FirefoxOptions()
+        options.add_argument('-headless')
+        return webdriver.Firefox(options=options)
+    options = webdriver.EdgeOptions() if browser == 'edge' else webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--window-size=1920,1080')
+    blocking_options(options, blocking)
+    driver = webdriver.Edge(options=options) if browser == 'edge' else webdriver.Chrome(options=options)
+    return apply_blocking(driver, blocking)
+
+# Scenarios: name -> function(settings, args) returning (modules to time, callable)
+def scenario_dealsheaven_store(settings, args):
+    import Task3
+    return [Task3], lambda: Task3.scrape_store('store-1', settings['pages'])
+
+def scenario_dealsheaven_all_stores(settings, args):
+    import Task4_deaslHeaven_bs4 as task4
+    stores = task4.get_available_stores()
+    return [task4], lambda: task4.search_all_stores("", stores)
+
+def scenario_libraries(settings, args):
+    import Task2
+    states = Task2.get_states()
+    return [Task2], lambda: [Task2.scrape_state_data(state_url) for state_url in states.values()]
+
+def scenario_libraries_async(settings, args):
+    import Task1
+
+    def run():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            os.makedirs('states_data')
+            try:
+                asyncio.run(Task1.crawl_async(concurrency=args.concurrency))
+            finally:
+                os.chdir(cwd)
+    return [Task1], run
+
+def scenario_selenium_dealsheaven(settings, args):
+    import Task4_selenium_deaslHeaven as task4
+    driver = make_driver(args.selenium, args.blocking)
+
+    def run():
+        try:
+            return task4.scrape_store(driver, 'store-1', min(settings['pages'], args.selenium_pages), "")
+        finally:
+            collect_blocking_stats(driver)
+            driver.quit()
+    return [task4], run
+
+def scenario_selenium_behance(settings, args):
+    import Task_5
+    # A fresh pool per run, so every run pays for starting its browser
+    pool = DriverPool(lambda: make_driver(args.selenium, args.blocking), size=1, on_release=collect_blocking_stats)
+    Task_5.get_driver_pool = lambda: pool
+
+    def run():
+        try:
+            return Task_5.scrape_assets('https://www.behance.net/assets/fonts', args.behance_scrape, "")
+        finally:
+            pool.close()
+    return [Task_5], run
+
+SCENARIOS = {
+    'dealsheaven_store': scenario_dealsheaven_store,
+    'dealsheaven_all_stores': scenario_dealsheaven_all_stores,
+    'libraries': scenario_libraries,
+    'libraries_async': scenario_libraries_async,
+    'selenium_dealsheaven': scenario_selenium_dealsheaven,
+    'selenium_behance': scenario_selenium_behance,
+}
+SELENIUM_SCENARIOS = {'selenium_dealsheaven', 'selenium_behance'}
+
+def clear_streamlit_caches():
+    try:
+        import streamlit as st
+        st.cache_data.clear()
+    except Exception:
+        pass
+
+def run_scenario(name, server, settings, args):
+    clear_streamlit_caches()
+    modules, run = SCENARIOS[name](settings, args)
+    served_before = sum(server.site.requests.values())
+    timer = ParseTimer()
+    with RssSampler() as rss, timer.patch(modules):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+    pages = sum(server.site.requests.values()) - served_before
+    return {
+        'pages': pages,
+        'pages_per_sec': pages / elapsed if elapsed else 0.0,
+        'parse_ms_per_page': timer.seconds * 1000 / timer.pages if timer.pages else 0.0,
+        'peak_rss_mb': rss.peak / (1024 * 1024),
+        'e2e_seconds': elapsed,
+    }
+
+# Median of each metric over the repeats
+def summarize(runs):
+    return {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+# Metrics that got worse than the baseline by more than `tolerance` (a fraction)
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old or metric == 'pages':
+                continue
+            change = (value - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                found.append(f"{name}.{metric}: {old:.2f} -> {value:.2f} ({change:+.0%} worse)")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper benchmarks against the local fixture server")
+    parser.add_argument('scenarios', nargs='*', help=f"scenarios to run (default: all non-Selenium): {', '.join(SCENARIOS)}")
+    for name, default in DEFAULT_SETTINGS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default,
+                            help=f"fixture server setting (default {default})")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario; the median is reported")
+    parser.add_argument('--concurrency', type=int, default=10, help="libraries_async concurrency")
+    parser.add_argument('--polite', action='store_true', help="keep the default rate limits for the fixture host")
+    parser.add_argument('--selenium', choices=['chrome', 'edge', 'firefox'], help="also run the Selenium scenarios")
+    parser.add_argument('--blocking', choices=sorted(BLOCKING_PROFILES), default='none',
+                        help="resource-blocking profile for the Selenium browsers (default none)")
+    parser.add_argument('--selenium-pages', type=int, default=3, help="pages for selenium_dealsheaven")
+    parser.add_argument('--behance-scrape', type=int, default=30, help="covers for selenium_behance")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="earlier --json results; exit 1 if anything regressed")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed regression (fraction, default 0.25)")
+    args = parser.parse_args()
+
+    settings = {name: getattr(args, name) for name in DEFAULT_SETTINGS}
+    names = args.scenarios or [name for name in SCENARIOS if name not in SELENIUM_SCENARIOS or args.selenium]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    try:
+        from streamlit import logger
+        logger.set_log_level('error')  # st.* calls outside `streamlit run` only warn
+    except ImportError:
+        pass
+
+    server = start_fixture_server(**settings)
+    set_url_rewrites(server.rewrites())
+    if not args.polite:
+        get_scheduler().configure('127.0.0.1', rate=10_000.0, burst=10_000, start=64,
+                                  max_concurrency=64, target_latency=10.0)
+
+    results = {}
+    print(f"{'scenario':<24} {'pages':>7} {'pages/s':>9} {'parse ms/page':>14} {'peak RSS MB':>12} {'e2e s':>8}")
+    try:
+        for name in names:
+            try:
+                runs = [run_scenario(name, server, settings, args) for _ in range(args.repeat)]
+            except Exception as e:
+                print(f"{name:<24} skipped: {type(e).__name__}: {e}")
+                continue
+            results[name] = summary = summarize(runs)
+            print(f"{name:<24} {summary['pages']:>7.0f} {summary['pages_per_sec']:>9.1f} "
+                  f"{summary['parse_ms_per_page']:>14.2f} {summary['peak_rss_mb']:>12.1f} {summary['e2e_seconds']:>8.2f}")
+    finally:
+        server.shutdown()
+        set_url_rewrites()
+
+    for profile, stats in blocking_stats().items():
+        print(f"blocking '{profile}': {stats['requests']} requests, {stats['bytes_transferred'] / 1e6:.1f} MB transferred, "
+              f"{stats['blocked']} blocked {stats['blocked_by_type']}, ~{stats['estimated_bytes_saved'] / 1e6:.1f} MB saved (estimate)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'settings': settings, 'results': results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
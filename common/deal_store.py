@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from common.normalize import normalize_deals
+
+# Local SQLite database that keeps every scraped DealsHeaven deal. Deals are
+# upserted on their Product URL; every new or changed price is appended to
+# price_history by triggers, so the history costs nothing extra on upsert.
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'deals.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    product_url TEXT PRIMARY KEY,
+    store TEXT NOT NULL,
+    title TEXT,
+    discount TEXT,
+    discount_pct REAL,
+    price TEXT,
+    price_value REAL,
+    special_price TEXT,
+    special_price_value REAL,
+    image_url TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    product_url TEXT NOT NULL,
+    price_value REAL,
+    special_price_value REAL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deals_store_price ON deals (store, special_price_value);
+CREATE INDEX IF NOT EXISTS idx_deals_title ON deals (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_deals_discount ON deals (discount_pct);
+CREATE INDEX IF NOT EXISTS idx_history_url_time ON price_history (product_url, seen_at);
+CREATE INDEX IF NOT EXISTS idx_history_time ON price_history (seen_at);
+
+CREATE TRIGGER IF NOT EXISTS trg_deals_insert AFTER INSERT ON deals
+BEGIN
+    INSERT INTO price_history (product_url, price_value, special_price_value, seen_at)
+    VALUES (NEW.product_url, NEW.price_value, NEW.special_price_value, NEW.last_seen);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_deals_price_change AFTER UPDATE OF price_value, special_price_value ON deals
+WHEN NEW.price_value IS NOT OLD.price_value OR NEW.special_price_value IS NOT OLD.special_price_value
+BEGIN
+    INSERT INTO price_history (product_url, price_value, special_price_value, seen_at)
+    VALUES (NEW.product_url, NEW.price_value, NEW.special_price_value, NEW.last_seen);
+END;
+"""
+
+UPSERT = """
+INSERT INTO deals (product_url, store, title, discount, discount_pct, price, price_value,
+                   special_price, special_price_value, image_url, first_seen, last_seen)
+VALUES (:product_url, :store, :title, :discount, :discount_pct, :price, :price_value,
+        :special_price, :special_price_value, :image_url, :seen_at, :seen_at)
+ON CONFLICT (product_url) DO UPDATE SET
+    store = excluded.store,
+    title = excluded.title,
+    discount = excluded.discount,
+    discount_pct = excluded.discount_pct,
+    price = excluded.price,
+    price_value = excluded.price_value,
+    special_price = excluded.special_price,
+    special_price_value = excluded.special_price_value,
+    image_url = excluded.image_url,
+    last_seen = excluded.last_seen
+"""
+
+# Scraper record keys -> deals columns
+RECORD_COLUMNS = {
+    'Product URL': 'product_url',
+    'Store Name': 'store',
+    'Title': 'title',
+    'Discount': 'discount',
+    'Discount Pct': 'discount_pct',
+    'Price': 'price',
+    'Price Value': 'price_value',
+    'Special Price': 'special_price',
+    'Special Price Value': 'special_price_value',
+    'Image URL': 'image_url',
+}
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+class DealStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    # Scraper records ('Title', 'Product URL', ...) to database rows; the
+    # numeric columns come from one vectorised normalisation pass
+    def _rows(self, records, store, seen_at):
+        df = pd.DataFrame(list(records)).reindex(columns=['Product URL', 'Store Name', 'Title', 'Discount',
+                                                          'Price', 'Special Price', 'Image URL'])
+        df = df[df['Product URL'].notna() & (df['Product URL'] != '')]
+        df = normalize_deals(df)
+        if store is not None:
+            df['Store Name'] = df['Store Name'].fillna(store)
+        df = df[list(RECORD_COLUMNS)].rename(columns=RECORD_COLUMNS)
+        df['seen_at'] = seen_at
+        # sqlite3 wants None for missing values, not NaN/<NA>
+        df = df.astype(object).where(df.notna(), None)
+        return df.to_dict('records')
+
+    # Insert or update scraped records in batches of `batch_size` per transaction
+    def upsert_deals(self, records, store=None, batch_size=1000, seen_at=None):
+        seen_at = time.time() if seen_at is None else _timestamp(seen_at)
+        rows = self._rows(records, store, seen_at)
+        with self._lock:
+            for start in range(0, len(rows), batch_size):
+                with self._conn:
+                    self._conn.executemany(UPSERT, rows[start:start + batch_size])
+        return len(rows)
+
+    def _query(self, sql, params):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    # Deals of one store, cheapest first, optionally under a price / above a discount
+    def deals_in_store(self, store, max_price=None, min_discount=None, limit=100):
+        sql = "SELECT * FROM deals WHERE store = ?"
+        params = [store]
+        if max_price is not None:
+            sql += " AND special_price_value <= ?"
+            params.append(max_price)
+        if min_discount is not None:
+            sql += " AND discount_pct >= ?"
+            params.append(min_discount)
+        sql += " ORDER BY special_price_value LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    # Deals with the biggest discounts across all stores
+    def top_discounts(self, min_discount=0, limit=100):
+        return self._query(
+            "SELECT * FROM deals WHERE discount_pct >= ? ORDER BY discount_pct DESC LIMIT ?",
+            (min_discount, limit))
+
+    # Products whose current price is lower than their price as of `since`
+    # (a datetime or epoch seconds), biggest drop first
+    def price_drops_since(self, since, store=None, limit=100):
+        sql = """
+            SELECT * FROM (
+                SELECT d.*,
+                       (SELECT h.special_price_value FROM price_history h
+                        WHERE h.product_url = d.product_url AND h.seen_at < :since
+                        ORDER BY h.seen_at DESC LIMIT 1) AS previous_price
+                FROM (SELECT DISTINCT product_url FROM price_history WHERE seen_at >= :since) changed
+                JOIN deals d ON d.product_url = changed.product_url
+                WHERE (:store IS NULL OR d.store = :store)
+            )
+            WHERE previous_price IS NOT NULL AND special_price_value < previous_price
+            ORDER BY previous_price - special_price_value DESC
+            LIMIT :limit
+        """
+        return self._query(sql, {'since': _timestamp(since), 'store': store, 'limit': limit})
+
+    # All recorded prices of one product, oldest first
+    def price_history(self, product_url):
+        return self._query(
+            "SELECT price_value, special_price_value, seen_at FROM price_history "
+            "WHERE product_url = ? ORDER BY seen_at", (product_url,))
+
+    # Every deal's URL, title and store, for building a search index
+    def iter_titles(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT product_url, title, store FROM deals").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_store = None
+_default_lock = threading.Lock()
+
+# The process-wide deal store (DEAL_STORE_PATH overrides the location)
+def get_deal_store():
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = DealStore(os.getenv('DEAL_STORE_PATH', DEFAULT_DB_PATH))
+        return _default_store
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+# Small on-disk key/value store shared by the scrapers' caches.
+# Every entry is two files: <key>.bin holds the zlib-compressed body and
+# <key>.json holds its metadata. The modification time of the .bin file
+# doubles as the "last used" stamp, so LRU eviction needs no separate index.
+class DiskCache:
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, compress_level=6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None  # key -> [size on disk, last used]
+        os.makedirs(directory, exist_ok=True)
+
+    # Turn any string (URL, prompt hash inputs...) into a file-safe key
+    @staticmethod
+    def make_key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.bin', base + '.json'
+
+    # Build the in-memory size/recency index from the files on disk (once)
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.bin'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self._index[name[:-4]] = [stat.st_size, stat.st_mtime]
+
+    # Return (body, meta) for a key, or None if it is not cached
+    def get(self, key):
+        body_path, meta_path = self._paths(key)
+        with self._lock:
+            self._load_index()
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as file:
+                    meta = json.load(file)
+                with open(body_path, 'rb') as file:
+                    body = zlib.decompress(file.read())
+            except (OSError, ValueError, zlib.error):
+                self.misses += 1
+                return None
+            now = time.time()
+            try:
+                os.utime(body_path, (now, now))
+            except OSError:
+                pass
+            if key in self._index:
+                self._index[key][1] = now
+            self.hits += 1
+            return body, meta
+
+    # Store a body with its metadata, then evict old entries above the size cap
+    def set(self, key, body, meta):
+        body_path, meta_path = self._paths(key)
+        data = zlib.compress(body, self.compress_level)
+        with self._lock:
+            self._load_index()
+            self._write(body_path, data, binary=True)
+            self._write(meta_path, json.dumps(meta), binary=False)
+            self._index[key] = [len(data), time.time()]
+            self._evict()
+
+    # Replace only the metadata of an existing entry (e.g. after a revalidation)
+    def update_meta(self, key, meta):
+        _, meta_path = self._paths(key)
+        with self._lock:
+            self._write(meta_path, json.dumps(meta), binary=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._load_index()
+            self._remove(key)
+
+    def total_bytes(self):
+        with self._lock:
+            self._load_index()
+            return sum(size for size, _ in self._index.values())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._index or {}),
+            'bytes': self.total_bytes(),
+        }
+
+    # Write to a temporary file first so a crash never leaves a half-written entry
+    def _write(self, path, data, binary):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        if binary:
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._index.pop(key, None)
+
+    # Drop least recently used entries until the cache fits under max_bytes
+    def _evict(self):
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            self._remove(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
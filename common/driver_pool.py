@@ -0,0 +1,221 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# A small pool of warm Selenium browsers shared by the scrape calls, so a
+# short scrape doesn't pay for starting (and quitting) a browser every time.
+#   with pool.driver() as driver:
+#       polite_get(driver, url)
+# Between checkouts a browser is reset (cookies, the storage of every origin
+# it visited, extra windows, back to about:blank) and health-checked; it is replaced after `max_pages` page
+# loads or once its processes use more than `max_rss_mb` (needs psutil).
+# All browsers are quit when the pool is closed or the process exits.
+# `on_release(driver)`, if given, runs on every return (e.g. to collect stats).
+# SCRAPER_DRIVER_POOL_SIZE / _MAX_PAGES / _MAX_RSS_MB set the defaults.
+DEFAULT_POOL_SIZE = int(os.getenv('SCRAPER_DRIVER_POOL_SIZE', 2))
+DEFAULT_MAX_PAGES = int(os.getenv('SCRAPER_DRIVER_MAX_PAGES', 50))
+DEFAULT_MAX_RSS_MB = float(os.getenv('SCRAPER_DRIVER_MAX_RSS_MB', 1500))
+
+# Forwards everything to the real WebDriver, counts page loads and remembers
+# the origins they went to
+class PooledDriver:
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+        self.origins = set()
+        self.created_at = time.monotonic()
+
+    def get(self, url):
+        self.pages += 1
+        self.note_origin(url)
+        return self._driver.get(url)
+
+    def note_origin(self, url):
+        parts = urlsplit(url or '')
+        if parts.scheme in ('http', 'https') and parts.netloc:
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    @property
+    def webdriver(self):
+        return self._driver
+
+class DriverPool:
+    def __init__(self, factory, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 on_release=None):
+        self.factory = factory
+        self.on_release = on_release
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle = []
+        self._busy = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        atexit.register(self.close)
+
+    # Check out a driver, waiting up to `timeout` seconds for a free one
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    driver = self._idle.pop()
+                    self._busy += 1
+                    break
+                if self._busy < self.size:
+                    driver = None
+                    self._busy += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No browser free in the pool after {timeout}s")
+                self._cond.wait(remaining)
+
+        # Starting or checking a browser is slow; do it outside the lock
+        try:
+            if driver is not None and not self._healthy(driver):
+                self._quit(driver)
+                self.recycled += 1
+                driver = None
+            if driver is None:
+                driver = PooledDriver(self.factory())
+                self.created += 1
+            else:
+                self.reused += 1
+            return driver
+        except BaseException:
+            with self._cond:
+                self._busy -= 1
+                self._cond.notify()
+            raise
+
+    # Return a driver to the pool (reset for the next user) or retire it
+    def release(self, driver):
+        if self.on_release is not None:
+            try:
+                self.on_release(driver)
+            except Exception:
+                pass
+        keep = not self._closed and not self._worn_out(driver) and self._reset(driver)
+        if not keep:
+            self._quit(driver)
+            if not self._closed:
+                self.recycled += 1
+        with self._cond:
+            self._busy -= 1
+            if keep and not self._closed:
+                self._idle.append(driver)
+            elif keep:
+                self._quit(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _healthy(self, driver):
+        # An idle Playwright driver has no context to check, and asking would open one
+        if getattr(driver.webdriver, 'idle', False):
+            return True
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _worn_out(self, driver):
+        if self.max_pages and driver.pages >= self.max_pages:
+            return True
+        return bool(self.max_rss_mb) and self.rss_mb(driver) > self.max_rss_mb
+
+    # Memory of the driver process and the browser it started (0 without psutil)
+    def rss_mb(self, driver):
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        if psutil is None or process is None:
+            return 0.0
+        try:
+            root = psutil.Process(process.pid)
+            total = root.memory_info().rss
+            for child in root.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    # Forget everything the last user left behind; False if the browser misbehaves
+    def _reset(self, driver):
+        try:
+            if hasattr(driver.webdriver, 'reset_session'):
+                # Playwright: throw the whole browser context away
+                driver.reset_session()
+                return True
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.note_origin(driver.current_url)  # also where redirects and clicks led
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.note_origin(driver.current_url)
+            if hasattr(driver.webdriver, 'execute_cdp_cmd'):
+                # Chromium (Edge/Chrome): every site's cookies at once, then the
+                # storage of each origin this browser visited (there is no wildcard)
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                for origin in sorted(driver.origins):
+                    driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            else:
+                driver.delete_all_cookies()
+                driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            driver.origins.clear()
+            driver.webdriver.get('about:blank')
+            return True
+        except Exception as e:
+            print(f"Error resetting pooled browser, replacing it: {e}")
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'created': self.created,
+                'reused': self.reused,
+                'recycled': self.recycled,
+            }
+
+    # Quit every idle browser; browsers still checked out are quit when released
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
@@ -0,0 +1,268 @@
+import json
+import os
+from functools import lru_cache
+
+from bs4.element import Tag
+
+# Declarative record extractors. A JSON config in extractor_configs/ names the
+# repeating item node and, per output field, where its value lives:
+#   {"tag": "p", "class": "price", "text": "strip"}   first matching descendant's text
+#   {"tag": "a", "attr": "href"}                      first matching descendant's attribute
+#   {"cell": 2, "text": "trim"}                       text of the item's 3rd cell (see "cells")
+#   {"tag": "span", "inside": "stats", "index": 1}    2nd <span> under an element of class "stats"
+#   {"class": "title"}                                no "tag": any element with that class
+# "text" is "strip" (get_text(strip=True)) or "trim" (get_text().strip()).
+# Fields are required unless they say "required": false; an item missing a
+# required field is skipped, like the AttributeError skips in the old loops.
+# "key" lists the fields that identify an item (default: all of them), for
+# dropping repeats across several extractions of the same growing page.
+# "api" maps the same fields onto the site's JSON API responses instead of
+# its HTML (see network_capture.py).
+#
+# A config compiles once into a tag -> matchers table, so each item's subtree
+# is walked a single time and every node is checked against all fields at
+# once, instead of one find() per field. The same compiled spec drives the
+# Selenium path as a single execute_script() call.
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extractor_configs')
+
+def _css(spec):
+    selector = spec.get('tag', '*')
+    if spec.get('id'):
+        selector += f"#{spec['id']}"
+    if spec.get('class'):
+        selector += f".{spec['class']}"
+    return selector
+
+# Whether `node` has an ancestor of class `css_class`, up to and including `item`
+def _inside(node, css_class, item):
+    parent = node.parent
+    while parent is not None:
+        if css_class in (parent.get('class') or ()):
+            return True
+        if parent is item:
+            return False
+        parent = parent.parent
+    return False
+
+def _text(node, mode):
+    if mode == 'trim':
+        return node.get_text().strip()
+    return node.get_text(strip=True)
+
+class Extractor:
+    def __init__(self, config, name=None):
+        self.name = name
+        self.config = config
+        self.scope = config.get('scope')
+        self.item = config['item']
+        self.cells = config.get('cells')
+        self.fields = list(config['fields'])
+        self.required = {field for field, spec in config['fields'].items() if spec.get('required', True)}
+        self.key_fields = config.get('key', self.fields)
+        # tag name -> [(field, css class or None, attribute or None, text mode, ancestor class or None, index)]
+        self._matchers = {}
+        # (field, cell index, text mode)
+        self._cell_fields = []
+        for field, spec in config['fields'].items():
+            if 'cell' in spec:
+                self._cell_fields.append((field, spec['cell'], spec.get('text', 'strip')))
+            else:
+                self._matchers.setdefault(spec.get('tag', '*'), []).append(
+                    (field, spec.get('class'), spec.get('attr'), spec.get('text', 'strip'),
+                     spec.get('inside'), spec.get('index', 0)))
+        self._walk_size = sum(map(len, self._matchers.values()))
+        # Tag-less fields are checked on every element
+        self._any_tag = self._matchers.pop('*', [])
+        for tag_matchers in self._matchers.values():
+            tag_matchers.extend(self._any_tag)
+
+    # Every item node inside the scope (None when the scope element is missing)
+    def items(self, soup):
+        root = soup
+        if self.scope is not None:
+            root = soup.find(self.scope['tag'], id=self.scope.get('id'), class_=self.scope.get('class'))
+            if root is None:
+                return None
+        if self.item.get('class'):
+            return root.find_all(self.item.get('tag', True), class_=self.item['class'])
+        return root.find_all(self.item['tag'])
+
+    # One record from one item node, or None if a required field is missing
+    def extract_item(self, node):
+        record = dict.fromkeys(self.fields)
+        if self._cell_fields:
+            cells = node.find_all(self.cells['tag'])
+            if len(cells) < self.cells.get('min_count', 0):
+                return None
+            for field, index, mode in self._cell_fields:
+                if index < len(cells):
+                    record[field] = _text(cells[index], mode)
+
+        if self._walk_size:
+            remaining = self._walk_size
+            matchers = self._matchers
+            any_tag = self._any_tag
+            skipped = {}
+            for child in node.descendants:
+                if type(child) is not Tag:
+                    continue
+                candidates = matchers.get(child.name, any_tag)
+                if not candidates:
+                    continue
+                classes = None
+                for field, css_class, attr, mode, inside, index in candidates:
+                    if record[field] is not None:
+                        continue
+                    if css_class is not None:
+                        if classes is None:
+                            classes = child.get('class') or ()
+                        if css_class not in classes:
+                            continue
+                    if inside is not None and not _inside(child, inside, node):
+                        continue
+                    if attr is not None:
+                        value = child.get(attr)
+                        if value is None:
+                            continue
+                    if index:
+                        skipped[field] = skipped.get(field, 0) + 1
+                        if skipped[field] <= index:
+                            continue
+                    if attr is not None:
+                        record[field] = value
+                    else:
+                        record[field] = _text(child, mode)
+                    remaining -= 1
+                if not remaining:
+                    break
+
+        for field in self.required:
+            if record[field] is None:
+                return None
+        return record
+
+    # Records from a parsed page (None when the scope element is missing)
+    def extract(self, soup):
+        nodes = self.items(soup)
+        if nodes is None:
+            return None
+        records = []
+        for node in nodes:
+            record = self.extract_item(node)
+            if record is not None:
+                records.append(record)
+        return records
+
+    # The identity of a record, for de-duplicating
+    def key(self, record):
+        return tuple(record[field] for field in self.key_fields)
+
+    # The compiled spec in the form EXTRACT_JS expects
+    def browser_spec(self):
+        fields = []
+        for field, spec in self.config['fields'].items():
+            fields.append({
+                'name': field,
+                'tag': spec.get('tag', '').upper(),
+                'class': spec.get('class'),
+                'attr': spec.get('attr'),
+                'cell': spec.get('cell'),
+                'inside': spec.get('inside'),
+                'index': spec.get('index', 0),
+                'required': spec.get('required', True),
+            })
+        return {
+            'scope': _css(self.scope) if self.scope else None,
+            'item': _css(self.item),
+            'cells': self.cells['tag'].upper() if self.cells else None,
+            'minCells': self.cells.get('min_count', 0) if self.cells else 0,
+            'fields': fields,
+        }
+
+    # Records from the page loaded in a Selenium driver, in one round trip
+    # (None when the scope element is missing). With only_new, items already
+    # extracted by an earlier only_new call are skipped (they are marked in the
+    # DOM), so polling a growing infinite-scroll page stays linear.
+    def extract_selenium(self, driver, only_new=False):
+        return driver.execute_script(EXTRACT_JS, {**self.browser_spec(), 'onlyNew': only_new})
+
+# Same walk as Extractor.extract_item, run inside the browser. Texts come from
+# innerText; an element without the attribute is skipped, as in Python, and a
+# present attribute prefers the DOM property (absolute href/src), which is
+# what Selenium's .text and get_attribute() return.
+EXTRACT_JS = """
+const spec = arguments[0];
+const root = spec.scope ? document.querySelector(spec.scope) : document;
+if (!root) return null;
+const byTag = {};
+const anyTag = [];
+let walkSize = 0;
+for (const field of spec.fields) {
+    if (field.cell === null) {
+        if (field.tag) (byTag[field.tag] = byTag[field.tag] || []).push(field);
+        else anyTag.push(field);
+        walkSize += 1;
+    }
+}
+for (const tag in byTag) byTag[tag].push(...anyTag);
+const value = (el, field) => {
+    if (!field.attr) return (el.innerText || el.textContent || '').trim();
+    if (el.getAttribute(field.attr) === null) return null;
+    const prop = el[field.attr];
+    return typeof prop === 'string' ? prop : el.getAttribute(field.attr);
+};
+const inside = (el, cls, item) => {
+    for (let parent = el.parentElement; parent; parent = parent.parentElement) {
+        if (parent.classList.contains(cls)) return true;
+        if (parent === item) return false;
+    }
+    return false;
+};
+const records = [];
+items: for (const item of root.querySelectorAll(spec.item)) {
+    if (spec.onlyNew && item.hasAttribute('data-extracted')) continue;
+    const record = {};
+    for (const field of spec.fields) record[field.name] = null;
+    if (spec.cells) {
+        const cells = item.getElementsByTagName(spec.cells);
+        if (cells.length < spec.minCells) continue;
+        for (const field of spec.fields) {
+            if (field.cell !== null && field.cell < cells.length) record[field.name] = value(cells[field.cell], field);
+        }
+    }
+    let remaining = walkSize;
+    const skipped = {};
+    if (remaining) {
+        for (const el of item.getElementsByTagName('*')) {
+            const matchers = byTag[el.tagName] || anyTag;
+            if (!matchers.length) continue;
+            for (const field of matchers) {
+                if (record[field.name] !== null) continue;
+                if (field.class && !el.classList.contains(field.class)) continue;
+                if (field.inside && !inside(el, field.inside, item)) continue;
+                const found = value(el, field);
+                if (found === null) continue;
+                if (field.index) {
+                    skipped[field.name] = (skipped[field.name] || 0) + 1;
+                    if (skipped[field.name] <= field.index) continue;
+                }
+                record[field.name] = found;
+                remaining -= 1;
+            }
+            if (!remaining) break;
+        }
+    }
+    for (const field of spec.fields) {
+        if (field.required && record[field.name] === null) continue items;
+    }
+    if (spec.onlyNew) item.setAttribute('data-extracted', '');
+    records.push(record);
+}
+return records;
+"""
+
+# The compiled extractor for extractor_configs/<name>.json (compiled once per process)
+@lru_cache(maxsize=None)
+def load_extractor(name):
+    with open(os.path.join(CONFIG_DIR, f"{name}.json"), 'r', encoding='utf-8') as file:
+        return Extractor(json.load(file), name=name)
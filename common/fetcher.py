@@ -0,0 +1,141 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+_DONE = object()
+
+# Pages kept in flight by default; small enough to stay polite to one host
+DEFAULT_WORKERS = 4
+
+# Streamlit only shows st.* calls made from threads tagged with the script's
+# run context. Returns a pool initializer that tags worker threads, or None
+# outside Streamlit.
+def streamlit_initializer():
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+# Fetch pages concurrently while yielding (page, records) strictly in page order.
+# Up to `workers` pages are in flight at once. The first page whose records are
+# empty/None is yielded and ends the stream, like the `break` in the old serial
+# loops; queued pages are cancelled and pages already in flight are discarded.
+# A page whose fetch_page raised re-raises here when its turn comes, ending the
+# stream the same way; failures of discarded pages are never seen.
+def fetch_pages_in_order(fetch_page, pages, workers=DEFAULT_WORKERS, initializer=None):
+    stopped = threading.Event()
+
+    def run(page):
+        if stopped.is_set():
+            return None
+        return fetch_page(page)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), initializer=initializer or streamlit_initializer())
+    pending = deque()
+    page_iter = iter(pages)
+    try:
+        for page in page_iter:
+            pending.append((page, pool.submit(run, page)))
+            if len(pending) >= workers:
+                break
+        while pending:
+            page, future = pending.popleft()
+            records = future.result()
+            yield page, records
+            if not records:
+                return
+            next_page = next(page_iter, _DONE)
+            if next_page is not _DONE:
+                pending.append((next_page, pool.submit(run, next_page)))
+    finally:
+        stopped.set()
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# Shared limits for catalogue-wide searches: requests in flight across all
+# stores, and requests spent in total per search
+FAN_OUT_WORKERS = 16
+FAN_OUT_MAX_REQUESTS = 400
+
+# Search many stores at once. probe(key) returns {'products', 'last_page'} for
+# page 1 of a store; fetch_page(key, page) returns the records of a later page.
+# Every store's page 1 is queued first, then pages 2..last_page (at most
+# `max_pages`) of each store as soon as its probe answers, all on one pool of
+# `workers` threads and never more than `max_requests` calls in total.
+# Returns ({key: records in page order}, truncated): each store stops at its
+# first empty page like scrape_store does, and truncated is True when the
+# request budget ran out before every page was requested.
+def fan_out_pages(keys, probe, fetch_page, workers=FAN_OUT_WORKERS,
+                  max_requests=FAN_OUT_MAX_REQUESTS, max_pages=None, initializer=None):
+    budget = [max_requests]
+    budget_lock = threading.Lock()
+    stopped = set()  # stores that already hit an empty page
+    truncated = [False]
+
+    def take_budget():
+        with budget_lock:
+            if budget[0] <= 0:
+                truncated[0] = True
+                return False
+            budget[0] -= 1
+            return True
+
+    def run_page(key, page):
+        if key in stopped:
+            return None
+        try:
+            records = fetch_page(key, page)
+        except Exception as e:
+            print(f"Error fetching page {page} of {key}: {e}")
+            records = None
+        if not records:
+            stopped.add(key)
+        return records
+
+    def run_probe(key):
+        try:
+            return probe(key)
+        except Exception as e:
+            print(f"Error probing {key}: {e}")
+            return None
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), initializer=initializer or streamlit_initializer())
+    first_pages = {}
+    later_pages = {key: [] for key in keys}
+    try:
+        probes = {}
+        for key in keys:
+            if not take_budget():
+                break
+            probes[pool.submit(run_probe, key)] = key
+        for future in as_completed(probes):
+            key = probes[future]
+            result = future.result()
+            if not result or not result['products']:
+                continue
+            first_pages[key] = result['products']
+            last_page = result['last_page'] if max_pages is None else min(result['last_page'], max_pages)
+            for page in range(2, last_page + 1):
+                if not take_budget():
+                    break
+                later_pages[key].append(pool.submit(run_page, key, page))
+
+        merged = {}
+        for key in keys:
+            if key not in first_pages:
+                continue
+            records = list(first_pages[key])
+            for future in later_pages[key]:
+                page_records = future.result()
+                if not page_records:
+                    break
+                records.extend(page_records)
+            merged[key] = records
+        return merged, truncated[0]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from common.disk_cache import DiskCache
+from common.ratelimit import get_scheduler
+from common.url_rewrite import rewrite_url
+
+# Where cached pages live and how the cache behaves; all can be overridden
+# with environment variables so the Streamlit apps need no code changes.
+#   SCRAPER_CACHE_MODE=normal  serve fresh pages from disk, revalidate stale ones
+#   SCRAPER_CACHE_MODE=replay  never touch the network, only serve cached pages
+#   SCRAPER_CACHE_MODE=off     plain requests, nothing is read or written
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'http')
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_TTL = 10 * 60
+
+# How long a page is considered fresh, per host (seconds)
+HOST_TTLS = {
+    'publiclibraries.com': 24 * 60 * 60,  # library listings barely change
+    'dealsheaven.in': 10 * 60,            # deals rotate several times a day
+}
+
+# Only these response headers are kept with a cached body
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+class CacheMiss(requests.RequestException):
+    pass
+
+class CachedSession:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, mode='normal', host_ttls=None,
+                 default_ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, pool_size=32,
+                 scheduler=None, max_retries=2):
+        if mode not in ('normal', 'replay', 'off'):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.mode = mode
+        self.host_ttls = HOST_TTLS if host_ttls is None else host_ttls
+        self.default_ttl = default_ttl
+        self.store = DiskCache(cache_dir, max_bytes=max_bytes)
+        self.session = requests.Session()
+        # A bigger pool so threaded page fetchers can reuse keep-alive connections
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Every network request waits for a slot from the per-host rate limiter
+        self.scheduler = scheduler or get_scheduler()
+        self.max_retries = max_retries
+        self.revalidated = 0
+        self.downloaded = 0
+
+    # Freshness lifetime for a URL, matching the host or any parent domain
+    def ttl_for(self, url):
+        host = (urlsplit(url).hostname or '').lower()
+        while host:
+            if host in self.host_ttls:
+                return self.host_ttls[host]
+            host = host.partition('.')[2]
+        return self.default_ttl
+
+    # `max_age` overrides the host TTL for this call (0 = always revalidate,
+    # which costs a 304 when the page has not changed)
+    def get(self, url, params=None, max_age=None, **kwargs):
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+        url = rewrite_url(url)
+        if self.mode == 'off':
+            return self._send(url, **kwargs)
+
+        key = DiskCache.make_key(url)
+        cached = self.store.get(key)
+
+        if self.mode == 'replay':
+            if cached is None:
+                raise CacheMiss(f"Replay mode: {url} is not in the cache")
+            return self._build_response(url, *cached)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached is not None:
+            body, meta = cached
+            ttl = self.ttl_for(url) if max_age is None else max_age
+            if time.time() - meta['stored_at'] < ttl:
+                return self._build_response(url, body, meta)
+            # Stale: ask the server whether our copy is still good
+            if meta['headers'].get('ETag'):
+                headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+
+        response = self._send(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            body, meta = cached
+            meta['stored_at'] = time.time()
+            self.store.update_meta(key, meta)
+            self.revalidated += 1
+            return self._build_response(url, body, meta)
+
+        self.downloaded += 1
+        response.from_cache = False
+        if response.status_code == 200:
+            meta = {
+                'url': url,
+                'status': response.status_code,
+                'encoding': response.encoding,
+                'headers': {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+                'stored_at': time.time(),
+            }
+            self.store.set(key, response.content, meta)
+        return response
+
+    # Network request through the host's rate limiter. A 429/503 blocks the host
+    # for its Retry-After period and the request is retried once that has passed.
+    def _send(self, url, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            with self.scheduler.slot(url) as slot:
+                response = self.session.get(url, **kwargs)
+                slot.done(response.status_code, response.headers)
+            if response.status_code not in (429, 503) or attempt == self.max_retries:
+                return response
+
+    # Rebuild a real requests.Response so callers can keep using .text/.status_code
+    def _build_response(self, url, body, meta):
+        response = requests.Response()
+        response.status_code = meta['status']
+        response._content = body
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = meta['encoding']
+        response.url = url
+        response.from_cache = True
+        return response
+
+    def stats(self):
+        stats = self.store.stats()
+        stats.update({'revalidated': self.revalidated, 'downloaded': self.downloaded})
+        return stats
+
+_default_session = None
+_default_lock = threading.Lock()
+
+# The process-wide session; created on first use from the environment settings
+def get_session():
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = CachedSession(
+                cache_dir=os.getenv('SCRAPER_CACHE_DIR', DEFAULT_CACHE_DIR),
+                mode=os.getenv('SCRAPER_CACHE_MODE', 'normal'),
+                max_bytes=int(os.getenv('SCRAPER_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            )
+        return _default_session
+
+# Drop-in replacement for requests.get that goes through the shared cache
+def http_get(url, **kwargs):
+    return get_session().get(url, **kwargs)
@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common.http_cache import http_get
+from common.parsing import make_soup
+from common.ratelimit import polite_get
+
+# Fetches a page with plain HTTP when that is enough and with a headless
+# browser only when it isn't. The first request for a kind of page tries HTTP
+# and checks the HTML: `selector` must match at least `min_count` elements, or
+# without a selector the visible text must be at least `min_text` characters
+# (or `check(html)` must hold, when given). If it falls short the page is
+# loaded in a browser. If the browser's copy passes the check, or has clearly
+# more text, the kind of page is remembered as needing a browser. If it adds
+# nothing although the browser page settled, the page is just empty (no
+# results, no pagination, past the last page) and the kind of page is
+# remembered as static for EMPTY_PAGE_MAX_AGE; meanwhile a 200 from plain HTTP
+# is trusted for it, content or not. A browser load that timed out decides
+# nothing: the render may just have been slow. Decisions are kept per host
+# and path pattern (first path segment, then one * per
+# further segment: dealsheaven.in/store/amazon?page=3 -> dealsheaven.in/store/*)
+# in a JSON file, and are re-detected after DECISION_MAX_AGE seconds.
+#   fetcher = HybridFetcher(get_driver_pool())
+#   html = fetcher.fetch(url, selector='div.product-item-detail')
+# SCRAPER_FETCH_MODES_PATH moves the decisions file.
+DEFAULT_MODES_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'fetch_modes.json')
+DECISION_MAX_AGE = 7 * 24 * 3600
+# A kind of page only ever seen empty may well have content next time
+EMPTY_PAGE_MAX_AGE = 3600
+DEFAULT_MIN_TEXT = 500
+# Visible characters a browser's copy must add over plain HTTP's to count as more content
+MIN_EXTRA_TEXT = 200
+
+_WHITESPACE = re.compile(r'\s+')
+
+def route_key(url):
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    pattern = '/' + segments[0] + '/*' * (len(segments) - 1) if segments else '/'
+    return f"{(parts.hostname or '').lower()}{pattern}"
+
+def _visible_text_length(soup):
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    return len(_WHITESPACE.sub(' ', soup.get_text(' ')).strip())
+
+def text_length(html):
+    return _visible_text_length(make_soup(html or ''))
+
+# Whether `html` already has what the caller needs
+def has_content(html, selector=None, min_count=1, min_text=DEFAULT_MIN_TEXT):
+    soup = make_soup(html or '')
+    if selector is not None:
+        return len(soup.select(selector, limit=min_count)) >= min_count
+    return _visible_text_length(soup) >= min_text
+
+# The remembered {route: {'mode': 'static' | 'browser', 'decided_at': ..., 'max_age': ...}}, shared by all fetchers
+class FetchModes:
+    def __init__(self, path=DEFAULT_MODES_PATH, max_age=DECISION_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self.modes = json.load(file)
+        except (OSError, ValueError):
+            self.modes = {}
+
+    def get(self, url):
+        with self._lock:
+            decision = self.modes.get(route_key(url))
+        if decision is None or time.time() - decision['decided_at'] > decision.get('max_age', self.max_age):
+            return None
+        return decision['mode']
+
+    # Remember `mode` for the kind of page `url` is, for `max_age` seconds (default: the store's)
+    def set(self, url, mode, max_age=None):
+        key = route_key(url)
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            decision = self.modes.get(key, {})
+            if (decision.get('mode') == mode and decision.get('max_age', self.max_age) == max_age
+                    and time.time() - decision['decided_at'] <= max_age):
+                return
+            self.modes[key] = {'mode': mode, 'decided_at': time.time(), 'max_age': max_age}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump(self.modes, file, indent=1, sort_keys=True)
+            os.replace(temporary, self.path)
+
+_modes = None
+_modes_lock = threading.Lock()
+
+def get_fetch_modes():
+    global _modes
+    with _modes_lock:
+        if _modes is None:
+            _modes = FetchModes(os.getenv('SCRAPER_FETCH_MODES_PATH', DEFAULT_MODES_PATH))
+        return _modes
+
+class HybridFetcher:
+    def __init__(self, driver_pool, modes=None):
+        self.driver_pool = driver_pool
+        self.modes = modes or get_fetch_modes()
+        self.static_fetches = 0
+        self.browser_fetches = 0
+
+    # HTML of `url`. `driver`, if given, is used for the browser path instead
+    # of one from the pool. `check(html)`, if given, replaces the selector/text
+    # test. `wait` is passed to wait_for_page for browser loads.
+    def fetch(self, url, selector=None, min_count=1, min_text=DEFAULT_MIN_TEXT, driver=None, check=None, **wait):
+        if check is None:
+            check = lambda html: has_content(html, selector, min_count, min_text)
+        mode = self.modes.get(url)
+        static_html = None
+        if mode != 'browser':
+            response = http_get(url)
+            self.static_fetches += 1
+            if response.status_code == 200:
+                static_html = response.text
+                if check(static_html):
+                    self.modes.set(url, 'static')
+                    return static_html
+                if mode == 'static':
+                    return static_html
+            elif mode == 'static':
+                print(f"Plain HTTP got status {response.status_code} for {route_key(url)}, using the browser")
+
+        html, settled = self._browser_fetch(url, selector, min_count, driver, wait)
+        if mode != 'browser':
+            if check(html) or (static_html is not None and text_length(html) - text_length(static_html) > MIN_EXTRA_TEXT):
+                # The browser's copy has what plain HTTP's lacks: this kind of page needs one
+                self.modes.set(url, 'browser')
+            elif static_html is not None and settled:
+                # Both fell short and the settled browser page added nothing:
+                # an empty page, which plain HTTP serves just as well
+                self.modes.set(url, 'static', max_age=EMPTY_PAGE_MAX_AGE)
+        return html
+
+    # (HTML, whether the page settled before the wait timed out)
+    def _browser_fetch(self, url, selector, min_count, driver, wait):
+        self.browser_fetches += 1
+        if driver is not None:
+            return _load(driver, url, selector, min_count, wait)
+        with self.driver_pool.driver() as driver:
+            return _load(driver, url, selector, min_count, wait)
+
+def _load(driver, url, selector, min_count, wait):
+    from common.waits import wait_for_page  # needs selenium, only on the browser path
+    polite_get(driver, url)
+    status = wait_for_page(driver, selector, url=url, min_count=min_count, **wait)
+    return driver.page_source, status is not None
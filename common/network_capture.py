@@ -0,0 +1,215 @@
+import base64
+import json
+import os
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from common.ratelimit import get_scheduler
+from common.resource_blocking import read_performance_log
+
+# Reads records from the JSON a page's own API calls return instead of from
+# its rendered DOM (Behance's grids are filled by background GraphQL calls
+# and styled with generated class names that change on every rebuild).
+# Once the page has loaded, its API responses are picked out of the browser's
+# performance log and their bodies fetched over CDP (Network.getResponseBody).
+# The "api" section of an extractor config maps the same output fields onto
+# the JSON, so both paths give the same records:
+#   "api": {"url": "/v3/graphql",
+#           "fields": {"Title": "name", "Owner": ["owners.0.displayName", "owner.displayName"]},
+#           "cursor": "after"}
+# A field is a dotted path (numbers index lists) or a list of paths, the first
+# that resolves wins. The record list is found by shape: the first list of
+# objects (or of {"node": object} edges) whose first entry has every required
+# field. More pages come from replaying the captured request inside the page
+# (its cookies, its headers) with the `cursor` variable set to the response's
+# pageInfo.endCursor, until max_items or hasNextPage is false. Paging also
+# stops when a page adds no new records or repeats a cursor, and after
+# MAX_REPLAYS requests whatever the API says.
+# Capture needs the performance log (capture_options) and CDP, i.e. Chrome or
+# Edge under Selenium. Anywhere else, or when nothing usable was captured,
+# scrape_api_records() returns None and the scraper reads the DOM as before.
+# SCRAPER_CAPTURE_MODE=dom turns capture off.
+CAPTURE_MODE = os.getenv('SCRAPER_CAPTURE_MODE', 'api').lower()
+MAX_REPLAYS = int(os.getenv('SCRAPER_CAPTURE_MAX_REPLAYS', 200))
+
+# Set by the browser itself; fetch() may not send them
+SKIPPED_HEADERS = {'content-length', 'cookie', 'host', 'origin', 'referer', 'user-agent', 'accept-encoding', 'connection'}
+
+# Promise results are awaited by execute_script (and by Playwright's evaluate)
+REPLAY_JS = """
+return fetch(arguments[0], {method: arguments[1], headers: arguments[2], body: arguments[3], credentials: 'include'})
+    .then(function (response) { return response.ok ? response.json() : null; })
+    .catch(function () { return null; });
+"""
+
+# Before the browser starts: turn on the performance log the responses are read from
+def capture_options(options):
+    if hasattr(options, 'KEY'):
+        vendor = options.KEY.split(':')[0]  # goog:chromeOptions / ms:edgeOptions
+        options.set_capability(f"{vendor}:loggingPrefs", {'performance': 'ALL'})
+    return options
+
+def can_capture(driver):
+    return CAPTURE_MODE != 'dom' and hasattr(driver, 'get_log') and hasattr(driver, 'execute_cdp_cmd')
+
+# The finished JSON responses to requests whose URL contains `url_part`, since
+# the log was last read: [{url, method, headers, post_data, payload}], in order
+def captured_responses(driver, url_part):
+    requests = {}
+    json_ids = set()
+    finished = []
+    for message in read_performance_log(driver):
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.requestWillBeSent' and url_part in params['request']['url']:
+            requests[params['requestId']] = params['request']
+        elif method == 'Network.responseReceived' and params['requestId'] in requests:
+            if 'json' in params['response'].get('mimeType', ''):
+                json_ids.add(params['requestId'])
+        elif method == 'Network.loadingFinished' and params['requestId'] in json_ids:
+            finished.append(params['requestId'])
+
+    responses = []
+    for request_id in finished:
+        request = requests[request_id]
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            payload = json.loads(base64.b64decode(body['body']) if body.get('base64Encoded') else body['body'])
+        except Exception:
+            continue  # gone from the browser's buffer, or not JSON after all
+        post_data = request.get('postData')
+        if post_data is None and request.get('hasPostData'):
+            try:
+                post_data = driver.execute_cdp_cmd('Network.getRequestPostData', {'requestId': request_id})['postData']
+            except Exception:
+                pass
+        responses.append({'url': request['url'], 'method': request['method'], 'headers': request.get('headers', {}),
+                          'post_data': post_data, 'payload': payload})
+    return responses
+
+def _resolve(value, path):
+    for part in path.split('.'):
+        if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        elif isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return None
+    return value
+
+# Breadth-first walk over every value in a JSON document
+def _walk(payload):
+    queue = deque([payload])
+    while queue:
+        value = queue.popleft()
+        yield value
+        if isinstance(value, dict):
+            queue.extend(value.values())
+        elif isinstance(value, list):
+            queue.extend(value)
+
+# An extractor's "api" section, compiled
+class ApiExtractor:
+    def __init__(self, extractor):
+        api = extractor.config['api']
+        self.extractor = extractor
+        self.url = api['url']
+        self.cursor = api.get('cursor')
+        self.paths = {field: [paths] if isinstance(paths, str) else list(paths) for field, paths in api['fields'].items()}
+        # Fields the API doesn't carry can't be required of it
+        self.required = [field for field in self.paths if field in extractor.required]
+
+    # Values come back as text, like the DOM path's ("1200", not 1200)
+    def _value(self, node, field):
+        for path in self.paths.get(field, ()):
+            value = _resolve(node, path)
+            if value is not None and not isinstance(value, (dict, list)):
+                return str(value)
+        return None
+
+    def record(self, node):
+        if not isinstance(node, dict):
+            return None
+        node = node.get('node', node)
+        record = {field: self._value(node, field) for field in self.extractor.fields}
+        if any(record[field] is None for field in self.required):
+            return None
+        return record
+
+    # Records of the first list in `payload` that reads as records
+    def records(self, payload):
+        for value in _walk(payload):
+            if isinstance(value, list) and value and self.record(value[0]) is not None:
+                return [record for record in map(self.record, value) if record is not None]
+        return []
+
+    # The cursor of the next page, or None on the last one
+    def next_cursor(self, payload):
+        for value in _walk(payload):
+            if isinstance(value, dict) and isinstance(value.get('pageInfo'), dict):
+                page_info = value['pageInfo']
+                return page_info.get('endCursor') if page_info.get('hasNextPage') else None
+        return None
+
+# Send a captured request again from inside the page, asking for the page after `cursor`
+def replay(driver, response, variable, cursor):
+    url, body = response['url'], response['post_data']
+    if body:
+        # GraphQL: {"query": ..., "variables": {...}}
+        data = json.loads(body)
+        data.setdefault('variables', {})[variable] = cursor
+        body = json.dumps(data)
+    else:
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        query[variable] = cursor
+        url = urlunsplit(parts._replace(query=urlencode(query)))
+    headers = {name: value for name, value in response['headers'].items()
+               if name.lower() not in SKIPPED_HEADERS and not name.startswith(':') and not name.lower().startswith('sec-')}
+    with get_scheduler().slot(url) as slot:
+        payload = driver.execute_script(REPLAY_JS, url, response['method'], headers, body)
+        slot.done(200 if payload is not None else 500)
+    return payload
+
+# Records of the listing the loaded page fetched through its API, paged
+# through the API up to `max_items`, de-duplicated by the extractor's key.
+# The latest listing response seeds the paging (after a search, the search's).
+# None when the extractor has no "api" section or nothing usable was captured.
+def scrape_api_records(driver, extractor, max_items):
+    if 'api' not in extractor.config or not can_capture(driver):
+        return None
+    api = ApiExtractor(extractor)
+    seed = None
+    for response in captured_responses(driver, api.url):
+        if api.records(response['payload']):
+            seed = response
+    if seed is None:
+        return None
+
+    records = []
+    seen = set()
+    cursors = set()
+    payload = seed['payload']
+    replays = 0
+    while payload:
+        added = 0
+        for record in api.records(payload):
+            key = extractor.key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            records.append(record)
+            added += 1
+            if len(records) >= max_items:
+                return records
+        cursor = api.next_cursor(payload)
+        cursor_key = json.dumps(cursor, sort_keys=True)
+        # A page with nothing new or a cursor seen before would replay forever
+        if cursor is None or api.cursor is None or not added or cursor_key in cursors:
+            break
+        if replays >= MAX_REPLAYS:
+            print(f"Stopped paging {api.url} after {MAX_REPLAYS} requests")
+            break
+        cursors.add(cursor_key)
+        replays += 1
+        payload = replay(driver, seed, api.cursor, cursor)
+    return records
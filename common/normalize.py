@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Whole-column conversions of the scraped display strings into typed numbers.
+# Every function works on a full pandas Series at once (vectorised string ops +
+# to_numeric), so normalising a million-row deal table is a single pass and the
+# result sorts and filters as numbers. Unparseable values become <NA>/NaN.
+# Scraped prices repeat a lot, so each distinct string is parsed only once and
+# the results are broadcast back with the factorize codes.
+
+NUMBER_PATTERN = r'(\d[\d,]*(?:\.\d+)?)'
+COUNT_PATTERN = r'(\d[\d,]*(?:\.\d+)?)\s*([KMB]?)'
+COUNT_MULTIPLIERS = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+# Run `parse` over the distinct values of `series` only and map the result back
+def _parse_distinct(series, parse, dtype):
+    codes, uniques = pd.factorize(series)
+    parsed = parse(pd.Series(uniques, dtype='string')).to_numpy(dtype='float64', na_value=np.nan)
+    # Code -1 marks missing values and picks the NaN appended at the end
+    values = np.append(parsed, np.nan)[codes]
+    return pd.Series(values, index=series.index).astype(dtype)
+
+def _number(strings):
+    digits = strings.str.extract(NUMBER_PATTERN, expand=False)
+    return pd.to_numeric(digits.str.replace(',', '', regex=False), errors='coerce')
+
+def _count(strings):
+    parts = strings.str.strip().str.upper().str.extract(COUNT_PATTERN)
+    numbers = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    multipliers = parts[1].map(COUNT_MULTIPLIERS).astype('float64')
+    return (numbers * multipliers).round()
+
+# "₹1,299" / "Rs. 1,299.50" / "45% off" -> first number in the text (float)
+def to_number(series):
+    return _parse_distinct(series, _number, 'float64')
+
+# "₹1,299.50" -> 129950 (integer paise, exact for sums and comparisons)
+def to_paise(series):
+    return (to_number(series) * 100).round().astype('Int64')
+
+# "45% off" -> 45.0
+def to_percent(series):
+    return to_number(series)
+
+# "1.2K" -> 1200, "3M" -> 3000000, "950" -> 950
+def expand_counts(series):
+    return _parse_distinct(series, _count, 'Int64')
+
+# Add typed columns next to the scraped Price / Special Price / Discount strings
+def normalize_deals(df):
+    df = df.copy()
+    if 'Price' in df:
+        df['Price Value'] = to_number(df['Price'])
+        df['Price Paise'] = to_paise(df['Price'])
+    if 'Special Price' in df:
+        df['Special Price Value'] = to_number(df['Special Price'])
+        df['Special Price Paise'] = to_paise(df['Special Price'])
+    if 'Discount' in df:
+        df['Discount Pct'] = to_percent(df['Discount'])
+    return df
+
+# Add typed columns next to the scraped Behance Likes / Views strings
+def normalize_behance_stats(df):
+    df = df.copy()
+    if 'Likes' in df:
+        df['Likes Count'] = expand_counts(df['Likes'])
+    if 'Views' in df:
+        df['Views Count'] = expand_counts(df['Views'])
+    return df
@@ -0,0 +1,64 @@
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml is a C parser and is several times faster than Python's html.parser;
+# fall back to html.parser when it is not installed. SCRAPER_PARSER forces a
+# backend ("lxml", "html.parser", ...) e.g. to compare results.
+try:
+    import lxml  # noqa: F401
+    DEFAULT_BACKEND = 'lxml'
+except ImportError:
+    DEFAULT_BACKEND = 'html.parser'
+
+PARSER_BACKEND = os.getenv('SCRAPER_PARSER', DEFAULT_BACKEND)
+
+# Strainer for <tag_name> elements, optionally with a given class and/or id.
+# While parsing, bs4 hands strainers the raw class string ("a b"), so a plain
+# SoupStrainer('div', class_='a') misses multi-class tags; match the split list.
+def tag_strainer(tag_name, css_class=None, tag_id=None):
+    def matches(name, attrs):
+        if name != tag_name:
+            return False
+        if tag_id is not None and attrs.get('id') != tag_id:
+            return False
+        if css_class is not None:
+            classes = attrs.get('class') or ''
+            if isinstance(classes, str):
+                classes = classes.split()
+            return css_class in classes
+        return True
+    return SoupStrainer(matches)
+
+# The only parts of each page the extractors read. Passing one of these to
+# make_soup() builds just the matching subtrees instead of the whole document.
+STATE_LINKS = tag_strainer('div', css_class='dropdown-content')       # publiclibraries.com state menu
+LIBRARY_TABLE = tag_strainer('table', tag_id='libraries')             # publiclibraries.com state page
+STORE_LINKS = tag_strainer('ul')                                      # dealsheaven.in/stores
+PRODUCT_ITEMS = tag_strainer('div', css_class='product-item-detail')  # dealsheaven.in product cards
+PAGINATION = tag_strainer('ul', css_class='pagination')               # dealsheaven.in page links
+
+# Highest page number linked from a parsed dealsheaven.in page's pagination (1 without one)
+def parse_last_page(soup):
+    page_numbers = []
+    for link in soup.select('ul.pagination li a'):
+        href = link.get('href', '')
+        # Extract the page number from the href (dropping any later query parameters)
+        if "page=" in href:
+            page_num = href.split("page=")[-1].split("&")[0]
+            if page_num.isdigit():
+                page_numbers.append(int(page_num))
+    return max(page_numbers, default=1)
+
+# Merge several strainers into one, so a single parse keeps all their subtrees
+def combine_strainers(*strainers):
+    def matches(name, attrs):
+        return any(strainer.search_tag(name, attrs) for strainer in strainers)
+    return SoupStrainer(matches)
+
+# Parse html with the configured backend, keeping only the `only` subtrees
+# (a SoupStrainer, a list of them, or None for the whole document)
+def make_soup(html, only=None, backend=None):
+    if isinstance(only, (list, tuple)):
+        only = combine_strainers(*only)
+    return BeautifulSoup(html, backend or PARSER_BACKEND, parse_only=only)
@@ -0,0 +1,263 @@
+import asyncio
+import atexit
+import os
+import random
+import threading
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import NoSuchElementException
+
+from common.driver_pool import DriverPool
+from common.ratelimit import get_scheduler
+from common.resource_blocking import BLOCKING_PROFILES, active_profile, collect_blocking_stats, count_blocked
+from common.url_rewrite import rewrite_url
+
+# Optional Playwright backend for the browser scrapers. One headless Chromium
+# runs on an asyncio loop in a background thread; every "driver" is an
+# isolated browser context (own cookies/storage) with one page in it, so
+# dozens of pages render at once for the memory of a single browser.
+#   SCRAPER_BROWSER_ENGINE=playwright streamlit run Milestone_2/Task_5.py
+# PlaywrightDriver speaks the small part of the Selenium WebDriver API the
+# scrapers use (get, page_source, execute_script, find_element(s), quit), so
+# the scrape functions, waits and extractors run unchanged on either engine.
+# render_pages() is the natively async path: many URLs, one context each.
+# PLAYWRIGHT_CONTEXTS caps the contexts open at once (default 16), counting
+# both pooled drivers and render_pages(): every context takes a slot from one
+# semaphore. A pooled driver only holds a context while checked out; it opens
+# one on first use and closes it when the pool resets it.
+BROWSER_ENGINE = os.getenv('SCRAPER_BROWSER_ENGINE', 'selenium').lower()
+PLAYWRIGHT_CONTEXTS = int(os.getenv('PLAYWRIGHT_CONTEXTS', 16))
+
+# Selenium By strategies -> Playwright selectors
+_SELECTORS = {
+    'css selector': lambda value: value,
+    'class name': lambda value: f".{value}",
+    'tag name': lambda value: value,
+    'id': lambda value: f"#{value}",
+    'name': lambda value: f'[name="{value}"]',
+    'xpath': lambda value: f"xpath={value}",
+    'link text': lambda value: f"a:text-is({value!r})",
+}
+
+# Selenium returns the DOM property when there is one (absolute href/src)
+ATTRIBUTE_JS = """(el, name) => {
+    const prop = el[name];
+    return typeof prop === 'string' || typeof prop === 'boolean' ? String(prop) : el.getAttribute(name);
+}"""
+
+# Selenium-style script bodies (`return ...`, `arguments[0]`) as a function Playwright can call
+def _as_function(script):
+    return f"(args) => (function () {{\n{script}\n}}).apply(null, args)"
+
+# execute_script() for a Playwright page (async)
+async def evaluate_script(page, script, *args):
+    return await page.evaluate(_as_function(script), list(args))
+
+def use_playwright():
+    return BROWSER_ENGINE == 'playwright'
+
+class PlaywrightElement:
+    def __init__(self, driver, handle):
+        self._driver = driver
+        self._handle = handle
+
+    @property
+    def text(self):
+        return self._driver._call(self._handle.inner_text())
+
+    def get_attribute(self, name):
+        return self._driver._call(self._handle.evaluate(ATTRIBUTE_JS, name))
+
+    def find_element(self, by, value):
+        handle = self._driver._call(self._handle.query_selector(_SELECTORS[by](value)))
+        if handle is None:
+            raise NoSuchElementException(f"No element matches {by}={value!r}")
+        return PlaywrightElement(self._driver, handle)
+
+    def find_elements(self, by, value):
+        handles = self._driver._call(self._handle.query_selector_all(_SELECTORS[by](value)))
+        return [PlaywrightElement(self._driver, handle) for handle in handles]
+
+    def click(self):
+        self._driver._call(self._handle.click())
+
+    def clear(self):
+        self._driver._call(self._handle.fill(''))
+
+    def send_keys(self, text):
+        self._driver._call(self._handle.type(text))
+
+    def submit(self):
+        self._driver._call(self._handle.evaluate("el => (el.form || el).requestSubmit ? (el.form || el).requestSubmit() : (el.form || el).submit()"))
+
+class PlaywrightDriver:
+    def __init__(self, engine, blocking, user_agent=None):
+        self._engine = engine
+        self._context = None
+        self._page = None
+        self.blocking_profile = blocking
+        self.user_agent = user_agent
+
+    def _call(self, coroutine):
+        return self._engine.call(coroutine)
+
+    # The driver's page, opening its context (and taking a slot) on first use
+    @property
+    def page(self):
+        if self._page is None:
+            self._context, self._page = self._call(self._engine._new_page(self.blocking_profile, self.user_agent))
+        return self._page
+
+    # True while the driver holds no context (before first use, after a reset)
+    @property
+    def idle(self):
+        return self._page is None
+
+    def get(self, url):
+        self._call(self.page.goto(url, wait_until='load'))
+
+    @property
+    def page_source(self):
+        return self._call(self.page.content())
+
+    @property
+    def current_url(self):
+        return self._page.url if self._page is not None else 'about:blank'
+
+    @property
+    def title(self):
+        return self._call(self.page.title())
+
+    def execute_script(self, script, *args):
+        return self._call(evaluate_script(self.page, script, *args))
+
+    def find_element(self, by, value):
+        handle = self._call(self.page.query_selector(_SELECTORS[by](value)))
+        if handle is None:
+            raise NoSuchElementException(f"No element matches {by}={value!r}")
+        return PlaywrightElement(self, handle)
+
+    def find_elements(self, by, value):
+        handles = self._call(self.page.query_selector_all(_SELECTORS[by](value)))
+        return [PlaywrightElement(self, handle) for handle in handles]
+
+    # For DriverPool: throwing the context away is the cleanest possible reset,
+    # and frees its slot while the driver sits idle
+    def reset_session(self):
+        context, self._context, self._page = self._context, None, None
+        if context is not None:
+            self._call(self._engine._close_context(context))
+
+    def quit(self):
+        try:
+            self.reset_session()
+        except Exception:
+            pass
+
+class PlaywrightEngine:
+    def __init__(self, headless=True, max_contexts=PLAYWRIGHT_CONTEXTS):
+        from playwright.async_api import async_playwright
+        self.max_contexts = max_contexts
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='playwright-engine', daemon=True)
+        self._thread.start()
+        self._playwright = self.call(async_playwright().start())
+        self._browser = self.call(self._playwright.chromium.launch(headless=headless))
+        self._slots = asyncio.Semaphore(max_contexts)
+
+    # Run a coroutine on the engine's loop from any other thread and wait for it
+    def call(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    # A new isolated context with the blocking profile's routes and one page,
+    # once one of the max_contexts slots is free. Close it with _close_context.
+    async def _new_page(self, blocking='none', user_agent=None):
+        await self._slots.acquire()
+        try:
+            context = await self._browser.new_context(user_agent=user_agent)
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            return context, await self._setup_page(context, blocking)
+        except BaseException:
+            await self._close_context(context)
+            raise
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        finally:
+            self._slots.release()
+
+    async def _setup_page(self, context, blocking):
+        name = active_profile(blocking)
+        settings = BLOCKING_PROFILES[name]
+        if settings['types'] or settings['domains']:
+            types, domains = set(settings['types']), tuple(settings['domains'])
+
+            async def block(route):
+                request = route.request
+                host = urlsplit(request.url).hostname or ''
+                if request.resource_type in types or any(host == domain or host.endswith('.' + domain) for domain in domains):
+                    count_blocked(name, request.resource_type.capitalize())
+                    await route.abort('blockedbyclient')
+                else:
+                    await route.continue_()
+            await context.route('**/*', block)
+        return await context.new_page()
+
+    def new_driver(self, blocking='none', user_agent=None):
+        return PlaywrightDriver(self, active_profile(blocking), user_agent)
+
+    # Load every URL in its own context, up to max_contexts at once, through the
+    # per-host rate limiter. `handle(page)` (a coroutine function) turns a loaded
+    # page into the result; by default the page's HTML. Results keep URL order;
+    # a page that fails gives None.
+    async def render_pages(self, urls, handle=None, blocking='none', user_agent=None):
+        async def render(url):
+            context, page = await self._new_page(blocking, user_agent)
+            try:
+                url = rewrite_url(url)
+                async with get_scheduler().slot_async(url) as slot:
+                    response = await page.goto(url, wait_until='load')
+                    slot.done(response.status if response else 200)
+                return await (handle(page) if handle else page.content())
+            except Exception as e:
+                print(f"Error rendering {url}: {e}")
+                return None
+            finally:
+                await self._close_context(context)
+        return await asyncio.gather(*(render(url) for url in urls))
+
+    # render_pages() from synchronous code
+    def render(self, urls, handle=None, blocking='none', user_agent=None):
+        return self.call(self.render_pages(urls, handle, blocking, user_agent))
+
+    def close(self):
+        try:
+            self.call(self._browser.close(), timeout=30)
+            self.call(self._playwright.stop(), timeout=30)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# The process-wide engine (one browser), started on first use
+def get_playwright_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaywrightEngine()
+            atexit.register(_engine.close)
+        return _engine
+
+# The driver pool a scraper should use: its own Selenium factory, or contexts
+# in the shared Playwright browser when SCRAPER_BROWSER_ENGINE=playwright
+def make_driver_pool(selenium_factory, blocking, user_agents=None):
+    if use_playwright():
+        engine = get_playwright_engine()
+        return DriverPool(lambda: engine.new_driver(blocking, random.choice(user_agents) if user_agents else None),
+                          size=engine.max_contexts)
+    return DriverPool(selenium_factory, on_release=collect_blocking_stats)
@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from common.url_rewrite import rewrite_url
+
+# Politeness settings per site. `rate`/`burst` feed a token bucket (requests
+# per second and how many may go out back to back); the number of requests in
+# flight starts at `start` and moves between 1 and `max_concurrency`:
+# +1 per window of fast successful answers, halved on 429/5xx or slow answers
+# (AIMD, the same scheme TCP uses for its congestion window).
+HOST_LIMITS = {
+    'publiclibraries.com': {'rate': 5.0, 'burst': 10, 'start': 4, 'max_concurrency': 10, 'target_latency': 2.0},
+    'dealsheaven.in': {'rate': 4.0, 'burst': 8, 'start': 4, 'max_concurrency': 16, 'target_latency': 2.0},
+    'behance.net': {'rate': 1.0, 'burst': 3, 'start': 1, 'max_concurrency': 4, 'target_latency': 5.0},
+}
+DEFAULT_LIMITS = {'rate': 2.0, 'burst': 4, 'start': 2, 'max_concurrency': 4, 'target_latency': 3.0}
+
+# How long to back off when a 429/503 comes without a usable Retry-After
+DEFAULT_BACKOFF = 5.0
+
+# Seconds to wait from a Retry-After header (delta-seconds or an HTTP date)
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostLimiter:
+    def __init__(self, rate, burst, start=2, max_concurrency=4, target_latency=3.0, min_concurrency=1):
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.limit = float(min(max(start, min_concurrency), max_concurrency))
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    # Take a slot if one is free right now; otherwise return how long to wait
+    # (None means "until some request finishes")
+    def _try_acquire(self):
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.in_flight += 1
+        self.requests += 1
+        return 0
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                self._cond.wait(wait)
+
+    async def acquire_async(self):
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(0.05 if wait is None else wait)
+
+    # Report how a request went. status None means it failed without an answer.
+    def release(self, status=None, latency=0.0, retry_after=None):
+        with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            overloaded = status is None or status == 429 or status >= 500
+            if overloaded or latency > 2 * self.target_latency:
+                # Decrease at most once per round trip, so one burst of
+                # failures doesn't collapse the window to 1
+                if now - self.last_decrease > max(latency, 0.5):
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self.last_decrease = now
+            elif status < 400 and latency <= self.target_latency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            if status in (429, 503):
+                self.throttled += 1
+                delay = retry_after if retry_after is not None else DEFAULT_BACKOFF
+                self.blocked_until = max(self.blocked_until, now + delay)
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            'concurrency': int(self.limit),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'throttled': self.throttled,
+        }
+
+# Filled in by the caller inside a slot, read back when the slot is released
+class SlotResult:
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+    def done(self, status, headers=None):
+        self.status = status
+        if headers is not None:
+            self.retry_after = parse_retry_after(headers.get('Retry-After'))
+
+# One limiter per host; different hosts never wait on each other
+class HostScheduler:
+    def __init__(self, host_limits=None, default_limits=None):
+        self.host_limits = HOST_LIMITS if host_limits is None else host_limits
+        self.default_limits = DEFAULT_LIMITS if default_limits is None else default_limits
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    # Settings key for a host: the host itself or the closest configured parent domain
+    def _site(self, host):
+        site = host
+        while site:
+            if site in self.host_limits:
+                return site
+            site = site.partition('.')[2]
+        return host
+
+    # Change (or add) the settings of one site; its limiter starts over
+    def configure(self, site, **settings):
+        with self._lock:
+            self.host_limits = {**self.host_limits, site: settings}
+            self._limiters.pop(site, None)
+
+    def limiter_for(self, url_or_host):
+        host = urlsplit(url_or_host).hostname if '://' in url_or_host else url_or_host
+        site = self._site((host or '').lower())
+        with self._lock:
+            if site not in self._limiters:
+                self._limiters[site] = HostLimiter(**self.host_limits.get(site, self.default_limits))
+            return self._limiters[site]
+
+    # with scheduler.slot(url) as result:
+    #     response = session.get(url)
+    #     result.done(response.status_code, response.headers)
+    @contextmanager
+    def slot(self, url_or_host):
+        limiter = self.limiter_for(url_or_host)
+        limiter.acquire()
+        result = SlotResult()
+        start = time.monotonic()
+        try:
+            yield result
+        finally:
+            limiter.release(result.status, time.monotonic() - start, result.retry_after)
+
+    @asynccontextmanager
+    async def slot_async(self, url_or_host):
+        limiter = self.limiter_for(url_or_host)
+        await limiter.acquire_async()
+        result = SlotResult()
+        start = time.monotonic()
+        try:
+            yield result
+        finally:
+            limiter.release(result.status, time.monotonic() - start, result.retry_after)
+
+    def stats(self):
+        with self._lock:
+            return {site: limiter.stats() for site, limiter in self._limiters.items()}
+
+_default_scheduler = HostScheduler()
+
+# The process-wide scheduler shared by every scraper
+def get_scheduler():
+    return _default_scheduler
+
+# driver.get() through the host's limiter. WebDriver exposes no status code,
+# so a page that finishes loading counts as a 200.
+def polite_get(driver, url):
+    url = rewrite_url(url)
+    with get_scheduler().slot(url) as slot:
+        driver.get(url)
+        slot.done(200)
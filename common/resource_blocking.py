@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+
+# Browser profiles that stop Chromium (Edge/Chrome) from downloading what the
+# scrapers never read: images, fonts, media, stylesheets, trackers. Blocking
+# goes through the DevTools protocol (Network.setBlockedURLs), so blocked
+# requests fail inside the browser and never touch the network.
+#   options = blocking_options(webdriver.EdgeOptions(), 'behance')
+#   driver = webdriver.Edge(service=service, options=options)
+#   apply_blocking(driver, 'behance')
+# Profiles block by resource type (URL patterns per type) and by a domain
+# denylist. Stylesheets stay loaded for Behance: its infinite scroll needs
+# real layout to know when the end of the page is reached.
+# SCRAPER_BLOCKING_PROFILE overrides the profile everywhere ("none" turns
+# blocking off). Firefox has no CDP, so it is left alone.
+RESOURCE_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*.ogg', '*.mov'],
+    'stylesheet': ['*.css'],
+}
+TRACKER_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+    'googleadservices.com', 'facebook.net', 'connect.facebook.com', 'hotjar.com', 'scorecardresearch.com',
+    'adobedtm.com', 'demdex.net', 'omtrdc.net', 'everesttech.net', 'criteo.com', 'taboola.com',
+    'outbrain.com', 'amazon-adsystem.com', 'newrelic.com', 'nr-data.net', 'segment.io', 'clarity.ms',
+]
+BLOCKING_PROFILES = {
+    'none': {'types': [], 'domains': []},
+    'text': {'types': ['image', 'font', 'media', 'stylesheet'], 'domains': TRACKER_DOMAINS},
+    'behance': {'types': ['image', 'font', 'media'], 'domains': TRACKER_DOMAINS},
+}
+
+# Blocked responses are never downloaded, so their size is unknown. "Saved"
+# bytes are an estimate: blocked requests of a type x a typical size for it.
+TYPICAL_BYTES = {'Image': 30_000, 'Font': 40_000, 'Media': 500_000, 'Stylesheet': 20_000, 'Script': 25_000}
+DEFAULT_TYPICAL_BYTES = 5_000
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+# The profile actually in force (SCRAPER_BLOCKING_PROFILE wins)
+def active_profile(profile):
+    return os.getenv('SCRAPER_BLOCKING_PROFILE') or profile
+
+# Change (or add) a profile
+def configure_blocking_profile(name, types=(), domains=()):
+    BLOCKING_PROFILES[name] = {'types': list(types), 'domains': list(domains)}
+
+def blocked_url_patterns(profile):
+    settings = BLOCKING_PROFILES[active_profile(profile)]
+    patterns = []
+    for kind in settings['types']:
+        for pattern in RESOURCE_PATTERNS[kind]:
+            patterns += [pattern, f"{pattern}?*"]  # with and without a query string
+    patterns += [f"*://*.{domain}/*" for domain in settings['domains']]
+    patterns += [f"*://{domain}/*" for domain in settings['domains']]
+    return patterns
+
+# Before the browser starts: turn on the performance log the stats are read from
+def blocking_options(options, profile):
+    if active_profile(profile) != 'none' and hasattr(options, 'KEY'):
+        vendor = options.KEY.split(':')[0]  # goog:chromeOptions / ms:edgeOptions
+        options.set_capability(f"{vendor}:loggingPrefs", {'performance': 'ALL'})
+    return options
+
+# After the browser starts: install the profile's URL blocklist
+def apply_blocking(driver, profile):
+    name = active_profile(profile)
+    driver.blocking_profile = name
+    if name == 'none' or not hasattr(driver, 'execute_cdp_cmd'):
+        return driver
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns(name)})
+    return driver
+
+# Add up what the browser downloaded and blocked since the last call (drains
+# its performance log). Used as the driver pool's on_release hook.
+def collect_blocking_stats(driver):
+    read_performance_log(driver)
+
+# Drain the browser's performance log into the stats and return its CDP
+# messages, for other readers of the same log (network_capture)
+def read_performance_log(driver):
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+    messages = [json.loads(entry['message'])['message'] for entry in entries]
+    name = getattr(driver, 'blocking_profile', None)
+    if name is not None and name != 'none':
+        _tally(name, messages)
+    return messages
+
+def _tally(name, messages):
+    transferred = requests = 0
+    blocked_types = {}
+    for message in messages:
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.loadingFinished':
+            transferred += params.get('encodedDataLength', 0)
+            requests += 1
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            kind = params.get('type', 'Other')
+            blocked_types[kind] = blocked_types.get(kind, 0) + 1
+    _add_stats(name, requests, transferred, blocked_types)
+
+def _add_stats(name, requests=0, transferred=0, blocked_types=None):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {'requests': 0, 'bytes_transferred': 0, 'blocked': 0,
+                                         'blocked_by_type': {}, 'estimated_bytes_saved': 0})
+        stats['requests'] += requests
+        stats['bytes_transferred'] += transferred
+        for kind, count in (blocked_types or {}).items():
+            stats['blocked'] += count
+            stats['blocked_by_type'][kind] = stats['blocked_by_type'].get(kind, 0) + count
+            stats['estimated_bytes_saved'] += count * TYPICAL_BYTES.get(kind, DEFAULT_TYPICAL_BYTES)
+
+# For engines that block requests themselves (Playwright routes); `kind` is a
+# CDP resource type name ("Image", "Font", ...)
+def count_blocked(profile, kind, count=1):
+    _add_stats(profile, blocked_types={kind: count})
+
+# {profile: {requests, bytes_transferred, blocked, blocked_by_type, estimated_bytes_saved}}
+def blocking_stats():
+    with _stats_lock:
+        return {name: {**stats, 'blocked_by_type': dict(stats['blocked_by_type'])} for name, stats in _stats.items()}
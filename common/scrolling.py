@@ -0,0 +1,46 @@
+from common.network_capture import scrape_api_records
+from common.waits import wait_for_more
+
+# Collects cards from an infinite-scroll page (Behance) in batches: one
+# execute_script returns the fields of every card not extracted yet (see
+# Extractor.extract_selenium(only_new=True)), then the page jumps straight to
+# its end and waits for the next batch to render. Cards are de-duplicated by
+# the extractor's key, so grids that re-render or recycle their nodes
+# (virtualised lists) don't add repeats. Stops at `max_items`, or after
+# `patience` scrolls in a row bring no new cards.
+SCROLL_TO_END_JS = """
+window.scrollTo(0, document.body.scrollHeight);
+return document.querySelectorAll(arguments[0]).length;
+"""
+
+def scrape_infinite_scroll(driver, extractor, max_items, url=None, patience=2):
+    item_selector = extractor.browser_spec()['item']
+    records = []
+    seen = set()
+    idle_scrolls = 0
+    while True:
+        new = 0
+        for record in extractor.extract_selenium(driver, only_new=True) or []:
+            key = extractor.key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            records.append(record)
+            new += 1
+            if len(records) >= max_items:
+                return records
+
+        idle_scrolls = 0 if new else idle_scrolls + 1
+        if idle_scrolls >= patience:
+            return records
+        count = driver.execute_script(SCROLL_TO_END_JS, item_selector)
+        wait_for_more(driver, item_selector, count, url=url)
+
+# The listing's records straight from the JSON its API calls returned when
+# they were captured (see network_capture.py), otherwise from the DOM by
+# scrolling as above
+def scrape_listing(driver, extractor, max_items, url=None, patience=2):
+    records = scrape_api_records(driver, extractor, max_items)
+    if records is None:
+        records = scrape_infinite_scroll(driver, extractor, max_items, url=url, patience=patience)
+    return records
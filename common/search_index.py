@@ -0,0 +1,378 @@
+import bisect
+import heapq
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# In-memory inverted index over every scraped deal title, so past scrapes can
+# be searched without downloading anything again. Two levels of postings:
+#   token   -> ids of the deals whose title contains that word
+#   trigram -> the vocabulary words containing that 3-character sequence
+# plus a sorted vocabulary for prefix lookups. A query word matches every
+# vocabulary word it is a substring of (the same rule as the old
+# `search_query.lower() in title.lower()` filter, per word); if none does, it
+# falls back to words within a small edit distance. Words are ANDed together.
+# The index is updated in place as pages are scraped. On disk it is a pickled
+# snapshot plus a log next to it ("<path>.log") that each scrape appends its
+# changed deals to; loading replays the log over the snapshot, and once the
+# log outgrows COMPACT_RATIO of the snapshot the whole index is re-pickled.
+# Several processes (the Streamlit apps, the watcher) share the files, so the
+# snapshot and log are only written, and read, under a lock file
+# ("<path>.lock"), and compaction re-pickles what is on disk (snapshot plus
+# the whole log, other processes' changes included), not one process's copy.
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'search_index.pkl')
+
+INDEX_VERSION = 1
+
+COMPACT_RATIO = 0.5
+
+# Prefix / substring expansions beyond this many vocabulary words are cut off,
+# so a one-letter query stays fast
+MAX_EXPANSION = 500
+
+# Most doc ids a search walks newest-first before intersecting postings instead
+SCAN_BUDGET = 5_000
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+def trigrams(token):
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Levenshtein distance, giving up as soon as it exceeds `limit`
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+# Edits allowed for a fuzzy match of a word of this length
+def max_edits(token):
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+# Exclusive lock on "<path>.lock" for the duration of the block
+@contextmanager
+def _file_lock(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = []         # doc id -> (product_url, title, store) or None once removed
+        self.doc_ids = {}      # product_url -> doc id
+        self.postings = {}     # token -> set of doc ids
+        self.store_postings = {}  # store -> set of doc ids
+        self.gram_postings = {}   # trigram -> set of tokens
+        self.vocabulary = []   # sorted tokens, for prefix lookups
+        self._pending = []     # (product_url, title, store) changes not yet logged; title None = removed
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        del state['_pending']
+        state['version'] = INDEX_VERSION
+        return state
+
+    def __setstate__(self, state):
+        if state.pop('version', None) != INDEX_VERSION:
+            raise ValueError("Search index was written by an incompatible version")
+        self.__dict__.update(state)
+        self._pending = []
+        self._lock = threading.RLock()
+
+    def _add_token(self, token, doc_id):
+        docs = self.postings.get(token)
+        if docs is None:
+            docs = self.postings[token] = set()
+            bisect.insort(self.vocabulary, token)
+            for gram in trigrams(token):
+                self.gram_postings.setdefault(gram, set()).add(token)
+        docs.add(doc_id)
+
+    def _remove_token(self, token, doc_id):
+        docs = self.postings[token]
+        docs.discard(doc_id)
+        if not docs:
+            del self.postings[token]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+            for gram in trigrams(token):
+                tokens = self.gram_postings[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self.gram_postings[gram]
+
+    # Add one deal, or re-index it if its title or store changed
+    def add(self, product_url, title, store=None):
+        with self._lock:
+            doc_id = self.doc_ids.get(product_url)
+            if doc_id is not None:
+                if self.docs[doc_id] == (product_url, title, store):
+                    return
+                self._unindex(doc_id)
+            else:
+                doc_id = len(self.docs)
+                self.docs.append(None)
+                self.doc_ids[product_url] = doc_id
+            self.docs[doc_id] = (product_url, title, store)
+            self._pending.append((product_url, title, store))
+            for token in set(tokenize(title)):
+                self._add_token(token, doc_id)
+            if store is not None:
+                self.store_postings.setdefault(store, set()).add(doc_id)
+
+    def _unindex(self, doc_id):
+        _, title, store = self.docs[doc_id]
+        for token in set(tokenize(title)):
+            self._remove_token(token, doc_id)
+        if store is not None:
+            self.store_postings[store].discard(doc_id)
+
+    def remove(self, product_url):
+        with self._lock:
+            doc_id = self.doc_ids.pop(product_url, None)
+            if doc_id is not None:
+                self._unindex(doc_id)
+                self.docs[doc_id] = None
+                self._pending.append((product_url, None, None))
+
+    # Index scraper records ('Title', 'Product URL', 'Store Name')
+    def add_deals(self, records, store=None):
+        count = 0
+        with self._lock:
+            for record in records:
+                product_url = record.get('Product URL')
+                if not product_url:
+                    continue
+                self.add(product_url, record.get('Title', ''), record.get('Store Name') or store)
+                count += 1
+        return count
+
+    # Vocabulary words the query word is a prefix of
+    def _prefixed(self, term):
+        start = bisect.bisect_left(self.vocabulary, term)
+        matches = []
+        for token in self.vocabulary[start:start + MAX_EXPANSION]:
+            if not token.startswith(term):
+                break
+            matches.append(token)
+        return matches
+
+    # Vocabulary words containing the query word (prefix lookup for short words,
+    # trigram intersection + check for longer ones)
+    def _containing(self, term):
+        if len(term) < 3:
+            return self._prefixed(term)
+        gram_sets = [self.gram_postings.get(gram) for gram in trigrams(term) if ' ' not in gram]
+        if not all(gram_sets):
+            return []
+        gram_sets.sort(key=len)
+        candidates = set.intersection(*gram_sets)
+        return [token for token in candidates if term in token][:MAX_EXPANSION]
+
+    # Vocabulary words within max_edits(term) edits of the query word
+    def _similar(self, term):
+        limit = max_edits(term)
+        if not limit:
+            return []
+        shared = Counter()
+        for gram in trigrams(term):
+            shared.update(self.gram_postings.get(gram, ()))
+        # A word within `limit` edits still shares most of its trigrams
+        needed = len(trigrams(term)) - 3 * limit
+        candidates = [token for token, count in shared.items() if count >= needed]
+        return [token for token in candidates if edit_distance(term, token, limit) <= limit]
+
+    # Deals whose titles contain every word of `query`, most recently indexed
+    # first, as scraper-style records. When the words are common enough that
+    # `limit` hits are expected within SCAN_BUDGET of the newest doc ids, those
+    # ids are simply walked and checked; otherwise the postings are intersected
+    # as sets, rarest word first.
+    def search(self, query, store=None, limit=50, fuzzy=True):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            groups = []  # per query word: the postings sets that satisfy it
+            for term in terms:
+                tokens = self._containing(term)
+                if not tokens and fuzzy:
+                    tokens = self._similar(term)
+                if not tokens:
+                    return []
+                groups.append([self.postings[token] for token in tokens])
+            if store is not None:
+                groups.append([self.store_postings.get(store, set())])
+            sizes = [sum(map(len, sets)) for sets in groups]
+
+            # Fraction of all deals expected to match, treating words as independent
+            density = 1.0
+            for size in sizes:
+                density *= min(1.0, size / max(1, len(self.doc_ids)))
+            if density * SCAN_BUDGET >= limit:
+                hits = []
+                newest = len(self.docs) - 1
+                for doc_id in range(newest, max(-1, newest - SCAN_BUDGET), -1):
+                    if all(any(doc_id in docs for docs in sets) for sets in groups):
+                        hits.append(doc_id)
+                        if len(hits) == limit:
+                            return [self._record(doc_id) for doc_id in hits]
+
+            order = sorted(range(len(groups)), key=sizes.__getitem__)
+            first = groups[order[0]]
+            doc_ids = first[0] if len(first) == 1 else set().union(*first)
+            for index in order[1:]:
+                sets = groups[index]
+                if len(sets) == 1:
+                    doc_ids = doc_ids & sets[0]
+                else:
+                    doc_ids = set().union(*(doc_ids & docs for docs in sets))
+            return [self._record(doc_id) for doc_id in heapq.nlargest(limit, doc_ids)]
+
+    def _record(self, doc_id):
+        product_url, title, store = self.docs[doc_id]
+        return {'Title': title, 'Product URL': product_url, 'Store Name': store}
+
+    def _apply(self, changes):
+        for product_url, title, store in changes:
+            if title is None:
+                self.remove(product_url)
+            else:
+                self.add(product_url, title, store)
+
+    # Pickle the whole index to `path` (write to a temp file, then swap it in)
+    # and start a new, empty log. The caller holds the file lock.
+    def _write_snapshot(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # A crash before this only leaves changes the snapshot already has,
+        # and replaying those is a no-op
+        if os.path.exists(f"{path}.log"):
+            os.remove(f"{path}.log")
+        self._pending = []
+
+    # Replace the snapshot with this index, dropping the log. Only for an
+    # index that holds every deal (e.g. one rebuilt from the deal store).
+    def save(self, path=DEFAULT_INDEX_PATH):
+        with self._lock, _file_lock(path):
+            self._write_snapshot(path)
+
+    # Append the changes since the last save/log to `path`'s log. Once the log
+    # has grown past COMPACT_RATIO of the snapshot, the snapshot and log on
+    # disk are merged into a new snapshot, which this index then takes over.
+    def save_changes(self, path=DEFAULT_INDEX_PATH):
+        log_path = f"{path}.log"
+        with self._lock, _file_lock(path):
+            if not os.path.exists(path):
+                return self._write_snapshot(path)
+            if not self._pending:
+                return
+            with open(log_path, 'ab') as file:
+                pickle.dump(self._pending, file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._pending = []
+            if os.path.getsize(log_path) > COMPACT_RATIO * os.path.getsize(path):
+                try:
+                    merged = self._read(path)
+                except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError) as e:
+                    print(f"Error compacting the search index, keeping its log: {e}")
+                    return
+                merged._write_snapshot(path)
+                for name in ('docs', 'doc_ids', 'postings', 'store_postings', 'gram_postings', 'vocabulary'):
+                    setattr(self, name, getattr(merged, name))
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with _file_lock(path):
+            return cls._read(path)
+
+    # The snapshot with its log replayed; the caller holds the file lock
+    @classmethod
+    def _read(cls, path):
+        with open(path, 'rb') as file:
+            index = pickle.load(file)
+        if not isinstance(index, cls):
+            raise ValueError(f"{path} does not hold a search index")
+        try:
+            with open(f"{path}.log", 'rb') as file:
+                while True:
+                    index._apply(pickle.load(file))
+        except FileNotFoundError:
+            pass
+        except (EOFError, ValueError, pickle.UnpicklingError):
+            pass  # end of the log, or an append cut short by a crash
+        index._pending = []
+        return index
+
+    # A fresh index over every deal already in a DealStore
+    @classmethod
+    def from_deal_store(cls, deal_store):
+        index = cls()
+        for row in deal_store.iter_titles():
+            index.add(row['product_url'], row['title'], row['store'])
+        return index
+
+_default_index = None
+_default_lock = threading.Lock()
+
+def _index_path():
+    return os.getenv('SEARCH_INDEX_PATH', DEFAULT_INDEX_PATH)
+
+# The process-wide search index (SEARCH_INDEX_PATH overrides the location).
+# Loaded from disk, or rebuilt from the deal store (and saved) the first time.
+def get_search_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = SearchIndex.load(_index_path())
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError):
+                from common.deal_store import get_deal_store
+                _default_index = SearchIndex.from_deal_store(get_deal_store())
+                _default_index.save(_index_path())
+        return _default_index
+
+# Add freshly scraped records to the shared index and log the changes to disk
+def index_deals(records, store=None):
+    index = get_search_index()
+    count = index.add_deals(records, store=store)
+    index.save_changes(_index_path())
+    return count
@@ -0,0 +1,120 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+from array import array
+
+# Persistent "have we seen this key before" sets for the watchers. Keys
+# (Product URLs) are never stored, only hashes:
+#   SeenSet      exact set of 64-bit hashes, 8 bytes per key on disk
+#   BloomFilter  fixed-size bit array for very large catalogues; a few bits
+#                per key, at the price of `error_rate` false "seen" answers
+# Both expose add(key) -> True if the key was new, `in`, len() and save().
+# Each has its own default file, and each file starts with a magic header so
+# one kind is never read as the other.
+DEFAULT_SEEN_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'seen_urls.bin')
+DEFAULT_BLOOM_PATH = os.path.join(os.path.expanduser('~'), '.deal_scraper_cache', 'seen_urls.bloom')
+
+SEEN_MAGIC = b'SEN1'
+BLOOM_MAGIC = b'BLM1'
+BLOOM_HEADER = struct.Struct('<4sQQI')  # magic, bits, keys added, hash count
+
+def _atomic_write(path, *chunks):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(tmp_path, path)
+
+class SeenSet:
+    def __init__(self, path=None):
+        self.path = path
+        self._hashes = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                data = file.read()
+            if data[:len(SEEN_MAGIC)] != SEEN_MAGIC or (len(data) - len(SEEN_MAGIC)) % 8:
+                raise ValueError(f"{path} is not a seen set file")
+            hashes = array('Q')
+            hashes.frombytes(data[len(SEEN_MAGIC):])
+            self._hashes = set(hashes)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def __contains__(self, key):
+        return self._hash(key) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, key):
+        digest = self._hash(key)
+        with self._lock:
+            if digest in self._hashes:
+                return False
+            self._hashes.add(digest)
+            return True
+
+    def save(self, path=None):
+        with self._lock:
+            data = array('Q', self._hashes).tobytes()
+        _atomic_write(path or self.path, SEEN_MAGIC, data)
+
+class BloomFilter:
+    def __init__(self, path=None, capacity=10_000_000, error_rate=0.001):
+        self.path = path
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                header = file.read(BLOOM_HEADER.size)
+                if len(header) < BLOOM_HEADER.size or header[:len(BLOOM_MAGIC)] != BLOOM_MAGIC:
+                    raise ValueError(f"{path} is not a Bloom filter file")
+                _, self.size, self.count, self.hash_count = BLOOM_HEADER.unpack(header)
+                self.bits = bytearray(file.read())
+            return
+        # Optimal bit count and hash count for `capacity` keys at `error_rate`
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    # k bit positions from one 128-bit digest (double hashing)
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, key):
+        new = False
+        with self._lock:
+            for pos in self._positions(key):
+                mask = 1 << (pos & 7)
+                if not self.bits[pos >> 3] & mask:
+                    self.bits[pos >> 3] |= mask
+                    new = True
+            if new:
+                self.count += 1
+        return new
+
+    def save(self, path=None):
+        with self._lock:
+            header = BLOOM_HEADER.pack(BLOOM_MAGIC, self.size, self.count, self.hash_count)
+            data = bytes(self.bits)
+        _atomic_write(path or self.path, header, data)
+
+def open_seen_set(path=None, bloom=False, capacity=10_000_000, error_rate=0.001):
+    if bloom:
+        return BloomFilter(path or DEFAULT_BLOOM_PATH, capacity=capacity, error_rate=error_rate)
+    return SeenSet(path or DEFAULT_SEEN_PATH)
@@ -0,0 +1,35 @@
+import os
+import threading
+
+# Sends the scrapers' hard-coded site URLs somewhere else, e.g. to the local
+# fixture server in benchmarks/ instead of the live sites:
+#   SCRAPER_URL_REWRITE="https://dealsheaven.in=http://127.0.0.1:8765/dealsheaven;https://publiclibraries.com=http://127.0.0.1:8765/publiclibraries"
+# Every request made through http_get(), polite_get() or Task1's aiohttp
+# crawler is rewritten; pages keep their original links, so the scrapers'
+# selectors and URL handling are unchanged. The longest matching prefix wins.
+_rewrites = {}
+_lock = threading.Lock()
+
+def _parse(value):
+    rewrites = {}
+    for pair in (value or '').split(';'):
+        if '=' in pair:
+            prefix, target = pair.split('=', 1)
+            rewrites[prefix.strip()] = target.strip()
+    return rewrites
+
+# Replace the rewrite table ({original prefix: replacement prefix}); None reloads the environment
+def set_url_rewrites(rewrites=None):
+    global _rewrites
+    with _lock:
+        _rewrites = _parse(os.getenv('SCRAPER_URL_REWRITE')) if rewrites is None else dict(rewrites)
+
+def rewrite_url(url):
+    if not _rewrites:
+        return url
+    for prefix in sorted(_rewrites, key=len, reverse=True):
+        if url.startswith(prefix):
+            return _rewrites[prefix] + url[len(prefix):]
+    return url
+
+set_url_rewrites()
@@ -0,0 +1,166 @@
+import time
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Waits for a page to be ready instead of a fixed time.sleep() after every
+# driver.get() or scroll. A page counts as settled once it is all of:
+#   - loaded: document.readyState is "complete"
+#   - stable count: `selector` matches at least `min_count` elements and the
+#     count hasn't changed for `stable_ms`
+#   - DOM quiet: no nodes added/removed/retexted for `quiet_ms` (MutationObserver)
+#   - network idle: no fetch/XHR in flight and no new resource loads for
+#     `network_idle_ms`
+# A signal whose setting is None is skipped. Everything is read in one
+# execute_script round trip per poll. Server-rendered pages only need the
+# first two; the single-page apps (Behance) need all four.
+WAIT_PROFILES = {
+    'dealsheaven.in': {'timeout': 10.0, 'poll': 0.1, 'stable_ms': 150, 'quiet_ms': None, 'network_idle_ms': None},
+    'publiclibraries.com': {'timeout': 10.0, 'poll': 0.1, 'stable_ms': 150, 'quiet_ms': None, 'network_idle_ms': None},
+    'behance.net': {'timeout': 15.0, 'poll': 0.1, 'stable_ms': 400, 'quiet_ms': 400, 'network_idle_ms': 500},
+}
+DEFAULT_PROFILE = {'timeout': 10.0, 'poll': 0.1, 'stable_ms': 300, 'quiet_ms': 300, 'network_idle_ms': 500}
+
+# Installs the observers once per document and reports the page state.
+# `fresh` is true on the first call in a new document (the page was replaced).
+STATUS_JS = """
+var fresh = !window.__scrapeWait;
+if (fresh) {
+    var w = window.__scrapeWait = {lastMutation: Date.now(), lastNetwork: Date.now(), inflight: 0, resources: 0};
+    var touch = function () { w.lastNetwork = Date.now(); };
+    new MutationObserver(function () { w.lastMutation = Date.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        w.inflight++; touch();
+        this.addEventListener('loadend', function () { w.inflight--; touch(); });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            w.inflight++; touch();
+            var done = function () { w.inflight--; touch(); };
+            return fetch.apply(this, arguments).then(
+                function (response) { done(); return response; },
+                function (error) { done(); throw error; });
+        };
+    }
+}
+var w = window.__scrapeWait;
+var resources = performance.getEntriesByType('resource').length;
+if (resources !== w.resources) { w.resources = resources; w.lastNetwork = Date.now(); }
+var now = Date.now();
+return {
+    fresh: fresh,
+    ready: document.readyState,
+    count: arguments[0] ? document.querySelectorAll(arguments[0]).length : 0,
+    inflight: w.inflight,
+    sinceMutation: now - w.lastMutation,
+    sinceNetwork: now - w.lastNetwork
+};
+"""
+
+# Change (or add) the wait settings of one site
+def configure_profile(site, **settings):
+    WAIT_PROFILES[site] = {**WAIT_PROFILES.get(site, DEFAULT_PROFILE), **settings}
+
+# Settings for a URL: its host's profile or the closest configured parent domain's
+def profile_for(url=None, **overrides):
+    site = (urlsplit(url).hostname or '').lower() if url else ''
+    while site and site not in WAIT_PROFILES:
+        site = site.partition('.')[2]
+    profile = {**WAIT_PROFILES.get(site, DEFAULT_PROFILE)}
+    profile.update((key, value) for key, value in overrides.items() if key in DEFAULT_PROFILE)
+    return profile
+
+# WebDriverWait condition; keeps the count history between polls
+class _Settled:
+    def __init__(self, selector, min_count, more_than, stable_ms, quiet_ms, network_idle_ms, after_action):
+        self.selector = selector
+        self.min_count = min_count
+        self.more_than = more_than
+        self.stable_ms = stable_ms or 0
+        self.quiet_ms = quiet_ms
+        self.network_idle_ms = network_idle_ms
+        self.changed = not after_action
+        self.started = time.monotonic()
+        self.count = None
+        self.count_since = self.started
+        self.status = None
+
+    def __call__(self, driver):
+        try:
+            status = driver.execute_script(STATUS_JS, self.selector)
+        except WebDriverException:
+            return False  # mid-navigation; try again on the next poll
+        now = time.monotonic()
+        elapsed_ms = (now - self.started) * 1000
+        self.status = status
+        if status['count'] != self.count:
+            self.count, self.count_since = status['count'], now
+
+        # After a click or submit the old page may still look settled;
+        # wait until something has happened since the action
+        if not self.changed:
+            self.changed = (status['fresh'] or status['sinceMutation'] < elapsed_ms
+                            or status['sinceNetwork'] < elapsed_ms)
+            if not self.changed:
+                return False
+        if status['ready'] != 'complete':
+            return False
+
+        dom_quiet = self.quiet_ms is None or status['sinceMutation'] >= self.quiet_ms
+        network_idle = self.network_idle_ms is None or (
+            status['inflight'] == 0 and status['sinceNetwork'] >= self.network_idle_ms)
+        if not (dom_quiet and network_idle):
+            return False
+        if self.selector is None:
+            return status
+        if (now - self.count_since) * 1000 < self.stable_ms or self.count < self.min_count:
+            return False
+        if self.more_than is not None and self.count <= self.more_than:
+            # Nothing new, and nothing left loading: the end of an infinite scroll
+            quiet_for = max(self.stable_ms, self.quiet_ms or 0, self.network_idle_ms or 0)
+            return status if elapsed_ms >= quiet_for else False
+        return status
+
+# Wait until the page has settled (see the top of this file). Returns the last
+# page status (a dict with 'count'), or None if it timed out — callers carry on
+# with whatever is there, as they did after a fixed sleep.
+def wait_until_settled(driver, selector=None, min_count=1, more_than=None, url=None, after_action=False, **overrides):
+    profile = profile_for(url, **overrides)
+    condition = _Settled(selector, min_count, more_than, profile['stable_ms'], profile['quiet_ms'],
+                         profile['network_idle_ms'], after_action)
+    try:
+        return WebDriverWait(driver, profile['timeout'], poll_frequency=profile['poll']).until(condition)
+    except TimeoutException:
+        return None
+
+# After driver.get()/polite_get(): wait for the page (and `selector`, if given) to be ready
+def wait_for_page(driver, selector=None, url=None, min_count=1, **overrides):
+    return wait_until_settled(driver, selector, min_count=min_count, url=url, **overrides)
+
+# After a scroll: wait until more than `count` elements match `selector`, or the
+# page has gone quiet without loading any. Returns the new count.
+def wait_for_more(driver, selector, count, url=None, **overrides):
+    status = wait_until_settled(driver, selector, min_count=0, more_than=count, url=url, **overrides)
+    return status['count'] if status else len(driver.find_elements(By.CSS_SELECTOR, selector))
+
+# The individual signals, for callers that only need one of them
+def wait_for_stable_count(driver, selector, min_count=1, url=None, **overrides):
+    overrides.update(quiet_ms=None, network_idle_ms=None)
+    status = wait_until_settled(driver, selector, min_count=min_count, url=url, **overrides)
+    return status['count'] if status else None
+
+def wait_for_network_idle(driver, url=None, **overrides):
+    overrides.setdefault('network_idle_ms', profile_for(url)['network_idle_ms'] or DEFAULT_PROFILE['network_idle_ms'])
+    overrides['quiet_ms'] = None
+    return wait_until_settled(driver, url=url, **overrides) is not None
+
+def wait_for_dom_quiet(driver, url=None, **overrides):
+    overrides.setdefault('quiet_ms', profile_for(url)['quiet_ms'] or DEFAULT_PROFILE['quiet_ms'])
+    overrides['network_idle_ms'] = None
+    return wait_until_settled(driver, url=url, **overrides) is not None
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scrapers import `common` from the repository root and the Task9 modules
+# by their bare names, the same way the apps do when run from their folders
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'Milestone_3', 'Task9'))
@@ -0,0 +1,64 @@
+import pytest
+
+import chunking
+from chunking import iter_sections, split_text_by_tokens, token_budget
+
+# One token per whitespace-separated word, so budgets are easy to count
+class WordEncoder:
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+@pytest.fixture(autouse=True)
+def words(monkeypatch):
+    monkeypatch.setattr(chunking, 'get_encoder', lambda model='gpt-4': WordEncoder())
+
+def _record(number, words=5):
+    return f"### Product {number}\nPrice {number}\n" + ' '.join(['text'] * words)
+
+def _tokens(chunk):
+    return len(chunk.split())
+
+def test_sections_start_at_headings_and_rules():
+    text = "intro\n\n# One\na\n\nb\n---\nc"
+    assert list(iter_sections(text.splitlines(True))) == [['intro'], ['# One\na', 'b'], ['---\nc']]
+
+def test_records_are_never_cut_in_half():
+    text = '\n\n'.join(_record(number) for number in range(10))
+    chunks = split_text_by_tokens(text, 25, overlap=0)
+    assert len(chunks) > 1
+    assert all(_tokens(chunk) <= 25 for chunk in chunks)
+    for number in range(10):
+        assert sum(_record(number) in chunk for chunk in chunks) == 1
+    assert '\n\n'.join(chunks) == text
+
+def test_overlap_repeats_the_last_records():
+    text = '\n\n'.join(_record(number) for number in range(10))
+    chunks = split_text_by_tokens(text, 25, overlap=11)
+    assert all(_tokens(chunk) <= 25 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last = previous.split('\n\n')[-1]
+        assert chunk.startswith(last)
+
+def test_oversized_sections_split_by_block_line_and_slice():
+    table = '\n'.join(f'| row {number} | a b c |' for number in range(20))
+    long_line = ' '.join(['word'] * 50)
+    text = f"### Big\n\n{table}\n\n{long_line}"
+    chunks = split_text_by_tokens(text, 20, overlap=0)
+    assert all(_tokens(chunk) <= 20 for chunk in chunks)
+    # Table rows stay whole
+    assert all(line.startswith('| row') and line.endswith('|')
+               for chunk in chunks for line in chunk.split('\n') if line.startswith('| row'))
+    assert sum(chunk.count('word') for chunk in chunks) == 50
+
+def test_budgets_per_model():
+    assert token_budget('gemini-flash') > token_budget('gpt-4') == token_budget('unknown')
+
+def test_real_tokenizer_budget(monkeypatch):
+    pytest.importorskip('tiktoken')
+    monkeypatch.undo()
+    text = '\n\n'.join(_record(number, words=40) for number in range(50))
+    chunks = split_text_by_tokens(text, 200, overlap=0)
+    assert all(chunking.count_tokens(chunk) <= 200 for chunk in chunks)
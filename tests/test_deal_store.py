@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from common.deal_store import DealStore
+
+@pytest.fixture
+def store():
+    deal_store = DealStore(':memory:')
+    yield deal_store
+    deal_store.close()
+
+def _deal(url, special_price, price='₹1,000', discount='50% off', title='Phone', store='Amazon'):
+    return {'Product URL': url, 'Store Name': store, 'Title': title, 'Discount': discount,
+            'Price': price, 'Special Price': special_price, 'Image URL': None}
+
+def test_upsert_stores_typed_prices_and_skips_records_without_url(store):
+    count = store.upsert_deals([_deal('u1', '₹1,299.50'), _deal('', '₹1'), {'Title': 'no url'}], seen_at=100)
+    assert count == 1
+    [row] = store.deals_in_store('Amazon')
+    assert row['special_price_value'] == 1299.5
+    assert row['discount_pct'] == 50
+    assert row['first_seen'] == row['last_seen'] == 100
+
+def test_upsert_updates_in_place_and_records_only_price_changes(store):
+    store.upsert_deals([_deal('u1', '₹500')], seen_at=100)
+    store.upsert_deals([_deal('u1', '₹500', title='Phone 2')], seen_at=200)
+    store.upsert_deals([_deal('u1', '₹400')], seen_at=300)
+    [row] = store.deals_in_store('Amazon')
+    assert (row['title'], row['first_seen'], row['last_seen']) == ('Phone', 100, 300)
+    assert [entry['special_price_value'] for entry in store.price_history('u1')] == [500, 400]
+
+def test_store_name_defaults_to_the_scraped_store(store):
+    store.upsert_deals([_deal('u1', '₹10', store=None)], store='Flipkart')
+    assert len(store.deals_in_store('Flipkart')) == 1
+
+def test_queries_filter_and_sort(store):
+    store.upsert_deals([_deal('a', '₹300', discount='10% off'), _deal('b', '₹100', discount='70% off'),
+                        _deal('c', '₹200', discount='40% off', store='Flipkart')], seen_at=100)
+    assert [row['product_url'] for row in store.deals_in_store('Amazon')] == ['b', 'a']
+    assert [row['product_url'] for row in store.deals_in_store('Amazon', max_price=150)] == ['b']
+    assert [row['product_url'] for row in store.top_discounts(min_discount=30)] == ['b', 'c']
+
+def test_price_drops_since_compares_with_the_last_price_before(store):
+    store.upsert_deals([_deal('a', '₹300'), _deal('b', '₹100'), _deal('c', '₹50')], seen_at=100)
+    store.upsert_deals([_deal('a', '₹200'), _deal('b', '₹150')], seen_at=200)
+    drops = store.price_drops_since(datetime.fromtimestamp(150))
+    assert [(row['product_url'], row['previous_price']) for row in drops] == [('a', 300)]
+    assert store.price_drops_since(150, store='Flipkart') == []
@@ -0,0 +1,166 @@
+import threading
+
+import pytest
+
+from common.driver_pool import DriverPool
+
+# Enough of a Selenium WebDriver for the pool: windows, cookies, storage and
+# a health check that can be made to fail
+class FakeDriver:
+    def __init__(self):
+        self.url = 'about:blank'
+        self.windows = {'main': 'about:blank'}
+        self.current = 'main'
+        self.calls = []
+        self.healthy = True
+        self.quit_count = 0
+        self.switch_to = self
+
+    def get(self, url):
+        self.url = self.windows[self.current] = url
+
+    @property
+    def current_url(self):
+        return self.windows[self.current]
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def window(self, handle):
+        self.current = handle
+
+    def open_window(self, handle, url):
+        self.windows[handle] = url
+
+    def close(self):
+        del self.windows[self.current]
+
+    def execute_script(self, script, *args):
+        if not self.healthy:
+            raise RuntimeError("browser crashed")
+        if script == "return 1":
+            return 1
+        self.calls.append(('script', script))
+
+    def delete_all_cookies(self):
+        self.calls.append(('delete_all_cookies',))
+
+    def quit(self):
+        self.quit_count += 1
+
+# Edge/Chrome: storage is cleared per origin over CDP
+class ChromiumDriver(FakeDriver):
+    def execute_cdp_cmd(self, command, params):
+        self.calls.append((command, params.get('origin')))
+
+@pytest.fixture
+def made():
+    return []
+
+@pytest.fixture
+def pool(made):
+    def factory():
+        made.append(ChromiumDriver())
+        return made[-1]
+    pool = DriverPool(factory, size=2, max_pages=3, max_rss_mb=0)
+    yield pool
+    pool.close()
+
+def test_released_drivers_are_reused(pool, made):
+    with pool.driver() as driver:
+        driver.get('https://shop.example.com/')
+    with pool.driver() as again:
+        assert again is driver
+
+    assert len(made) == 1
+    assert pool.stats() == {'size': 2, 'idle': 1, 'busy': 0, 'created': 1, 'reused': 1, 'recycled': 0}
+
+def test_release_clears_cookies_and_every_visited_origin(pool, made):
+    with pool.driver() as driver:
+        driver.get('https://shop.example.com/deals')
+        driver.get('https://cdn.example.com:8443/app.js')
+    browser = made[0]
+
+    assert browser.calls == [('Network.clearBrowserCookies', None),
+                             ('Storage.clearDataForOrigin', 'https://cdn.example.com:8443'),
+                             ('Storage.clearDataForOrigin', 'https://shop.example.com')]
+    assert browser.url == 'about:blank' and not driver.origins
+
+def test_release_closes_extra_windows_and_clears_where_they_led(pool, made):
+    with pool.driver() as driver:
+        driver.get('https://shop.example.com/')
+        made[0].open_window('popup', 'https://pay.example.com/checkout')
+
+    assert made[0].window_handles == ['main']
+    assert ('Storage.clearDataForOrigin', 'https://pay.example.com') in made[0].calls
+
+def test_browsers_without_cdp_clear_cookies_and_storage_by_script():
+    browser = FakeDriver()
+    pool = DriverPool(lambda: browser, size=1, max_rss_mb=0)
+    with pool.driver() as driver:
+        driver.get('https://shop.example.com/')
+
+    assert browser.calls[0] == ('delete_all_cookies',)
+    assert 'localStorage.clear()' in browser.calls[1][1]
+    pool.close()
+
+def test_drivers_are_replaced_after_max_pages(pool, made):
+    for _ in range(2):
+        with pool.driver() as driver:
+            for page in range(3):
+                driver.get(f"https://shop.example.com/?page={page}")
+
+    assert len(made) == 2 and made[0].quit_count == 1
+    assert pool.stats()['recycled'] == 2
+
+def test_unhealthy_idle_drivers_are_replaced(pool, made):
+    with pool.driver():
+        pass
+    made[0].healthy = False
+    with pool.driver() as driver:
+        assert driver.webdriver is made[1]
+
+    assert made[0].quit_count == 1
+    assert pool.stats()['created'] == 2 and pool.stats()['recycled'] == 1
+
+def test_a_failed_reset_retires_the_driver(pool, made):
+    with pool.driver() as driver:
+        made[0].windows.clear()  # the browser lost every window
+
+    assert made[0].quit_count == 1 and pool.stats()['idle'] == 0
+
+def test_acquire_times_out_when_every_driver_is_busy(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    pool.release(first)
+    assert pool.acquire(timeout=0.05) is first
+    pool.release(first)
+    pool.release(second)
+
+def test_a_waiting_acquire_gets_the_released_driver(pool):
+    first, second = pool.acquire(), pool.acquire()
+    threading.Timer(0.05, pool.release, [first]).start()
+    assert pool.acquire(timeout=5) is first
+
+def test_close_quits_idle_drivers_and_later_releases(pool, made):
+    busy = pool.acquire()
+    with pool.driver():
+        pass
+    pool.close()
+    assert [browser.quit_count for browser in made] == [0, 1]
+
+    pool.release(busy)
+    assert made[0].quit_count == 1
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+def test_a_failing_factory_frees_its_place(made):
+    def factory():
+        raise RuntimeError("no browser")
+    pool = DriverPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool.stats()['busy'] == 0
+    pool.close()
@@ -0,0 +1,68 @@
+from bs4 import BeautifulSoup
+
+from common.extractors import Extractor, load_extractor
+
+def _soup(html):
+    return BeautifulSoup(html, 'html.parser')
+
+DEALS = """
+<div class="product-item-detail">
+  <a href="/deal/1"><img src="/1.jpg"></a>
+  <div class="discount">50% off</div>
+  <h3>Phone</h3>
+  <p class="price">₹1,000</p>
+  <p class="spacail-price">₹500</p>
+</div>
+<div class="product-item-detail">
+  <a name="top"></a><a href="/deal/2"><img src="/2.jpg"></a>
+  <div class="discount">10% off</div>
+  <h3>Case</h3>
+  <span class="price">₹100</span>
+  <p class="spacail-price">₹90</p>
+</div>
+<div class="product-item-detail"><h3>No price</h3></div>
+"""
+
+def test_dealsheaven_cards():
+    records = load_extractor('dealsheaven_products').extract(_soup(DEALS))
+    assert records == [
+        {'Title': 'Phone', 'Product URL': '/deal/1', 'Discount': '50% off', 'Price': '₹1,000',
+         'Special Price': '₹500', 'Image URL': '/1.jpg'},
+        # An <a> without href is skipped, and the price need not be a <p>
+        {'Title': 'Case', 'Product URL': '/deal/2', 'Discount': '10% off', 'Price': '₹100',
+         'Special Price': '₹90', 'Image URL': '/2.jpg'},
+    ]
+
+def test_library_rows_by_cell_inside_the_scope():
+    html = """<table id="other"><tr><td>x</td><td>x</td><td>x</td><td>x</td><td>x</td></tr></table>
+    <table id="libraries">
+      <tr><th>City</th></tr>
+      <tr><td> Austin </td><td>Central</td><td>710 W Cesar</td><td>78701</td><td>512</td></tr>
+    </table>"""
+    extractor = load_extractor('publiclibraries_libraries')
+    assert extractor.extract(_soup(html)) == [
+        {'City': 'Austin', 'Library Name': 'Central', 'Address': '710 W Cesar', 'Zip Code': '78701', 'Phone': '512'}]
+    assert extractor.extract(_soup('<table id="x"></table>')) is None
+
+def test_inside_index_and_optional_fields():
+    html = """<div class="Cover-cover-gDM">
+      <span>outside</span>
+      <div class="Title-title-lpJ">Poster</div><div class="Owners-overflowText-C9U">Ana</div>
+      <div class="ProjectCover-stats-QLg"><span>12</span><span>340</span></div>
+    </div>"""
+    extractor = load_extractor('behance_covers')
+    [record] = extractor.extract(_soup(html))
+    assert record == {'Title': 'Poster', 'Owner': 'Ana', 'Likes': '12', 'Views': '340', 'Project URL': None}
+    assert extractor.key(record) == (None, 'Poster', 'Ana')
+
+def test_text_modes():
+    config = {'item': {'tag': 'li'}, 'fields': {'Strip': {'tag': 'b', 'text': 'strip'},
+                                                'Trim': {'tag': 'i', 'text': 'trim'}}}
+    [record] = Extractor(config).extract(_soup('<li><b> a <u>b</u> </b><i> a <u>b</u> </i></li>'))
+    assert record == {'Strip': 'ab', 'Trim': 'a b'}
+
+def test_browser_spec_matches_the_config():
+    spec = load_extractor('dealsheaven_products').browser_spec()
+    assert spec['item'] == 'div.product-item-detail'
+    price = next(field for field in spec['fields'] if field['name'] == 'Price')
+    assert price['tag'] == '' and price['class'] == 'price' and price['required']
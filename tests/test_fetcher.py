@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from common.fetcher import fan_out_pages, fetch_pages_in_order
+
+# fetch_page for a store whose pages 1..last hold [page], later pages []; it
+# records every call and answers later pages first (the highest page sleeps least)
+def _pages(last, calls, delay=0.01):
+    def fetch_page(page):
+        calls.append(page)
+        time.sleep(delay * (10 - page % 10))
+        return [page] if page <= last else []
+    return fetch_page
+
+def test_pages_come_back_in_order():
+    calls = []
+    results = list(fetch_pages_in_order(_pages(20, calls), range(1, 9), workers=4, initializer=lambda: None))
+    assert results == [(page, [page]) for page in range(1, 9)]
+    assert sorted(calls) == list(range(1, 9))
+
+def test_stream_stops_at_the_first_empty_page():
+    calls = []
+    results = list(fetch_pages_in_order(_pages(3, calls), range(1, 50), workers=3, initializer=lambda: None))
+    assert results == [(1, [1]), (2, [2]), (3, [3]), (4, [])]
+    # Never more than `workers` pages ahead of the consumer
+    assert max(calls) <= 4 + 2
+
+def test_in_flight_pages_are_discarded_and_queued_ones_never_run():
+    release = threading.Event()
+    calls = []
+    def fetch_page(page):
+        calls.append(page)
+        if page > 1:
+            release.wait(5)
+            return [page]
+        return []
+    stream = fetch_pages_in_order(fetch_page, range(1, 10), workers=2, initializer=lambda: None)
+    assert list(stream) == [(1, [])]
+    release.set()
+    time.sleep(0.05)
+    # Page 2 was in flight (or skipped if it hadn't started); page 3 on never ran
+    assert 1 in calls and set(calls) <= {1, 2}
+
+def test_closing_the_stream_early_stops_fetching():
+    calls = []
+    stream = fetch_pages_in_order(_pages(100, calls, delay=0), range(1, 100), workers=2, initializer=lambda: None)
+    assert next(stream) == (1, [1])
+    stream.close()
+    time.sleep(0.05)
+    assert max(calls) <= 3
+
+def test_a_failed_page_raises_in_its_turn():
+    def fetch_page(page):
+        if page == 3:
+            raise ValueError('page 3 failed')
+        if page == 5:
+            raise AssertionError('past the failure, never seen')
+        return [page]
+    seen = []
+    with pytest.raises(ValueError):
+        for page, records in fetch_pages_in_order(fetch_page, range(1, 10), workers=4, initializer=lambda: None):
+            seen.append(page)
+    assert seen == [1, 2]
+
+def test_worker_threads_run_the_initializer():
+    names = set()
+    def fetch_page(page):
+        names.add(threading.current_thread().tagged)
+        return [page]
+    initializer = lambda: setattr(threading.current_thread(), 'tagged', True)
+    list(fetch_pages_in_order(fetch_page, range(1, 5), workers=2, initializer=initializer))
+    assert names == {True}
+
+# A catalogue of stores, {key: number of non-empty pages}; probes of earlier
+# stores answer last, and every call is recorded as (key, page)
+def _catalogue(sizes, calls, last_page=None):
+    lock = threading.Lock()
+    def probe(key):
+        with lock:
+            calls.append((key, 1))
+        time.sleep(0.01 * (len(sizes) - list(sizes).index(key)))
+        if not sizes[key]:
+            return {'products': [], 'last_page': 1}
+        return {'products': [(key, 1)], 'last_page': last_page or sizes[key] + 1}
+    def fetch_page(key, page):
+        with lock:
+            calls.append((key, page))
+        return [(key, page)] if page <= sizes[key] else []
+    return probe, fetch_page
+
+def test_fan_out_merges_in_key_and_page_order():
+    calls = []
+    probe, fetch_page = _catalogue({'a': 3, 'b': 1, 'c': 0, 'd': 2}, calls)
+    merged, truncated = fan_out_pages(['a', 'b', 'c', 'd'], probe, fetch_page, workers=4, initializer=lambda: None)
+    assert merged == {'a': [('a', 1), ('a', 2), ('a', 3)], 'b': [('b', 1)], 'd': [('d', 1), ('d', 2)]}
+    assert list(merged) == ['a', 'b', 'd'] and not truncated
+
+def test_fan_out_stops_each_store_at_its_first_empty_page():
+    calls = []
+    # The pagination claims 10 pages but store a only has 2
+    probe, fetch_page = _catalogue({'a': 2}, calls, last_page=10)
+    merged, _ = fan_out_pages(['a'], probe, fetch_page, workers=1, initializer=lambda: None)
+    assert merged == {'a': [('a', 1), ('a', 2)]}
+    # With one worker the pages run in order, and the rest are skipped
+    assert calls == [('a', 1), ('a', 2), ('a', 3)]
+
+def test_fan_out_shares_one_request_budget():
+    calls = []
+    probe, fetch_page = _catalogue({'a': 5, 'b': 5, 'c': 5}, calls)
+    merged, truncated = fan_out_pages(['a', 'b', 'c'], probe, fetch_page, workers=4, max_requests=7,
+                                      initializer=lambda: None)
+    assert truncated and len(calls) == 7
+    assert set(merged) == {'a', 'b', 'c'}
+    # Whatever each store got is a run of its first pages
+    for key, records in merged.items():
+        assert records == [(key, page) for page in range(1, len(records) + 1)]
+
+def test_fan_out_budget_can_run_out_before_every_probe():
+    calls = []
+    probe, fetch_page = _catalogue({'a': 1, 'b': 1, 'c': 1}, calls)
+    merged, truncated = fan_out_pages(['a', 'b', 'c'], probe, fetch_page, max_requests=2, initializer=lambda: None)
+    assert truncated and list(merged) == ['a', 'b']
+
+def test_fan_out_max_pages():
+    calls = []
+    probe, fetch_page = _catalogue({'a': 5, 'b': 5}, calls)
+    merged, truncated = fan_out_pages(['a', 'b'], probe, fetch_page, max_pages=1, initializer=lambda: None)
+    assert merged == {'a': [('a', 1)], 'b': [('b', 1)]} and not truncated
+    assert sorted(calls) == [('a', 1), ('b', 1)]
+
+def test_fan_out_skips_failed_probes_and_stops_at_failed_pages():
+    def probe(key):
+        if key == 'bad':
+            raise ValueError('probe failed')
+        return {'products': [(key, 1)], 'last_page': 4}
+    def fetch_page(key, page):
+        if page == 3:
+            raise ValueError('page failed')
+        return [(key, page)]
+    merged, truncated = fan_out_pages(['bad', 'ok'], probe, fetch_page, workers=1, initializer=lambda: None)
+    assert merged == {'ok': [('ok', 1), ('ok', 2)]} and not truncated
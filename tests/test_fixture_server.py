@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from fixture_server import start_fixture_server
+from common.extractors import load_extractor
+from common.parsing import make_soup, parse_last_page
+from common.url_rewrite import rewrite_url, set_url_rewrites
+
+@pytest.fixture(scope='module')
+def server():
+    fixture = start_fixture_server(stores=2, pages=3, products=4, states=2, libraries=5)
+    yield fixture
+    fixture.shutdown()
+    fixture.server_close()
+
+@pytest.fixture
+def rewrites(server):
+    set_url_rewrites(server.rewrites())
+    yield
+    set_url_rewrites()
+
+def test_longest_prefix_wins():
+    set_url_rewrites({'https://a.com': 'http://x', 'https://a.com/deep': 'http://y'})
+    try:
+        assert rewrite_url('https://a.com/deep/1') == 'http://y/1'
+        assert rewrite_url('https://a.com/other') == 'http://x/other'
+        assert rewrite_url('https://b.com/') == 'https://b.com/'
+    finally:
+        set_url_rewrites()
+
+def test_store_pages_have_the_live_markup(server, rewrites):
+    response = requests.get(rewrite_url('https://dealsheaven.in/store/store-1?page=2'), timeout=10)
+    soup = make_soup(response.text)
+    records = load_extractor('dealsheaven_products').extract(soup)
+    assert len(records) == 4
+    # Links keep pointing at the real site
+    assert all(record['Product URL'].startswith('https://dealsheaven.in/deal/store-1/') for record in records)
+    assert parse_last_page(soup) == 3
+
+def test_pages_are_deterministic_and_unknown_paths_404(server, rewrites):
+    url = rewrite_url('https://dealsheaven.in/store/store-2?page=1')
+    assert requests.get(url, timeout=10).text == requests.get(url, timeout=10).text
+    assert requests.get(rewrite_url('https://dealsheaven.in/store/nope'), timeout=10).status_code == 404
+
+def test_library_tables(server, rewrites):
+    response = requests.get(rewrite_url('https://publiclibraries.com/state/state-1/'), timeout=10)
+    records = load_extractor('publiclibraries_libraries').extract(make_soup(response.text))
+    assert len(records) == 5
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from common.disk_cache import DiskCache
+from common.http_cache import CacheMiss, CachedSession
+from common.ratelimit import HostScheduler
+
+URL = 'https://example.com/page'
+
+def _response(status, body=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = 'utf-8'
+    response.url = URL
+    return response
+
+# A CachedSession whose network calls return `responses` in order and are
+# recorded in `session.sent` as the headers each was sent with
+def _session(tmp_path, responses, **kwargs):
+    session = CachedSession(cache_dir=str(tmp_path), scheduler=HostScheduler(), **kwargs)
+    session.sent = []
+    def get(url, headers=None, **_):
+        session.sent.append(dict(headers or {}))
+        return responses.pop(0)
+    session.session.get = get
+    return session
+
+def test_disk_cache_round_trip_and_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10_000)
+    cache.set('a', b'x' * 100, {'n': 1})
+    assert cache.get('a') == (b'x' * 100, {'n': 1})
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    small = DiskCache(str(tmp_path / 'small'), max_bytes=60, compress_level=0)
+    small.set('old', b'1' * 40, {})
+    time.sleep(0.01)
+    small.set('new', b'2' * 40, {})
+    assert small.get('old') is None
+    assert small.get('new') is not None
+
+def test_fresh_page_is_served_from_disk(tmp_path):
+    session = _session(tmp_path, [_response(200, b'hello', {'ETag': '"v1"'})])
+    first = session.get(URL)
+    second = session.get(URL)
+    assert not first.from_cache and second.from_cache
+    assert second.text == 'hello'
+    assert len(session.sent) == 1
+
+def test_stale_page_is_revalidated_with_a_conditional_get(tmp_path):
+    session = _session(tmp_path, [
+        _response(200, b'hello', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+        _response(304),
+    ])
+    session.get(URL)
+    response = session.get(URL, max_age=0)
+    assert session.sent[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert response.from_cache and response.text == 'hello'
+    assert session.revalidated == 1
+
+def test_changed_page_replaces_the_cached_copy(tmp_path):
+    session = _session(tmp_path, [_response(200, b'old', {'ETag': '"v1"'}), _response(200, b'new', {'ETag': '"v2"'})])
+    session.get(URL)
+    assert session.get(URL, max_age=0).text == 'new'
+    assert session.get(URL).text == 'new'
+    assert len(session.sent) == 2
+
+def test_errors_are_not_cached_and_replay_mode_never_fetches(tmp_path):
+    session = _session(tmp_path, [_response(500), _response(200, b'ok')])
+    assert session.get(URL).status_code == 500
+    assert session.get(URL).text == 'ok'
+
+    replay = _session(tmp_path, [], mode='replay')
+    assert replay.get(URL).text == 'ok'
+    with pytest.raises(CacheMiss):
+        replay.get('https://example.com/other')
+    assert replay.sent == []
+
+def test_ttl_matches_parent_domains(tmp_path):
+    session = _session(tmp_path, [], host_ttls={'example.com': 5}, default_ttl=60)
+    assert session.ttl_for('https://shop.example.com/x') == 5
+    assert session.ttl_for('https://other.org/x') == 60
@@ -0,0 +1,65 @@
+import pytest
+
+from common import hybrid_fetch
+from common.hybrid_fetch import EMPTY_PAGE_MAX_AGE, FetchModes, HybridFetcher, route_key
+
+URL = 'https://shop.example.com/store/amazon?page=3'
+SHELL = '<html><body><div id="root"></div></body></html>'
+LISTING = '<html><body>' + '<div class="card">A product</div>' * 5 + '</body></html>'
+
+class Response:
+    def __init__(self, text, status_code=200):
+        self.text, self.status_code = text, status_code
+
+# A fetcher whose plain HTTP answers `static` and whose browser answers
+# `rendered`, settling or timing out as told
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    def make(static, rendered, settled=True):
+        monkeypatch.setattr(hybrid_fetch, 'http_get', lambda url: Response(static))
+        def load(driver, url, selector, min_count, wait):
+            return rendered, settled
+        monkeypatch.setattr(hybrid_fetch, '_load', load)
+        return HybridFetcher(None, modes=FetchModes(str(tmp_path / 'modes.json')))
+    return make
+
+def _fetch(fetcher):
+    return fetcher.fetch(URL, selector='div.card', min_count=3, driver=object())
+
+def test_static_pages_stay_on_plain_http(fetcher):
+    hybrid = fetcher(LISTING, 'unused')
+    assert _fetch(hybrid) == LISTING and _fetch(hybrid) == LISTING
+    assert hybrid.browser_fetches == 0
+    assert hybrid.modes.get(URL) == 'static'
+
+def test_js_pages_are_remembered_as_needing_a_browser(fetcher):
+    hybrid = fetcher(SHELL, LISTING)
+    assert _fetch(hybrid) == LISTING
+    assert hybrid.modes.get(URL) == 'browser'
+    _fetch(hybrid)
+    assert hybrid.static_fetches == 1 and hybrid.browser_fetches == 2
+
+def test_settled_empty_pages_are_static_for_a_short_while(fetcher, monkeypatch):
+    hybrid = fetcher(SHELL, SHELL)
+    _fetch(hybrid)
+    assert hybrid.modes.modes[route_key(URL)]['max_age'] == EMPTY_PAGE_MAX_AGE
+    _fetch(hybrid)
+    assert hybrid.browser_fetches == 1
+
+    now = hybrid_fetch.time.time()
+    monkeypatch.setattr(hybrid_fetch.time, 'time', lambda: now + EMPTY_PAGE_MAX_AGE + 1)
+    assert hybrid.modes.get(URL) is None
+
+def test_a_timed_out_render_decides_nothing(fetcher):
+    hybrid = fetcher(SHELL, SHELL, settled=False)
+    _fetch(hybrid)
+    assert hybrid.modes.get(URL) is None
+    _fetch(hybrid)
+    assert hybrid.browser_fetches == 2
+
+def test_content_over_http_replaces_an_empty_page_decision(fetcher):
+    hybrid = fetcher(SHELL, SHELL)
+    _fetch(hybrid)
+    hybrid_fetch.http_get = lambda url: Response(LISTING)
+    _fetch(hybrid)
+    assert hybrid.modes.modes[route_key(URL)]['max_age'] == hybrid.modes.max_age
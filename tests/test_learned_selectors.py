@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import learned_selectors
+from learned_selectors import (SelectorStore, agreement, duplicate_fields, extract_learned, learn_selectors,
+                               selectors_key)
+
+FIELDS = ['Title', 'Price']
+URL = 'https://shop.example.com/deals?page=1'
+PAGE = '<html><body><ul>' + ''.join(
+    f'<li class="card"><h3>Item {number}</h3><span class="price">Rs. {number},299</span>'
+    f'<a href="/p/{number}">more</a></li>' for number in range(5)) + '</ul></body></html>'
+RECORDS = [{'Title': f'Item {number}', 'Price': f'Rs. {number},299'} for number in range(5)]
+
+def _answer(title='h3', price='.price', item='li.card'):
+    return json.dumps({'item_selector': item, 'fields': [
+        {'field': 'Title', 'selector': title, 'attribute': 'text'},
+        {'field': 'Price', 'selector': price, 'attribute': 'text'}]})
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    selector_store = SelectorStore(str(tmp_path / 'selectors.json'))
+    monkeypatch.setattr(learned_selectors, '_store', selector_store)
+    return selector_store
+
+# A `generate` callback answering `answer` and counting its calls
+def _generate(answer):
+    def generate(prompt_template, chunk, response_model):
+        generate.calls += 1
+        assert '{chunk}' in prompt_template and 'Item 0' in chunk
+        return answer
+    generate.calls = 0
+    return generate
+
+def test_agreement_is_positional_and_ignores_formatting():
+    found = [{'Title': 'item 0', 'Price': 'Rs 0,299'}, {'Title': 'Item  1', 'Price': 'Rs.1299'}]
+    assert agreement(found, RECORDS[:2], FIELDS) == 1.0
+    assert agreement(list(reversed(found)), RECORDS[:2], FIELDS) == 0.0
+    # Missing items count against the selectors
+    assert agreement(found[:1], RECORDS[:2], FIELDS) == 0.5
+
+def test_whole_item_text_does_not_agree():
+    found = [{'Title': f'Item {n} Rs. {n},299 more', 'Price': f'Item {n} Rs. {n},299 more'} for n in range(5)]
+    assert agreement(found, RECORDS, FIELDS) == 0.0
+    assert duplicate_fields(found, RECORDS, FIELDS) == [('Title', 'Price')]
+
+def test_fields_that_really_are_equal_are_not_duplicates():
+    expected = [{'Title': 'Same', 'Price': 'Same'}] * 3
+    assert duplicate_fields(expected, expected, FIELDS) == []
+
+def test_good_selectors_are_learnt_and_reused(store):
+    generate = _generate(_answer())
+    selectors = learn_selectors(URL, FIELDS, PAGE, RECORDS, generate)
+    assert selectors['agreement'] == 1.0
+    assert store.get('https://shop.example.com/other', list(reversed(FIELDS)))['item'] == 'li.card'
+    records = extract_learned(URL, FIELDS, PAGE)
+    assert [record['Title'] for record in records] == [f'Item {number}' for number in range(5)]
+    assert extract_learned(URL, FIELDS, '<html><body><p>new template</p></body></html>') is None
+
+def test_empty_selectors_reading_the_whole_item_are_rejected(store):
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, _generate(_answer(title='', price=''))) is None
+    assert store.get(URL, FIELDS) is None
+
+def test_rejections_back_off_per_site_and_field_set(store, monkeypatch):
+    bad = _generate(_answer(title='.price'))
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, bad) is None
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, bad) is None
+    assert bad.calls == 1
+    # Another field set of the same site is its own entry
+    other = _generate(_answer())
+    assert learn_selectors(URL, ['Title'], PAGE, [{'Title': r['Title']} for r in RECORDS], other) is not None
+    assert other.calls == 1
+
+    now = learned_selectors.time.time()
+    monkeypatch.setattr(learned_selectors.time, 'time', lambda: now + learned_selectors.LEARN_BACKOFF + 1)
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, bad) is None
+    assert bad.calls == 2
+    # The second rejection doubles the wait
+    assert store.selectors[selectors_key(URL, FIELDS)]['failures'] == 2
+    assert not store.may_learn(URL, FIELDS)
+
+def test_unusable_answers_count_as_failures_but_errors_do_not(store):
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, _generate(None)) is None
+    assert store.may_learn(URL, FIELDS)
+    assert learn_selectors(URL, FIELDS, PAGE, RECORDS, _generate('{"item_selector": "li[["}')) is None
+    assert not store.may_learn(URL, FIELDS)
+
+def test_store_survives_a_restart(store):
+    learn_selectors(URL, FIELDS, PAGE, RECORDS, _generate(_answer()))
+    assert SelectorStore(store.path).get(URL, FIELDS)['item'] == 'li.card'
@@ -0,0 +1,51 @@
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache
+
+def test_key_depends_on_model_fields_prompt_and_chunk():
+    key = LLMCache.make_key('gpt-4', ['Title', 'Price'], 'prompt', 'chunk')
+    assert key == LLMCache.make_key('gpt-4', ('Title', 'Price'), 'prompt', 'chunk')
+    assert key != LLMCache.make_key('gemini-flash', ['Title', 'Price'], 'prompt', 'chunk')
+    assert key != LLMCache.make_key('gpt-4', ['Price', 'Title'], 'prompt', 'chunk')
+    assert key != LLMCache.make_key('gpt-4', ['Title', 'Price'], 'other prompt', 'chunk')
+    assert key != LLMCache.make_key('gpt-4', ['Title', 'Price'], 'prompt', 'chunk 2')
+
+def test_round_trip_and_expiry(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path), ttl=60)
+    cache.set('k', '{"listings": []}', 'gpt-4')
+    assert cache.get('k') == '{"listings": []}'
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now + 61)
+    assert cache.get('k') is None
+    stats = cache.stats()
+    assert stats['expired'] == 1
+    # One fresh read, one expired one
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = LLMCache(str(tmp_path), enabled=False)
+    cache.set('k', '{}')
+    assert cache.get('k') is None and cache.stats()['entries'] == 0
+
+# respond_to_chunk needs scraper.py, which imports the model SDKs
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    pytest.importorskip('openai')
+    pytest.importorskip('google.generativeai')
+    import scraper
+    cache = LLMCache(str(tmp_path))
+    monkeypatch.setattr(scraper, 'get_llm_cache', lambda: cache)
+    return scraper
+
+def test_only_json_answers_are_cached(scraper, monkeypatch):
+    answers = ['not json', '{"listings": []}', 'unused']
+    prompts = []
+    def generate_response(prompt, container_model, model_name):
+        prompts.append(prompt)
+        return answers.pop(0)
+    monkeypatch.setattr(scraper, 'generate_response', generate_response)
+    assert scraper.respond_to_chunk('chunk', ['Title'], None, 'gpt-4') == 'not json'
+    assert scraper.respond_to_chunk('chunk', ['Title'], None, 'gpt-4') == '{"listings": []}'
+    assert scraper.respond_to_chunk('chunk', ['Title'], None, 'gpt-4') == '{"listings": []}'
+    assert len(prompts) == 2 and prompts[0].endswith('chunk')
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from common import network_capture
+from common.extractors import load_extractor
+from common.network_capture import REPLAY_JS, ApiExtractor, scrape_api_records
+from common.ratelimit import HostScheduler
+
+API_URL = 'https://www.behance.net/v3/graphql'
+
+def _payload(numbers, cursor=None, more=True):
+    edges = [{'node': {'name': f'Cover {number}', 'owners': [{'displayName': 'Ana'}],
+                       'stats': {'appreciations': {'all': number}, 'views': {'all': 10 * number}},
+                       'url': f'https://www.behance.net/gallery/{number}'}} for number in numbers]
+    return {'data': {'search': {'nodes': edges, 'pageInfo': {'endCursor': cursor, 'hasNextPage': more}}}}
+
+# A Chrome driver whose performance log holds one captured GraphQL response,
+# and whose replays answer with `pages[cursor]`
+class FakeDriver:
+    def __init__(self, seed, pages):
+        self.seed = seed
+        self.pages = pages
+        self.replayed = []
+
+    def get_log(self, kind):
+        events = [
+            ('Network.requestWillBeSent', {'requestId': '1', 'request': {
+                'url': API_URL, 'method': 'POST', 'headers': {'Content-Type': 'application/json', 'Cookie': 'x'},
+                'postData': json.dumps({'query': 'q', 'variables': {'after': None}})}}),
+            ('Network.responseReceived', {'requestId': '1', 'response': {'mimeType': 'application/json'}}),
+            ('Network.loadingFinished', {'requestId': '1'}),
+        ]
+        return [{'message': json.dumps({'message': {'method': method, 'params': params}})}
+                for method, params in events]
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == 'Network.getResponseBody'
+        return {'body': json.dumps(self.seed), 'base64Encoded': False}
+
+    def execute_script(self, script, url, method, headers, body):
+        assert script == REPLAY_JS and 'Cookie' not in headers
+        cursor = json.loads(body)['variables']['after']
+        self.replayed.append(cursor)
+        return self.pages.get(cursor)
+
+# Replays go through the rate limiter; don't wait on behance.net's real one
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    fast = HostScheduler(host_limits={}, default_limits={'rate': 1000.0, 'burst': 1000, 'start': 4})
+    monkeypatch.setattr(network_capture, 'get_scheduler', lambda: fast)
+
+def _titles(records):
+    return [record['Title'] for record in records]
+
+def test_records_are_read_from_the_json_and_paged_by_cursor():
+    driver = FakeDriver(_payload([1, 2], 'c1'), {'c1': _payload([3, 4], 'c2'), 'c2': _payload([5], None, more=False)})
+    records = scrape_api_records(driver, load_extractor('behance_covers'), max_items=100)
+    assert _titles(records) == ['Cover 1', 'Cover 2', 'Cover 3', 'Cover 4', 'Cover 5']
+    assert records[0] == {'Title': 'Cover 1', 'Owner': 'Ana', 'Likes': '1', 'Views': '10',
+                          'Project URL': 'https://www.behance.net/gallery/1'}
+    assert driver.replayed == ['c1', 'c2']
+
+def test_paging_stops_at_max_items():
+    driver = FakeDriver(_payload([1, 2], 'c1'), {'c1': _payload([3, 4], 'c2')})
+    assert len(scrape_api_records(driver, load_extractor('behance_covers'), max_items=3)) == 3
+
+def test_paging_stops_when_a_page_adds_nothing_new():
+    driver = FakeDriver(_payload([1, 2], 'c1'), {'c1': _payload([1, 2], 'c2'), 'c2': _payload([3], None, False)})
+    assert _titles(scrape_api_records(driver, load_extractor('behance_covers'), max_items=100)) == ['Cover 1', 'Cover 2']
+    assert driver.replayed == ['c1']
+
+def test_paging_stops_on_a_repeated_cursor():
+    driver = FakeDriver(_payload([1], 'c1'), {'c1': _payload([2], 'c1')})
+    assert len(scrape_api_records(driver, load_extractor('behance_covers'), max_items=100)) == 2
+    assert driver.replayed == ['c1']
+
+def test_paging_is_capped(monkeypatch):
+    monkeypatch.setattr(network_capture, 'MAX_REPLAYS', 3)
+    pages = {f'c{number}': _payload([number + 1], f'c{number + 1}') for number in range(10)}
+    driver = FakeDriver(_payload([0], 'c0'), pages)
+    assert len(scrape_api_records(driver, load_extractor('behance_covers'), max_items=100)) == 4
+    assert len(driver.replayed) == 3
+
+def test_no_capture_without_an_api_section_or_cdp():
+    assert scrape_api_records(FakeDriver(_payload([1]), {}), load_extractor('dealsheaven_products'), 10) is None
+    assert scrape_api_records(object(), load_extractor('behance_covers'), 10) is None
+
+def test_field_paths_fall_back_in_order():
+    api = ApiExtractor(load_extractor('behance_covers'))
+    node = {'name': 'X', 'owner': {'displayName': 'Bo'}, 'stats': {'appreciations': 5, 'views': 7}}
+    assert api.record(node) == {'Title': 'X', 'Owner': 'Bo', 'Likes': '5', 'Views': '7', 'Project URL': None}
+    assert api.next_cursor(_payload([1], 'c9', more=False)) is None
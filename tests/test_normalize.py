@@ -0,0 +1,37 @@
+import math
+
+import pandas as pd
+
+from common.normalize import expand_counts, normalize_behance_stats, normalize_deals, to_number, to_paise
+
+def test_to_number_reads_the_first_number():
+    values = to_number(pd.Series(['₹1,299', 'Rs. 1,299.50', '45% off', 'free', None]))
+    assert values[:3].tolist() == [1299.0, 1299.5, 45.0]
+    assert math.isnan(values[3]) and math.isnan(values[4])
+
+def test_repeated_strings_keep_their_index():
+    series = pd.Series(['₹10', '₹20', '₹10'], index=[5, 7, 9])
+    assert to_number(series).to_dict() == {5: 10.0, 7: 20.0, 9: 10.0}
+
+def test_to_paise_is_exact():
+    paise = to_paise(pd.Series(['₹0.29', '₹1,299.57', None]))
+    assert str(paise.dtype) == 'Int64'
+    assert paise[:2].tolist() == [29, 129957]
+    assert paise.isna()[2]
+
+def test_expand_counts_applies_suffixes():
+    counts = expand_counts(pd.Series(['1.2K', '3M', '950', ' 2b ', 'n/a']))
+    assert counts[:4].tolist() == [1200, 3_000_000, 950, 2_000_000_000]
+    assert counts.isna()[4]
+
+def test_normalize_deals_adds_columns_without_touching_input():
+    df = pd.DataFrame({'Price': ['₹1,000'], 'Special Price': ['₹499'], 'Discount': ['50% off']})
+    result = normalize_deals(df)
+    assert list(df.columns) == ['Price', 'Special Price', 'Discount']
+    assert result.loc[0, ['Price Value', 'Special Price Value', 'Discount Pct']].tolist() == [1000, 499, 50]
+    assert result.loc[0, 'Special Price Paise'] == 49900
+
+def test_normalize_behance_stats_only_adds_present_columns():
+    result = normalize_behance_stats(pd.DataFrame({'Likes': ['1.5K']}))
+    assert result['Likes Count'].tolist() == [1500]
+    assert 'Views Count' not in result
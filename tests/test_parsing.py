@@ -0,0 +1,44 @@
+import pytest
+
+from common.parsing import (PAGINATION, PRODUCT_ITEMS, combine_strainers, make_soup, parse_last_page,
+                            tag_strainer)
+
+PAGE = """<html><body>
+<div class="header">Deals</div>
+<div class="product-item-detail card"><h3>One</h3></div>
+<div class="card product-item-detail"><h3>Two</h3></div>
+<div class="product"><h3>Not a deal</h3></div>
+<ul class="pagination">
+  <li><a href="?page=2">2</a></li>
+  <li><a href="?page=12&amp;sort=new">12</a></li>
+  <li><a href="?page=next">Next</a></li>
+</ul>
+</body></html>"""
+
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_strainer_keeps_only_multi_class_product_cards(backend):
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+    soup = make_soup(PAGE, only=PRODUCT_ITEMS, backend=backend)
+    assert [h3.text for h3 in soup.find_all('h3')] == ['One', 'Two']
+    assert soup.find('ul') is None
+
+def test_combined_strainers_keep_every_subtree():
+    soup = make_soup(PAGE, only=[PRODUCT_ITEMS, PAGINATION], backend='html.parser')
+    assert len(soup.find_all('h3')) == 2
+    assert soup.find('ul', class_='pagination') is not None
+    assert soup.find(class_='header') is None
+
+def test_tag_strainer_matches_id():
+    soup = make_soup('<table id="libraries"><tr><td>a</td></tr></table><table id="x"></table>',
+                     only=tag_strainer('table', tag_id='libraries'), backend='html.parser')
+    assert [table['id'] for table in soup.find_all('table')] == ['libraries']
+
+def test_parse_last_page_ignores_later_parameters_and_words():
+    assert parse_last_page(make_soup(PAGE, only=PAGINATION, backend='html.parser')) == 12
+    assert parse_last_page(make_soup('<p>no pages</p>', backend='html.parser')) == 1
+
+def test_combine_strainers_is_an_or():
+    strainer = combine_strainers(tag_strainer('p'), tag_strainer('span'))
+    soup = make_soup('<div><p>a</p><span>b</span><i>c</i></div>', only=strainer, backend='html.parser')
+    assert soup.get_text() == 'ab'
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from common.driver_pool import DriverPool
+from common.playwright_engine import PlaywrightEngine
+
+class Page:
+    url = 'https://shop.example.com/'
+
+    async def evaluate(self, script, *args):
+        return 1
+
+class Context:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return Page()
+
+    async def close(self):
+        self.browser.open -= 1
+
+class Browser:
+    def __init__(self):
+        self.open = self.opened = 0
+
+    async def new_context(self, user_agent=None):
+        self.open += 1
+        self.opened += 1
+        return Context(self)
+
+# The engine's loop thread and slot accounting around a fake browser, without
+# starting Playwright
+@pytest.fixture
+def engine():
+    engine = PlaywrightEngine.__new__(PlaywrightEngine)
+    engine.max_contexts = 2
+    engine._loop = asyncio.new_event_loop()
+    engine._thread = threading.Thread(target=engine._loop.run_forever, daemon=True)
+    engine._thread.start()
+    engine._browser = Browser()
+    engine._slots = asyncio.Semaphore(engine.max_contexts)
+    yield engine
+    engine._loop.call_soon_threadsafe(engine._loop.stop)
+    engine._thread.join()
+
+def test_driver_opens_its_context_on_first_use(engine):
+    driver = engine.new_driver()
+    assert driver.idle and engine._browser.opened == 0
+
+    assert driver.execute_script("return 1") == 1
+    assert not driver.idle and engine._browser.open == 1
+
+    driver.reset_session()
+    assert driver.idle and engine._browser.open == 0
+
+def test_pool_reuses_idle_drivers_without_opening_a_context(engine):
+    pool = DriverPool(engine.new_driver, size=engine.max_contexts)
+    driver = pool.acquire()
+    driver.execute_script("return 1")
+    pool.release(driver)
+    assert engine._browser.open == 0
+
+    for _ in range(3):
+        pool.release(pool.acquire())
+
+    assert (pool.created, pool.reused, pool.recycled) == (1, 3, 0)
+    assert engine._browser.opened == 1
+    pool.close()
+
+def test_idle_drivers_hold_no_slots(engine):
+    pool = DriverPool(engine.new_driver, size=engine.max_contexts)
+    for _ in range(engine.max_contexts + 1):
+        with pool.driver() as driver:
+            driver.execute_script("return 1")
+
+    # A slot held by an idle driver would leave none for this
+    first, second = engine.new_driver(), engine.new_driver()
+    first.execute_script("return 1")
+    second.execute_script("return 1")
+    assert engine._browser.open == 2
+    first.quit()
+    second.quit()
+    pool.close()
+
+class RenderEngine:
+    max_contexts = 2
+
+    def __init__(self, products):
+        self.products, self.rendered = products, []
+
+    def render(self, urls, handle=None, blocking='none', user_agent=None):
+        self.rendered.append(len(urls))
+        return [self.products.get(int(url.split('page=')[1])) for url in urls]
+
+def test_store_pages_render_in_batches_up_to_the_first_empty_page(monkeypatch):
+    Task4 = pytest.importorskip('Milestone_2.Task4_selenium_deaslHeaven')
+    engine = RenderEngine({page: [{'Title': f"Deal {page}"}] for page in (1, 2, 3, 5, 6)})
+    monkeypatch.setattr(Task4, 'get_playwright_engine', lambda: engine)
+
+    deals = Task4.scrape_store_concurrently('https://dealsheaven.in/store/amazon', 10, None)
+
+    assert [deal['Title'] for deal in deals] == ['Deal 1', 'Deal 2', 'Deal 3']
+    assert {deal['Store Name'] for deal in deals} == {'amazon'}
+    assert engine.rendered == [2, 2]
@@ -0,0 +1,58 @@
+import preprocess
+from preprocess import find_listing, has_listing, preprocess_html
+from common.parsing import make_soup
+
+def _cards(count, css_class='card'):
+    return ''.join(f'<div class="{css_class}"><h3>Product number {number}</h3><p class="price">Rs. {number}99</p>'
+                   f'<a href="/p/{number}">Buy now</a></div>' for number in range(count))
+
+def _page(body, body_attrs=''):
+    return f'<html><head><style>p {{}}</style></head><body {body_attrs}>{body}<script>var x = 1;</script></body></html>'
+
+NAV = '<nav><a href="/">Home</a><a href="/deals">Deals</a></nav>'
+FOOTER = '<footer>Copyright and a long list of links nobody needs ' + 'link ' * 40 + '</footer>'
+COOKIES = '<div class="cookie-banner">We use cookies to improve your experience ' + 'cookie ' * 30 + '</div>'
+
+def test_listing_is_kept_and_boilerplate_dropped():
+    html, report = preprocess_html(_page(NAV + COOKIES + f'<div class="grid">{_cards(6)}</div>' + FOOTER), ['Price'])
+    assert report['listing_found'] and report['items'] == 6
+    assert 'Product number 5' in html and 'Rs. 599' in html
+    assert 'Copyright' not in html and 'cookies' not in html and 'Home' not in html and 'var x' not in html
+    assert report['chars_before'] > len(make_soup(html).get_text(' ', strip=True))
+
+def test_field_regions_outside_the_listing_are_kept():
+    html, report = preprocess_html(_page(f'<div class="grid">{_cards(6)}</div><div><b>Phone:</b> 555-0100</div>'),
+                                   ['Phone'])
+    assert report['regions'] == 1 and '555-0100' in html
+
+def test_page_wrappers_are_not_boilerplate():
+    # An ASP.NET page is one big <form>, and <body> may carry a "no-sidebar" class
+    page = _page(f'<form id="aspnetForm"><div class="grid">{_cards(6)}</div>{FOOTER}</form>', 'class="no-sidebar"')
+    html, report = preprocess_html(page)
+    assert report['listing_found'] and 'Product number 0' in html and 'Copyright' not in html
+
+def test_without_a_listing_only_non_content_goes():
+    article = '<article><h1>Opening hours</h1><p>' + 'We are open on weekdays from nine to five. ' * 20 + '</p></article>'
+    html, report = preprocess_html(_page(NAV + article + '<div class="header">Site name</div>' + FOOTER))
+    assert not report['listing_found']
+    assert 'weekdays' in html and 'Site name' in html and 'Copyright' in html
+    assert 'Home' not in html and 'var x' not in html
+
+def test_small_listing_is_not_trusted():
+    text = '<p>' + 'A long article about something else entirely. ' * 60 + '</p>'
+    _, report = preprocess_html(_page(text + f'<ul class="tags">{_cards(3)}</ul>'))
+    assert not report['listing_found']
+
+def test_grid_rows_are_joined():
+    rows = ''.join(f'<div class="row">{_cards(4)}</div>' for _ in range(2))
+    items, _ = find_listing(make_soup(_page(f'<div class="grid">{rows}</div>')).body)
+    assert len(items) == 8
+
+def test_has_listing_tells_a_js_shell_from_a_rendered_page():
+    assert not has_listing(_page('<div id="root">Loading...</div><noscript>Enable JavaScript</noscript>'))
+    assert has_listing(_page(f'<div id="root">{_cards(6)}</div>'))
+
+def test_preprocessing_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(preprocess, 'PREPROCESS_ENABLED', False)
+    page = _page(NAV + _cards(6))
+    assert preprocess_html(page)[0] == page
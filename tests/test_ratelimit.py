@@ -0,0 +1,130 @@
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import pytest
+
+from common import ratelimit
+from common.ratelimit import HostLimiter, HostScheduler, parse_retry_after, polite_get
+
+# Stands in for the time module inside ratelimit, so the bucket only refills when told
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(ratelimit, 'time', fake)
+    return fake
+
+def _limiter(**settings):
+    return HostLimiter(**{'rate': 1.0, 'burst': 2, 'start': 4, 'max_concurrency': 8, **settings})
+
+def test_token_bucket_allows_a_burst_then_the_rate(clock):
+    limiter = _limiter()
+    assert limiter._try_acquire() == 0 and limiter._try_acquire() == 0
+    assert limiter._try_acquire() == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert limiter._try_acquire() == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert limiter._try_acquire() == 0
+    # Refills never go past the burst
+    limiter.in_flight = 0
+    clock.advance(100)
+    assert [limiter._try_acquire() for _ in range(3)][:2] == [0, 0]
+
+def test_requests_in_flight_are_capped(clock):
+    limiter = _limiter(burst=10, start=2)
+    assert limiter._try_acquire() == 0 and limiter._try_acquire() == 0
+    assert limiter._try_acquire() is None
+    limiter.release(200, latency=0.1)
+    assert limiter._try_acquire() == 0
+
+def test_fast_answers_grow_the_window_additively(clock):
+    limiter = _limiter(start=2, max_concurrency=3)
+    for _ in range(2):
+        limiter.in_flight += 1
+        limiter.release(200, latency=0.1)
+    # +1/limit per answer: about +1 per window's worth of answers
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    limiter.in_flight += 1
+    limiter.release(200, latency=0.1)
+    assert limiter.limit == 3.0
+
+def test_overload_halves_the_window_once_per_round_trip(clock):
+    limiter = _limiter(start=8)
+    limiter.in_flight = 3
+    limiter.release(503, latency=0.2)
+    limiter.release(503, latency=0.2)
+    assert limiter.limit == 4.0
+    clock.advance(1)
+    limiter.release(None, latency=0.2)
+    assert limiter.limit == 2.0 and limiter.in_flight == 0
+
+def test_slow_answers_halve_the_window(clock):
+    limiter = _limiter(start=8, target_latency=1.0)
+    limiter.in_flight = 1
+    clock.advance(5)
+    limiter.release(200, latency=2.5)
+    assert limiter.limit == 4.0
+
+def test_retry_after_blocks_the_host(clock):
+    limiter = _limiter()
+    limiter.in_flight = 1
+    limiter.release(429, latency=0.1, retry_after=30)
+    assert limiter.throttled == 1
+    assert limiter._try_acquire() == pytest.approx(30)
+    clock.advance(30)
+    assert limiter._try_acquire() == 0
+
+def test_throttling_without_retry_after_uses_the_default_backoff(clock):
+    limiter = _limiter()
+    limiter.in_flight = 1
+    limiter.release(503)
+    assert limiter._try_acquire() == pytest.approx(ratelimit.DEFAULT_BACKOFF)
+
+def test_parse_retry_after(clock):
+    assert parse_retry_after('120') == 120.0
+    date = format_datetime(datetime.fromtimestamp(clock.now + 60, timezone.utc), usegmt=True)
+    assert parse_retry_after(date) == pytest.approx(60, abs=1)
+    assert parse_retry_after('soon') is None and parse_retry_after(None) is None
+
+def test_hosts_have_independent_limiters(clock):
+    scheduler = HostScheduler(host_limits={'shop.com': {'rate': 1.0, 'burst': 1, 'start': 1}},
+                              default_limits={'rate': 1.0, 'burst': 1, 'start': 1})
+    assert scheduler.limiter_for('https://www.shop.com/a') is scheduler.limiter_for('shop.com')
+    assert scheduler.limiter_for('https://other.com/') is not scheduler.limiter_for('shop.com')
+
+    with scheduler.slot('https://shop.com/1') as slot:
+        slot.done(429, {'Retry-After': '60'})
+    assert scheduler.limiter_for('shop.com')._try_acquire() == pytest.approx(60)
+    assert scheduler.limiter_for('other.com')._try_acquire() == 0
+    assert scheduler.stats()['shop.com']['throttled'] == 1
+
+def test_configure_replaces_a_sites_limiter(clock):
+    scheduler = HostScheduler(host_limits={}, default_limits={'rate': 1.0, 'burst': 1})
+    old = scheduler.limiter_for('shop.com')
+    scheduler.configure('shop.com', rate=50.0, burst=50)
+    assert scheduler.limiter_for('shop.com') is not old
+    assert scheduler.limiter_for('shop.com').burst == 50
+
+def test_polite_get_loads_through_the_hosts_slot(clock, monkeypatch):
+    scheduler = HostScheduler(host_limits={}, default_limits={'rate': 1.0, 'burst': 1})
+    monkeypatch.setattr(ratelimit, 'get_scheduler', lambda: scheduler)
+    loaded = []
+    class Driver:
+        def get(self, url):
+            assert scheduler.limiter_for(url).in_flight == 1
+            loaded.append(url)
+    polite_get(Driver(), 'https://shop.com/page')
+    limiter = scheduler.limiter_for('shop.com')
+    assert loaded == ['https://shop.com/page'] and limiter.in_flight == 0 and limiter.requests == 1
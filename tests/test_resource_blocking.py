@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from selenium.webdriver.edge.options import Options
+
+from common import resource_blocking
+from common.resource_blocking import (apply_blocking, blocked_url_patterns, blocking_options, blocking_stats,
+                                      collect_blocking_stats, count_blocked, read_performance_log)
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    monkeypatch.setattr(resource_blocking, '_stats', {})
+    monkeypatch.delenv('SCRAPER_BLOCKING_PROFILE', raising=False)
+
+def _entry(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+# A Chromium driver with CDP and a performance log that drains on reading
+class FakeDriver:
+    def __init__(self, *entries):
+        self.entries = list(entries)
+        self.cdp = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp.append((command, params))
+
+    def get_log(self, kind):
+        assert kind == 'performance'
+        entries, self.entries = self.entries, []
+        return entries
+
+class FirefoxDriver:
+    def get_log(self, kind):
+        raise ValueError("no performance log")
+
+def test_profiles_block_their_types_and_tracker_domains():
+    text = blocked_url_patterns('text')
+    assert {'*.png', '*.png?*', '*.woff2', '*.css', '*.mp4'} <= set(text)
+    assert {'*://*.doubleclick.net/*', '*://doubleclick.net/*'} <= set(text)
+
+    behance = blocked_url_patterns('behance')
+    assert '*.png' in behance and '*.css' not in behance
+    assert blocked_url_patterns('none') == []
+
+def test_the_environment_overrides_every_profile(monkeypatch):
+    monkeypatch.setenv('SCRAPER_BLOCKING_PROFILE', 'none')
+    assert blocked_url_patterns('text') == []
+
+    driver = apply_blocking(FakeDriver(), 'text')
+    assert driver.blocking_profile == 'none' and driver.cdp == []
+
+def test_apply_blocking_installs_the_blocklist_over_cdp():
+    driver = apply_blocking(FakeDriver(), 'behance')
+    assert driver.cdp == [('Network.enable', {}),
+                          ('Network.setBlockedURLs', {'urls': blocked_url_patterns('behance')})]
+
+def test_blocking_options_turn_on_the_performance_log():
+    options = blocking_options(Options(), 'text')
+    assert options.to_capabilities()['ms:loggingPrefs'] == {'performance': 'ALL'}
+    assert 'ms:loggingPrefs' not in blocking_options(Options(), 'none').to_capabilities()
+
+def test_tally_counts_downloads_and_blocked_requests_by_type():
+    driver = apply_blocking(FakeDriver(
+        _entry('Network.loadingFinished', encodedDataLength=1200),
+        _entry('Network.loadingFinished', encodedDataLength=800),
+        _entry('Network.loadingFailed', type='Image', blockedReason='inspector'),
+        _entry('Network.loadingFailed', type='Image', blockedReason='inspector'),
+        _entry('Network.loadingFailed', type='Font', blockedReason='inspector'),
+        _entry('Network.loadingFailed', type='Script', errorText='net::ERR_FAILED'),  # failed, not blocked
+        _entry('Network.requestWillBeSent'),
+    ), 'text')
+    collect_blocking_stats(driver)
+
+    assert blocking_stats() == {'text': {
+        'requests': 2, 'bytes_transferred': 2000, 'blocked': 3,
+        'blocked_by_type': {'Image': 2, 'Font': 1},
+        'estimated_bytes_saved': 2 * 30_000 + 40_000,
+    }}
+
+def test_stats_add_up_across_reads_and_engines():
+    driver = apply_blocking(FakeDriver(_entry('Network.loadingFailed', type='Media', blockedReason='inspector')), 'text')
+    collect_blocking_stats(driver)
+    driver.entries = [_entry('Network.loadingFailed', type='Other', blockedReason='inspector')]
+    collect_blocking_stats(driver)
+    count_blocked('text', 'Image', 3)
+
+    stats = blocking_stats()['text']
+    assert stats['blocked_by_type'] == {'Media': 1, 'Other': 1, 'Image': 3}
+    assert stats['estimated_bytes_saved'] == 500_000 + resource_blocking.DEFAULT_TYPICAL_BYTES + 3 * 30_000
+
+def test_read_performance_log_returns_the_messages_for_other_readers():
+    driver = apply_blocking(FakeDriver(_entry('Network.responseReceived', requestId='1')), 'none')
+    assert read_performance_log(driver) == [{'method': 'Network.responseReceived', 'params': {'requestId': '1'}}]
+    assert read_performance_log(driver) == []
+    # The 'none' profile isn't tallied
+    assert blocking_stats() == {}
+
+def test_drivers_without_a_performance_log_are_skipped():
+    assert read_performance_log(FirefoxDriver()) == []
+    assert blocking_stats() == {}
+
+def test_blocking_stats_is_a_copy():
+    count_blocked('behance', 'Font')
+    blocking_stats()['behance']['blocked_by_type']['Font'] = 99
+    assert blocking_stats()['behance']['blocked_by_type'] == {'Font': 1}
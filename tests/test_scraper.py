@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+import pytest
+
+from common.ratelimit import HostScheduler
+
+# scraper.py imports the model SDKs; the model calls themselves are faked
+@pytest.fixture
+def scraper(monkeypatch):
+    pytest.importorskip('openai')
+    pytest.importorskip('google.generativeai')
+    import scraper
+    fast = HostScheduler(host_limits={}, default_limits={'rate': 1000.0, 'burst': 1000, 'start': 4})
+    monkeypatch.setattr(scraper, 'get_scheduler', lambda: fast)
+    return scraper
+
+def _chunks(scraper, monkeypatch, count):
+    monkeypatch.setattr(scraper, 'split_text_by_tokens', lambda text, max_tokens: [f"chunk {i}" for i in range(count)])
+    return {'markdown_text': 'unused', 'fields': ['Title']}
+
+def _answer(chunk):
+    return json.dumps({'listings': [{'Title': chunk}]})
+
+def test_chunk_answers_are_merged_in_chunk_order(scraper, monkeypatch):
+    data = _chunks(scraper, monkeypatch, 6)
+    # Later chunks answer first
+    def respond_to_chunk(chunk, fields, container_model, model_name):
+        time.sleep(0.01 * (6 - int(chunk.split()[1])))
+        return _answer(chunk)
+    monkeypatch.setattr(scraper, 'respond_to_chunk', respond_to_chunk)
+
+    result = scraper.format_data_in_chunks(data, None, 'gpt-4', max_in_flight=6)
+
+    assert [record['Title'] for record in result['listings']] == [f"chunk {i}" for i in range(6)]
+
+def test_chunks_without_an_answer_are_left_out(scraper, monkeypatch):
+    data = _chunks(scraper, monkeypatch, 4)
+    answers = {'chunk 0': _answer('chunk 0'), 'chunk 1': None, 'chunk 2': 'not json', 'chunk 3': _answer('chunk 3')}
+    monkeypatch.setattr(scraper, 'respond_to_chunk', lambda chunk, *args: answers[chunk])
+
+    result = scraper.format_data_in_chunks(data, None, 'gpt-4')
+
+    assert [record['Title'] for record in result['listings']] == ['chunk 0', 'chunk 3']
+
+def test_at_most_max_in_flight_chunks_are_sent_at_once(scraper, monkeypatch):
+    data = _chunks(scraper, monkeypatch, 10)
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+    def respond_to_chunk(chunk, *args):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return _answer(chunk)
+    monkeypatch.setattr(scraper, 'respond_to_chunk', respond_to_chunk)
+
+    result = scraper.format_data_in_chunks(data, None, 'gpt-4', max_in_flight=3)
+
+    assert len(result['listings']) == 10
+    assert peak[0] == 3
+
+# A fake model call that reports each status in turn to its slot, answering
+# only on 200
+@pytest.fixture
+def model(scraper, monkeypatch):
+    calls = []
+    def make(*statuses):
+        statuses = list(statuses)
+        def gpt_generate_response(prompt, system_message, slot=None):
+            status = statuses.pop(0)
+            calls.append(status)
+            slot.done(status, {'Retry-After': '0'})
+            return '{"listings": []}' if status == 200 else None
+        monkeypatch.setattr(scraper, 'gpt_generate_response', gpt_generate_response)
+        return calls
+    return make
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_throttled_calls_are_sent_again(scraper, model, status):
+    calls = model(status, 200)
+    assert scraper.generate_response('prompt', None, 'gpt-4') == '{"listings": []}'
+    assert calls == [status, 200]
+
+def test_retries_stop_after_llm_retries(scraper, model):
+    calls = model(*[429] * (scraper.LLM_RETRIES + 2))
+    assert scraper.generate_response('prompt', None, 'gpt-4') is None
+    assert len(calls) == scraper.LLM_RETRIES + 1
+
+def test_other_failures_are_not_retried(scraper, model):
+    calls = model(400, 200)
+    assert scraper.generate_response('prompt', None, 'gpt-4') is None
+    assert calls == [400]
@@ -0,0 +1,53 @@
+import pytest
+
+from common import scrolling
+from common.extractors import EXTRACT_JS, load_extractor
+from common.scrolling import SCROLL_TO_END_JS, scrape_infinite_scroll, scrape_listing
+
+def _cover(number):
+    return {'Title': f'Cover {number}', 'Owner': 'Ana', 'Likes': '1', 'Views': '2',
+            'Project URL': f'https://www.behance.net/gallery/{number}'}
+
+# An infinite-scroll grid: every scroll to the end renders `batch` more cards
+# (up to `total`), and the grid re-renders the last card it already had, the
+# way recycled virtualised nodes come back unmarked
+class FakeGrid:
+    def __init__(self, total, batch):
+        self.total, self.batch = total, batch
+        self.rendered = batch
+        self.extracted = 0
+        self.extract_calls = 0
+        self.scrolls = 0
+
+    def execute_script(self, script, spec):
+        if script == EXTRACT_JS:
+            assert spec['onlyNew'] and spec['item'] == '*.Cover-cover-gDM'
+            self.extract_calls += 1
+            start = max(0, self.extracted - 1)
+            records = [_cover(number) for number in range(start, self.rendered)]
+            self.extracted = self.rendered
+            return records
+        assert script == SCROLL_TO_END_JS
+        self.scrolls += 1
+        self.rendered = min(self.total, self.rendered + self.batch)
+        return self.rendered
+
+@pytest.fixture(autouse=True)
+def no_waiting(monkeypatch):
+    monkeypatch.setattr(scrolling, 'wait_for_more', lambda driver, selector, count, url=None: count)
+
+def test_one_extract_call_per_batch_without_repeats():
+    grid = FakeGrid(total=10, batch=4)
+    records = scrape_infinite_scroll(grid, load_extractor('behance_covers'), max_items=100)
+    assert [record['Title'] for record in records] == [f'Cover {number}' for number in range(10)]
+    # 3 batches, then `patience` scrolls that bring nothing
+    assert grid.extract_calls == 5 and grid.scrolls == 4
+
+def test_stops_at_max_items():
+    grid = FakeGrid(total=100, batch=4)
+    records = scrape_infinite_scroll(grid, load_extractor('behance_covers'), max_items=6)
+    assert len(records) == 6 and grid.scrolls == 1
+
+def test_scrape_listing_reads_the_dom_without_capture():
+    records = scrape_listing(FakeGrid(total=3, batch=3), load_extractor('behance_covers'), max_items=10)
+    assert len(records) == 3
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from common import search_index
+from common.search_index import SearchIndex, edit_distance
+
+def _index(*titles):
+    index = SearchIndex()
+    for number, title in enumerate(titles):
+        index.add(f'u{number}', title, 'Amazon' if number % 2 == 0 else 'Flipkart')
+    return index
+
+def _urls(records):
+    return [record['Product URL'] for record in records]
+
+def test_words_match_as_substrings_and_are_anded():
+    index = _index('Samsung Galaxy Phone', 'Apple iPhone 15', 'Galaxy Buds', 'Phone case')
+    assert sorted(_urls(index.search('phone'))) == ['u0', 'u1', 'u3']
+    assert _urls(index.search('galaxy phone')) == ['u0']
+    assert _urls(index.search('phone', store='Flipkart')) == ['u3', 'u1']
+    assert index.search('') == []
+
+def test_newest_deals_come_first():
+    index = _index('red shirt', 'blue shirt', 'green shirt')
+    assert _urls(index.search('shirt', limit=2)) == ['u2', 'u1']
+
+def test_misspelt_words_fall_back_to_fuzzy_matches():
+    index = _index('Wireless Headphones')
+    assert _urls(index.search('headphnes')) == ['u0']
+    assert index.search('headphnes', fuzzy=False) == []
+    assert edit_distance('kitten', 'sitting', 5) == 3
+
+def test_readding_and_removing_update_the_postings():
+    index = _index('Old Title')
+    index.add('u0', 'New Title', 'Amazon')
+    assert index.search('old') == [] and _urls(index.search('new')) == ['u0']
+    index.remove('u0')
+    assert index.search('title') == [] and len(index) == 0
+    assert 'new' not in index.vocabulary
+
+def test_changes_are_logged_and_replayed(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    index = _index('Samsung Galaxy', 'Apple iPhone')
+    index.save(path)
+    index.add('u2', 'Nokia Phone', 'Amazon')
+    index.remove('u0')
+    index.save_changes(path)
+    assert os.path.exists(f'{path}.log')
+
+    loaded = SearchIndex.load(path)
+    assert _urls(loaded.search('nokia')) == ['u2']
+    assert loaded.search('samsung') == []
+    assert loaded._pending == []
+
+def test_a_cut_short_log_entry_is_ignored(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    index = _index('Samsung Galaxy')
+    index.save(path)
+    index.add('u1', 'Apple iPhone', 'Flipkart')
+    index.save_changes(path)
+    with open(f'{path}.log', 'ab') as file:
+        file.write(b'\x80\x05\x95garbage')
+    assert _urls(SearchIndex.load(path).search('iphone')) == ['u1']
+
+def test_a_large_log_is_compacted_into_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, 'COMPACT_RATIO', 0.0)
+    path = str(tmp_path / 'index.pkl')
+    index = _index('Samsung Galaxy')
+    index.save(path)
+    index.add('u1', 'Apple iPhone', 'Flipkart')
+    index.save_changes(path)
+    assert not os.path.exists(f'{path}.log')
+    assert _urls(SearchIndex.load(path).search('iphone')) == ['u1']
+
+def test_compaction_keeps_other_processes_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index.pkl')
+    _index('Samsung Galaxy').save(path)
+    app, watcher = SearchIndex.load(path), SearchIndex.load(path)
+    watcher.add('w1', 'Nokia Phone', 'Amazon')
+    watcher.save_changes(path)
+
+    monkeypatch.setattr(search_index, 'COMPACT_RATIO', 0.0)
+    app.add('a1', 'Apple iPhone', 'Flipkart')
+    app.save_changes(path)
+    assert not os.path.exists(f'{path}.log')
+    loaded = SearchIndex.load(path)
+    assert _urls(loaded.search('nokia')) == ['w1'] and _urls(loaded.search('iphone')) == ['a1']
+    # The compacting process picks the other one's deals up too
+    assert _urls(app.search('nokia')) == ['w1']
+
+def test_snapshots_of_another_version_are_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index.pkl')
+    _index('Samsung Galaxy').save(path)
+    monkeypatch.setattr(search_index, 'INDEX_VERSION', search_index.INDEX_VERSION + 1)
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
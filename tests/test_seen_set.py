@@ -0,0 +1,47 @@
+import pytest
+
+from common.seen_set import BloomFilter, SeenSet, open_seen_set
+
+def test_seen_set_round_trip(tmp_path):
+    path = str(tmp_path / 'seen.bin')
+    seen = SeenSet(path)
+    assert seen.add('https://a') is True
+    assert seen.add('https://a') is False
+    seen.add('https://b')
+    seen.save()
+
+    loaded = SeenSet(path)
+    assert len(loaded) == 2 and 'https://a' in loaded and 'https://c' not in loaded
+
+def test_bloom_filter_round_trip_without_false_negatives(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    bloom = BloomFilter(path, capacity=1000, error_rate=0.01)
+    keys = [f'https://shop/{number}' for number in range(500)]
+    assert all(bloom.add(key) for key in keys)
+    assert bloom.add(keys[0]) is False
+    bloom.save()
+
+    loaded = BloomFilter(path)
+    assert len(loaded) == 500
+    assert all(key in loaded for key in keys)
+    false_positives = sum(f'https://other/{number}' in loaded for number in range(2000))
+    assert false_positives < 100
+
+def test_the_two_kinds_of_files_are_never_mixed_up(tmp_path):
+    seen_path, bloom_path = str(tmp_path / 'seen.bin'), str(tmp_path / 'seen.bloom')
+    SeenSet(seen_path).save()
+    BloomFilter(bloom_path, capacity=10).save()
+    with pytest.raises(ValueError):
+        SeenSet(bloom_path)
+    with pytest.raises(ValueError):
+        BloomFilter(seen_path)
+    (tmp_path / 'short').write_bytes(b'BL')
+    with pytest.raises(ValueError):
+        BloomFilter(str(tmp_path / 'short'))
+    (tmp_path / 'bare').write_bytes(bytes(16))
+    with pytest.raises(ValueError):
+        SeenSet(str(tmp_path / 'bare'))
+
+def test_open_seen_set_picks_the_kind(tmp_path):
+    assert isinstance(open_seen_set(str(tmp_path / 'a')), SeenSet)
+    assert isinstance(open_seen_set(str(tmp_path / 'b'), bloom=True, capacity=10), BloomFilter)
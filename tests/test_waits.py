@@ -0,0 +1,121 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from common import waits
+from common.waits import _Settled, profile_for, wait_for_more, wait_for_page
+
+# Stands in for the time module inside waits
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(waits, 'time', fake)
+    return fake
+
+def status(count=5, ready='complete', fresh=False, inflight=0, since_mutation=10000, since_network=10000):
+    return {'fresh': fresh, 'ready': ready, 'count': count, 'inflight': inflight,
+            'sinceMutation': since_mutation, 'sinceNetwork': since_network}
+
+# Answers STATUS_JS with the statuses in turn, the last one from then on
+class FakeDriver:
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.found = []
+
+    def execute_script(self, script, *args):
+        answer = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def find_elements(self, by, value):
+        return self.found
+
+def _settled(selector='div.card', min_count=1, more_than=None, stable_ms=150, quiet_ms=None,
+             network_idle_ms=None, after_action=False):
+    return _Settled(selector, min_count, more_than, stable_ms, quiet_ms, network_idle_ms, after_action)
+
+def test_the_count_must_hold_for_stable_ms(clock):
+    condition = _settled()
+    driver = FakeDriver(status(count=3), status(count=5), status(count=5))
+    assert condition(driver) is False
+    clock.advance(200)
+    assert condition(driver) is False  # the count just changed
+    clock.advance(100)
+    assert condition(driver) is False
+    clock.advance(60)
+    assert condition(driver)['count'] == 5
+
+def test_pages_still_loading_or_short_of_min_count_are_not_settled(clock):
+    condition = _settled(min_count=4, stable_ms=0)
+    assert condition(FakeDriver(status(ready='interactive'))) is False
+    assert condition(FakeDriver(status(count=3))) is False
+    assert condition(FakeDriver(status(count=4)))['count'] == 4
+
+def test_dom_quiet_and_network_idle(clock):
+    condition = _settled(stable_ms=0, quiet_ms=300, network_idle_ms=500)
+    assert condition(FakeDriver(status(since_mutation=100))) is False
+    assert condition(FakeDriver(status(inflight=1))) is False
+    assert condition(FakeDriver(status(since_network=400))) is False
+    assert condition(FakeDriver(status(since_mutation=300, since_network=500)))
+
+def test_without_a_selector_the_loaded_page_is_enough(clock):
+    condition = _settled(selector=None, stable_ms=0)
+    assert condition(FakeDriver(status(count=0)))['ready'] == 'complete'
+
+def test_a_page_mid_navigation_is_polled_again(clock):
+    assert _settled()(FakeDriver(WebDriverException("navigating"))) is False
+
+def test_after_an_action_the_old_page_does_not_count(clock):
+    condition = _settled(stable_ms=0, after_action=True)
+    clock.advance(50)
+    assert condition(FakeDriver(status())) is False
+    # Something changed since the click
+    assert condition(FakeDriver(status(since_mutation=20)))
+
+    condition = _settled(stable_ms=0, after_action=True)
+    assert condition(FakeDriver(status(fresh=True)))
+
+def test_more_than_waits_for_new_elements_or_gives_up_when_quiet(clock):
+    condition = _settled(min_count=0, more_than=5, stable_ms=150)
+    driver = FakeDriver(status(count=5))
+    assert condition(driver) is False
+    clock.advance(200)
+    assert condition(driver)['count'] == 5  # nothing new, and nothing left loading
+
+    condition = _settled(min_count=0, more_than=5, stable_ms=150)
+    driver = FakeDriver(status(count=8))
+    assert condition(driver) is False
+    clock.advance(200)
+    assert condition(driver)['count'] == 8
+
+def test_profiles_come_from_the_closest_configured_domain():
+    assert profile_for('https://www.behance.net/search')['network_idle_ms'] == 500
+    assert profile_for('https://dealsheaven.in/store/amazon')['network_idle_ms'] is None
+    assert profile_for('https://example.com/') == waits.DEFAULT_PROFILE
+    assert profile_for(None, timeout=1.0, unknown=5)['timeout'] == 1.0
+    assert 'unknown' not in profile_for(None, unknown=5)
+
+# Real WebDriverWait, with short settings
+FAST = {'timeout': 0.2, 'poll': 0.01, 'stable_ms': 0, 'quiet_ms': None, 'network_idle_ms': None}
+
+def test_wait_for_page_returns_the_settled_status():
+    driver = FakeDriver(status(ready='loading'), status(count=7))
+    assert wait_for_page(driver, 'div.card', **FAST)['count'] == 7
+
+def test_wait_for_page_gives_none_on_timeout():
+    assert wait_for_page(FakeDriver(status(ready='loading')), 'div.card', **FAST) is None
+
+def test_wait_for_more_falls_back_to_counting_on_timeout():
+    driver = FakeDriver(status(ready='loading'))
+    driver.found = ['a', 'b']
+    assert wait_for_more(driver, 'div.card', 2, **FAST) == 2